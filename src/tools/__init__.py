@@ -1,4 +1,6 @@
 """Tool modules for diagram generation and export."""
 
-from . import plantuml, mermaid, graphviz, drawio, export, openai_images
+# Importing a module registers its tools
+from . import plantuml, mermaid, graphviz, drawio, export, openai_images, batch
 
+__all__ = ["plantuml", "mermaid", "graphviz", "drawio", "export", "openai_images", "batch"]
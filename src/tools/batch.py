@@ -0,0 +1,158 @@
+"""Batch diagram generation with bounded per-engine parallelism."""
+
+import os
+import time
+import asyncio
+from typing import Any, Dict, List
+
+# Diagram tool modules register their tools on import
+from tools import plantuml, mermaid, graphviz, drawio  # noqa: F401
+from utils import progress, registry
+
+
+# Maximum number of concurrent jobs per engine within one batch
+BATCH_CONCURRENCY: Dict[str, int] = {
+    "plantuml": int(os.getenv("BATCH_CONCURRENCY_PLANTUML", "4")),
+    "mermaid": int(os.getenv("BATCH_CONCURRENCY_MERMAID", "2")),
+    "graphviz": int(os.getenv("BATCH_CONCURRENCY_GRAPHVIZ", "4")),
+    "drawio": int(os.getenv("BATCH_CONCURRENCY_DRAWIO", "4")),
+}
+
+# Diagram tools available in batches: name -> engine (registered by the tool modules)
+BATCH_TOOLS: Dict[str, str] = {
+    spec.name: spec.engine
+    for spec in registry.specs()
+    if spec.engine in BATCH_CONCURRENCY
+}
+
+
+async def _run_job(
+    index: int,
+    job: Dict[str, Any],
+    semaphores: Dict[str, asyncio.Semaphore]
+) -> Dict[str, Any]:
+    """
+    Run a single batch job, never raising.
+
+    Args:
+        index: Position of the job in the batch (1-based)
+        job: Job definition with 'tool' and 'arguments'
+        semaphores: Per-engine semaphores limiting concurrency
+
+    Returns:
+        Per-item result with status, message and duration
+    """
+    tool = job.get("tool", "") if isinstance(job, dict) else ""
+    item = {"index": index, "tool": tool, "engine": None, "ok": False, "result": "", "duration": 0.0}
+
+    if tool not in BATCH_TOOLS:
+        item["result"] = f"✗ Error: Unsupported batch tool: {tool or '(missing)'}"
+        return item
+
+    engine = BATCH_TOOLS[tool]
+    item["engine"] = engine
+
+    async with semaphores[engine]:
+        start = time.perf_counter()
+        # Per-item phases would interleave; the batch reports completed items instead
+        token = progress.set_reporter(None)
+        try:
+            result = await registry.dispatch(tool, job.get("arguments") or {})
+        except KeyError as e:
+            result = registry.ErrorResult(f"✗ Error: Missing required argument {e}")
+        except Exception as e:
+            result = registry.ErrorResult(f"✗ Error: {str(e)}")
+        finally:
+            progress.reset_reporter(token)
+        item["duration"] = time.perf_counter() - start
+
+    item["result"] = result
+    item["ok"] = not isinstance(result, registry.ErrorResult)
+    return item
+
+
+async def generate_batch(jobs: List[Dict[str, Any]]) -> str:
+    """
+    Generate many diagrams concurrently.
+
+    Jobs run in parallel with per-engine concurrency caps. A failing job
+    does not abort the rest of the batch.
+
+    Args:
+        jobs: List of jobs, each {"tool": <diagram tool name>, "arguments": {...}}
+
+    Returns:
+        Summary with per-item results and timings
+    """
+    if not jobs:
+        return registry.ErrorResult("✗ Error: No jobs provided. Please provide a non-empty 'jobs' list.")
+
+    semaphores = {
+        engine: asyncio.Semaphore(max(1, limit))
+        for engine, limit in BATCH_CONCURRENCY.items()
+    }
+
+    completed = 0
+
+    async def run_and_report(index: int, job: Dict[str, Any]) -> Dict[str, Any]:
+        nonlocal completed
+        item = await _run_job(index, job, semaphores)
+        completed += 1
+        await progress.report(completed, len(jobs), f"{completed}/{len(jobs)} done ({item['tool']})")
+        return item
+
+    await progress.report(0, len(jobs), f"0/{len(jobs)} done")
+    start = time.perf_counter()
+    items = await asyncio.gather(*(
+        run_and_report(index, job)
+        for index, job in enumerate(jobs, start=1)
+    ))
+    total = time.perf_counter() - start
+
+    succeeded = sum(1 for item in items if item["ok"])
+    status = "✓" if succeeded == len(items) else "⚠"
+    lines = [f"{status} Batch completed: {succeeded}/{len(items)} succeeded in {total:.2f}s"]
+    for item in items:
+        mark = "✓" if item["ok"] else "✗"
+        engine = f" ({item['engine']})" if item["engine"] else ""
+        lines.append(
+            f"   [{item['index']}] {mark} {item['tool']}{engine} {item['duration']:.2f}s: "
+            f"{item['result']}"
+        )
+
+    return "\n".join(lines)
+
+
+# Tool registration
+registry.register(
+    name="generate_batch",
+    description="Generate many diagrams in one call (C4, UML, sequence, Mermaid, Graphviz, draw.io). "
+               "Jobs run concurrently with per-engine limits; a failing job does not abort the rest. "
+               "Returns per-item results and timings.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "jobs": {
+                "type": "array",
+                "description": "List of diagram jobs",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "tool": {
+                            "type": "string",
+                            "enum": list(BATCH_TOOLS),
+                            "description": "Diagram tool name"
+                        },
+                        "arguments": {
+                            "type": "object",
+                            "description": "Arguments for the diagram tool (same as for a single call)"
+                        }
+                    },
+                    "required": ["tool", "arguments"]
+                }
+            }
+        },
+        "required": ["jobs"]
+    },
+    handler=lambda args: generate_batch(args["jobs"])
+)
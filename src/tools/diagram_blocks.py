@@ -0,0 +1,146 @@
+"""Rendering of fenced diagram code blocks embedded in Markdown documents."""
+
+import re
+import asyncio
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from utils import progress, registry
+from . import plantuml, mermaid, graphviz
+
+
+# Fenced block language -> engine
+DIAGRAM_LANGUAGES = {
+    "mermaid": "mermaid",
+    "plantuml": "plantuml",
+    "puml": "plantuml",
+    "dot": "graphviz",
+    "graphviz": "graphviz",
+}
+
+# Code fence line (up to 3 spaces of indentation) with its info string
+_FENCE_PATTERN = re.compile(r'^ {0,3}(?P<fence>`{3,}|~{3,})(?P<info>[^\n]*)$')
+# Info string of a diagram block: mermaid, {.plantuml}, dot title=deps, ...
+_DIAGRAM_INFO_PATTERN = re.compile(
+    r'^[ \t]*\{?\.?(?P<lang>' + "|".join(DIAGRAM_LANGUAGES) + r')\b',
+    re.IGNORECASE
+)
+
+
+def _diagram_blocks(markdown: str) -> List[Tuple[int, int, str, str]]:
+    """
+    Find top-level fenced diagram blocks.
+
+    Fences are tracked line by line, so a diagram block quoted inside another
+    fenced block (e.g. a ```mermaid example in a ````markdown block) is left
+    as code. A fence is closed by a fence of the same character that is at
+    least as long and has no info string.
+
+    Args:
+        markdown: Markdown content
+
+    Returns:
+        List of (start offset, end offset, engine, normalized source) per block
+    """
+    blocks = []
+    opening = None
+    offset = 0
+    for line in markdown.splitlines(keepends=True):
+        text = line.rstrip("\r\n")
+        fence = _FENCE_PATTERN.match(text)
+        if opening is None:
+            # Backtick fences cannot have backticks in the info string
+            if fence and not (fence.group("fence")[0] == "`" and "`" in fence.group("info")):
+                language = _DIAGRAM_INFO_PATTERN.match(fence.group("info"))
+                engine = DIAGRAM_LANGUAGES[language.group("lang").lower()] if language else None
+                opening = (fence.group("fence"), offset, engine, offset + len(line))
+        elif (
+            fence
+            and not fence.group("info").strip()
+            and fence.group("fence")[0] == opening[0][0]
+            and len(fence.group("fence")) >= len(opening[0])
+        ):
+            _, start, engine, code_start = opening
+            if engine:
+                blocks.append((start, offset + len(text), engine, markdown[code_start:offset].strip()))
+            opening = None
+        offset += len(line)
+    return blocks
+
+
+async def _render_block(engine: str, code: str, output_path: str) -> str:
+    """
+    Render one diagram block with the matching diagram tool.
+
+    Args:
+        engine: Engine name (plantuml, mermaid, graphviz)
+        code: Diagram source from the block
+        output_path: Output PNG path
+
+    Returns:
+        Tool result message (an ErrorResult if rendering failed)
+    """
+    if engine == "plantuml":
+        if "@startuml" not in code:
+            code = f"@startuml\n{code}\n@enduml"
+        return await plantuml._render_plantuml(code, output_path, "png", "PlantUML block")
+    if engine == "mermaid":
+        return await mermaid._render_mermaid(code, output_path, "png", "Mermaid block")
+    return await graphviz.generate_graph(code, output_path, "png")
+
+
+async def render_diagram_blocks(markdown: str, asset_dir: Path) -> Tuple[str, int, List[str]]:
+    """
+    Render all diagram code blocks concurrently and replace them with images.
+
+    Identical blocks are rendered once; the file name is the content hash,
+    so unchanged blocks are served from the render cache on re-export.
+    Blocks that fail to render are left as code.
+
+    Args:
+        markdown: Markdown content
+        asset_dir: Directory for rendered diagram images
+
+    Returns:
+        Tuple of (rewritten markdown, number of rendered blocks, warnings)
+    """
+    blocks = _diagram_blocks(markdown)
+    if not blocks:
+        return markdown, 0, []
+    keys = [(engine, code) for _, _, engine, code in blocks]
+
+    # Deduplicate by engine + content
+    targets: Dict[Tuple[str, str], Path] = {}
+    for key in keys:
+        if key not in targets:
+            digest = hashlib.sha256(f"{key[0]}\0{key[1]}".encode("utf-8")).hexdigest()[:16]
+            targets[key] = (asset_dir / f"{key[0]}-{digest}.png").absolute()
+
+    # Per-diagram progress would interleave with the export's own steps
+    token = progress.set_reporter(None)
+    try:
+        results = await asyncio.gather(*[
+            _render_block(engine, code, str(path)) for (engine, code), path in targets.items()
+        ])
+    finally:
+        progress.reset_reporter(token)
+
+    rendered: Dict[Tuple[str, str], Path] = {}
+    warnings = []
+    for (key, path), result in zip(targets.items(), results):
+        if not isinstance(result, registry.ErrorResult):
+            rendered[key] = path
+        else:
+            warnings.append(f"⚠ Warning: {key[0]} block left as code: {result.splitlines()[0]}")
+
+    # Angle brackets keep paths with spaces or parentheses intact
+    parts = []
+    position = 0
+    for start, end, engine, code in blocks:
+        path = rendered.get((engine, code))
+        if path:
+            parts.extend((markdown[position:start], f"![](<{path}>)"))
+            position = end
+    parts.append(markdown[position:])
+    return "".join(parts), sum(1 for key in keys if key in rendered), warnings
@@ -4,11 +4,11 @@ import asyncio
 import tempfile
 import os
 import base64
-import aiohttp
 from typing import Literal
 from pathlib import Path
 
 from utils.file_manager import ensure_output_directory, write_binary_file
+from utils import registry
 
 
 async def generate_diagram(
@@ -54,10 +54,35 @@ async def generate_diagram(
                f"   To export to {format.upper()}: Open in draw.io desktop/online and export.\n" \
                f"   Alternative: Use draw.io desktop CLI: drawio -x -f {format} -o {abs_output} {drawio_output}"
     
-    except aiohttp.ClientError as e:
-        return f"✗ Error: Could not connect to draw.io export API.\n" \
-               f"Details: {str(e)}\n" \
-               f"Alternative: Install draw.io desktop and use CLI export."
     except Exception as e:
-        return f"✗ Error generating cloud diagram: {str(e)}"
+        return registry.ErrorResult(f"✗ Error generating cloud diagram: {str(e)}")
 
+
+# Tool registration
+registry.register(
+    name="generate_cloud_diagram",
+    description="Generate cloud architecture diagram with AWS/Azure/GCP icons using draw.io.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "content": {
+                "type": "string",
+                "description": "draw.io XML diagram definition"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path"
+            },
+            "format": {
+                "type": "string",
+                "enum": ["png", "svg", "pdf"],
+                "default": "png"
+            }
+        },
+        "required": ["content", "output_path"]
+    },
+    handler=lambda args: generate_diagram(
+        args["content"], args["output_path"], args.get("format", "png")
+    ),
+    engine="drawio"
+)
@@ -1,14 +1,40 @@
 """Document export tools (PDF, DOCX) using Pandoc."""
 
+import sys
 import asyncio
 import tempfile
 import os
 import re
-from typing import Optional
+import json
+import hashlib
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
-from utils.file_manager import ensure_output_directory, write_file, read_file
+from utils.file_manager import ensure_output_directory, write_file, write_binary_file, read_file, atomic_output_path
 from utils.polish_support import get_pandoc_polish_options, format_polish_date_full
+from utils import progress, registry, metrics, concurrency, pandoc_server, latex, render_cache
+from utils.retry import HTTP_RETRY
+from .diagram_blocks import render_diagram_blocks
+
+
+# LaTeX template variables for PDF export (LaTeX engines only)
+PDF_LATEX_VARIABLES = {
+    "mainfont": "DejaVu Sans",
+    "monofont": "DejaVu Sans Mono",
+    "geometry": "margin=2cm",
+    "papersize": "a4",
+    "fontsize": "11pt",
+}
+
+# Image references: ![alt](target "title"), ![alt][label] / ![label][] / ![label], [label]: target
+# (targets with spaces are written as <target>)
+_INLINE_IMAGE_PATTERN = re.compile(r'!\[(?:[^\]\\]|\\.)*\]\(\s*(?:<([^>\n]+)>|([^)\s]+))[^)]*\)')
+_REFERENCE_IMAGE_PATTERN = re.compile(r'!\[((?:[^\]\\]|\\.)*)\](?:\[((?:[^\]\\]|\\.)*)\])?(?![(\[])')
+_REFERENCE_DEFINITION_PATTERN = re.compile(r'^ {0,3}\[((?:[^\]\\]|\\.)+)\]:[ \t]*(?:<([^>\n]+)>|(\S+))', re.MULTILINE)
+# Remote or inline resources (http:, https:, data:, ...)
+_URI_SCHEME_PATTERN = re.compile(r'^[a-zA-Z][a-zA-Z0-9+.-]*:')
+# Image formats LaTeX engines include as-is (graphicx extensions are case-sensitive)
+_LATEX_IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".pdf"}
 
 
 def fix_image_paths(content: str, base_dir: Path) -> str:
@@ -60,13 +86,213 @@ def fix_image_paths(content: str, base_dir: Path) -> str:
     return re.sub(pattern, replace_path, content)
 
 
+def _image_references(markdown_content: str) -> List[str]:
+    """
+    Get image targets of a Markdown document as written.
+    
+    Covers inline images and reference-style images whose target comes
+    from a [label]: target definition (not rewritten by fix_image_paths).
+    
+    Args:
+        markdown_content: Markdown content
+        
+    Returns:
+        Unique image targets (paths or URLs), in document order
+    """
+    targets = [bracketed or bare for bracketed, bare in _INLINE_IMAGE_PATTERN.findall(markdown_content)]
+    definitions: Dict[str, str] = {}
+    for label, bracketed, bare in _REFERENCE_DEFINITION_PATTERN.findall(markdown_content):
+        definitions.setdefault(" ".join(label.split()).lower(), bracketed or bare)
+    for alt, label in _REFERENCE_IMAGE_PATTERN.findall(markdown_content):
+        target = definitions.get(" ".join((label or alt).split()).lower())
+        if target:
+            targets.append(target)
+    return list(dict.fromkeys(targets))
+
+
+def _resolve_image(target: str) -> Optional[Path]:
+    """
+    Get the local file pandoc reads for an image target.
+    
+    Relative paths resolve against the working directory, pandoc's default
+    resource path (the binary runs in the server's working directory).
+    
+    Args:
+        target: Image target as written in the document
+        
+    Returns:
+        Absolute path, or None for remote images (URLs)
+    """
+    if _URI_SCHEME_PATTERN.match(target):
+        return None
+    return Path(target) if os.path.isabs(target) else Path.cwd() / target
+
+
+def _latex_ready_images(markdown_content: str) -> bool:
+    """
+    Check whether a LaTeX engine can include every image of a document directly.
+    
+    pandoc's own PDF pipeline converts other formats (SVG, GIF, BMP, ...),
+    downloads remote images and resolves relative paths; LaTeX compiled
+    in a temporary directory only handles existing files given by
+    absolute path.
+    
+    Args:
+        markdown_content: Markdown content (after fix_image_paths)
+        
+    Returns:
+        True if all images are local absolute PNG/JPEG/PDF files
+    """
+    return all(
+        os.path.isabs(target)
+        and Path(target).suffix in _LATEX_IMAGE_EXTENSIONS
+        and os.path.isfile(target)
+        for target in _image_references(markdown_content)
+    )
+
+
+def _media_bag(markdown_content: str) -> Optional[Dict[str, bytes]]:
+    """
+    Read every image of a document for the pandoc-server.
+    
+    The server is sandboxed: it cannot read local files or fetch URLs, so
+    all images must travel with the request.
+    
+    Args:
+        markdown_content: Markdown content
+        
+    Returns:
+        Image contents keyed by the target used in the document, or None if
+        an image is remote or missing (only the pandoc binary can handle it)
+    """
+    files = {}
+    for target in _image_references(markdown_content):
+        path = _resolve_image(target)
+        if path is None or not path.is_file():
+            return None
+        files[target] = path.read_bytes()
+    return files
+
+
+def _file_digest(path: str) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _export_cache_key(full_content: str, format: str, options: Dict) -> str:
+    """
+    Build render cache key for an exported document.
+    
+    Covers the Markdown exactly as converted (image paths fixed, diagram
+    blocks replaced, metadata block included), the conversion options and
+    the content of every referenced local image, resolved the way pandoc
+    resolves it, so editing an image invalidates the export even when the
+    Markdown is unchanged. Remote images are covered by their URL only.
+    
+    Args:
+        full_content: Markdown with YAML metadata
+        format: Output format (pdf, docx)
+        options: Conversion options (engine, TOC, template variables)
+        
+    Returns:
+        Hex digest identifying the exported document
+    """
+    manifest = [
+        f"markdown {hashlib.sha256(full_content.encode('utf-8')).hexdigest()}",
+        f"options {json.dumps(options, sort_keys=True)}",
+    ]
+    for target in _image_references(full_content):
+        path = _resolve_image(target)
+        if path is None:
+            continue
+        try:
+            manifest.append(f"image {path} {_file_digest(str(path))}")
+        except OSError:
+            manifest.append(f"image {path} missing")
+    return render_cache.make_key("\n".join(manifest), "pandoc", format)
+
+
+async def _convert_on_server(full_content: str, to: str, options: Dict, files: Optional[Dict[str, bytes]] = None) -> Optional[bytes]:
+    """
+    Convert on the pandoc-server, if one is configured and reachable.
+    
+    Args:
+        full_content: Markdown with YAML metadata
+        to: Output format (docx, latex)
+        options: pandoc options in defaults-file form
+        files: Files referenced by the document
+        
+    Returns:
+        Converted document, or None to fall back to the pandoc binary
+    """
+    if not pandoc_server.is_enabled():
+        return None
+    try:
+        async with concurrency.limit("pandoc"), metrics.phase("pandoc-server"):
+            return await pandoc_server.convert(full_content, to, options, files)
+    except Exception as e:
+        if not HTTP_RETRY.is_transient(e):
+            raise
+        print(f"Warning: pandoc-server unavailable ({str(e) or type(e).__name__}), running pandoc binary", file=sys.stderr)
+        return None
+
+
+async def _run_pandoc(cmd: list) -> bytes:
+    """
+    Run the pandoc binary.
+    
+    Args:
+        cmd: Pandoc command line
+        
+    Returns:
+        Standard output (the document when no -o is given)
+    """
+    async with concurrency.limit("pandoc"), metrics.phase("pandoc"):
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        
+        stdout, stderr = await process.communicate()
+    
+    if process.returncode != 0:
+        error_msg = stderr.decode('utf-8') if stderr else stdout.decode('utf-8')
+        raise Exception(f"Pandoc error: {error_msg}")
+    return stdout
+
+
+async def _render_embedded_diagrams(markdown_content: str, abs_output: Path) -> Tuple[str, str, str]:
+    """
+    Render ```mermaid/```plantuml/```dot blocks to images next to the exported document.
+    
+    Args:
+        markdown_content: Markdown content
+        abs_output: Absolute output path of the exported document
+        
+    Returns:
+        Tuple of (markdown with image references, warnings prefix, summary suffix)
+    """
+    await progress.report(1, 3, "embedded diagrams")
+    asset_dir = abs_output.parent / f"{abs_output.stem}_diagrams"
+    markdown_content, rendered, warnings = await render_diagram_blocks(markdown_content, asset_dir)
+    prefix = "".join(f"{warning}\n" for warning in warnings)
+    suffix = f"\n   Embedded diagrams: {rendered} rendered ({asset_dir})" if rendered else ""
+    return markdown_content, prefix, suffix
+
+
 async def export_to_pdf(
     markdown_content: Optional[str] = None,
     markdown_file_path: Optional[str] = None,
     output_path: str = "",
     title: Optional[str] = None,
     author: Optional[str] = None,
-    include_toc: bool = True
+    include_toc: bool = True,
+    render_diagrams: bool = True
 ) -> str:
     """
     Convert Markdown to PDF using Pandoc with Polish language support.
@@ -79,6 +305,7 @@ async def export_to_pdf(
         title: Document title
         author: Document author
         include_toc: Include table of contents
+        render_diagrams: Render mermaid/plantuml/dot code blocks to images
         
     Returns:
         Success message
@@ -86,10 +313,10 @@ async def export_to_pdf(
     try:
         # Validate input
         if not markdown_content and not markdown_file_path:
-            return "✗ Error: Either markdown_content or markdown_file_path must be provided"
+            return registry.ErrorResult("✗ Error: Either markdown_content or markdown_file_path must be provided")
         
         if not output_path:
-            return "✗ Error: output_path is required"
+            return registry.ErrorResult("✗ Error: output_path is required")
         
         # Ensure output directory exists
         ensure_output_directory(output_path)
@@ -108,13 +335,20 @@ async def export_to_pdf(
             # Read from file
             file_path = Path(markdown_file_path)
             if not file_path.exists():
-                return f"✗ Error: Markdown file not found: {markdown_file_path}"
+                return registry.ErrorResult(f"✗ Error: Markdown file not found: {markdown_file_path}")
             
             markdown_content = read_file(str(file_path))
             
             # Fix image paths relative to the markdown file's directory
             markdown_content = fix_image_paths(markdown_content, file_path.parent)
         
+        diagrams_note = ""
+        if render_diagrams:
+            markdown_content, diagrams_warning, diagrams_note = await _render_embedded_diagrams(
+                markdown_content, Path(output_path).absolute()
+            )
+            warning += diagrams_warning
+        
         # Prepare metadata
         metadata_yaml = "---\n"
         if title:
@@ -146,41 +380,61 @@ async def export_to_pdf(
                 else:
                     raise Exception("No PDF engine found. Install xelatex, pdflatex, or wkhtmltopdf")
             
-            # Build Pandoc command
-            cmd = [
-                "pandoc",
-                tmp_path,
-                "-o", str(abs_output),
-                f"--pdf-engine={pdf_engine}",
-            ]
-            
-            # Add LaTeX-specific options only for LaTeX engines
-            if pdf_engine in ["xelatex", "pdflatex"]:
-                cmd.extend([
-                    "-V", "mainfont=DejaVu Sans",
-                    "-V", "monofont=DejaVu Sans Mono",
-                    "-V", "geometry:margin=2cm",
-                    "-V", "papersize=a4",
-                    "-V", "fontsize=11pt",
-                ])
-            
+            options = {"variables": PDF_LATEX_VARIABLES}
             if include_toc:
-                cmd.extend(["--toc", "--toc-depth=3"])
+                options.update({"table-of-contents": True, "toc-depth": 3})
             
-            # Run Pandoc
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            # Unchanged document, options and images - reuse the previous export
+            cache_key = _export_cache_key(full_content, "pdf", {"pdf-engine": pdf_engine, **options})
+            if render_cache.lookup(cache_key, str(abs_output)):
+                await progress.report(3, 3, "done")
+                return f"{warning}✓ PDF document generated successfully: {abs_output} (cached){diagrams_note}"
             
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                error_msg = stderr.decode('utf-8') if stderr else stdout.decode('utf-8')
-                raise Exception(f"Pandoc error: {error_msg}")
+            # Markdown -> LaTeX (pandoc-server or binary), then LaTeX -> PDF with the
+            # cached preamble format. Other images need pandoc's own PDF pipeline,
+            # which converts, downloads or resolves them.
+            via = ""
+            if pdf_engine in ["xelatex", "pdflatex"] and _latex_ready_images(markdown_content):
+                await progress.report(2, 3, "pandoc pass")
+                tex = await _convert_on_server(full_content, "latex", options)
+                if tex is not None:
+                    via = "via pandoc server, "
+                else:
+                    cmd = ["pandoc", tmp_path, "--standalone", "--to=latex"]
+                    for name, value in PDF_LATEX_VARIABLES.items():
+                        cmd.extend(["-V", f"{name}={value}"])
+                    if include_toc:
+                        cmd.extend(["--toc", "--toc-depth=3"])
+                    tex = await _run_pandoc(cmd)
+                
+                async with concurrency.limit("pandoc"):
+                    runs = await latex.compile_pdf(tex, pdf_engine, str(abs_output))
+                via = f" ({via}{runs} {pdf_engine} run{'s' if runs > 1 else ''})"
+            else:
+                with atomic_output_path(str(abs_output)) as tmp_output:
+                    # Build Pandoc command
+                    cmd = [
+                        "pandoc",
+                        tmp_path,
+                        "-o", tmp_output,
+                        f"--pdf-engine={pdf_engine}",
+                    ]
+                    
+                    # Add LaTeX-specific options only for LaTeX engines
+                    if pdf_engine in ["xelatex", "pdflatex"]:
+                        for name, value in PDF_LATEX_VARIABLES.items():
+                            cmd.extend(["-V", f"{name}={value}"])
+                    
+                    if include_toc:
+                        cmd.extend(["--toc", "--toc-depth=3"])
+                    
+                    # Run Pandoc
+                    await progress.report(2, 3, "pandoc pass")
+                    await _run_pandoc(cmd)
             
-            success_msg = f"✓ PDF document generated successfully: {abs_output}"
+            render_cache.store_file(cache_key, str(abs_output))
+            await progress.report(3, 3, "done")
+            success_msg = f"✓ PDF document generated successfully: {abs_output}{via}{diagrams_note}"
             if warning:
                 success_msg = warning + success_msg
             return success_msg
@@ -190,17 +444,18 @@ async def export_to_pdf(
             os.unlink(tmp_path)
     
     except FileNotFoundError:
-        return f"✗ Error: Pandoc not found.\n" \
-               f"Install it with: brew install pandoc (macOS) or apt-get install pandoc texlive-xetex (Linux)"
+        return registry.ErrorResult(f"✗ Error: Pandoc not found.\n"
+               f"Install it with: brew install pandoc (macOS) or apt-get install pandoc texlive-xetex (Linux)")
     except Exception as e:
-        return f"✗ Error generating PDF: {str(e)}"
+        return registry.ErrorResult(f"✗ Error generating PDF: {str(e)}")
 
 
 async def export_to_docx(
     markdown_content: str,
     output_path: str,
     title: Optional[str] = None,
-    author: Optional[str] = None
+    author: Optional[str] = None,
+    render_diagrams: bool = True
 ) -> str:
     """
     Convert Markdown to DOCX using Pandoc with Polish language support.
@@ -210,6 +465,7 @@ async def export_to_docx(
         output_path: Output DOCX file path
         title: Document title
         author: Document author
+        render_diagrams: Render mermaid/plantuml/dot code blocks to images
         
     Returns:
         Success message
@@ -218,6 +474,13 @@ async def export_to_docx(
         # Ensure output directory exists
         ensure_output_directory(output_path)
         
+        warning = ""
+        diagrams_note = ""
+        if render_diagrams:
+            markdown_content, warning, diagrams_note = await _render_embedded_diagrams(
+                markdown_content, Path(output_path).absolute()
+            )
+        
         # Prepare metadata
         metadata_yaml = "---\n"
         if title:
@@ -238,39 +501,52 @@ async def export_to_docx(
         try:
             abs_output = Path(output_path).absolute()
             
-            # Build Pandoc command
-            cmd = [
-                "pandoc",
-                tmp_path,
-                "-o", str(abs_output),
-                "--toc",
-                "--toc-depth=3"
-            ]
+            options = {"table-of-contents": True, "toc-depth": 3}
             
-            # Run Pandoc
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
+            # Unchanged document and images - reuse the previous export
+            cache_key = _export_cache_key(full_content, "docx", options)
+            if render_cache.lookup(cache_key, str(abs_output)):
+                await progress.report(3, 3, "done")
+                return f"{warning}✓ DOCX document generated successfully: {abs_output} (cached){diagrams_note}"
             
-            if process.returncode != 0:
-                error_msg = stderr.decode('utf-8') if stderr else stdout.decode('utf-8')
-                raise Exception(f"Pandoc error: {error_msg}")
+            # Prefer the long-running pandoc-server; images travel with the request,
+            # documents with images the client cannot supply go to the binary
+            await progress.report(2, 3, "pandoc pass")
+            files = _media_bag(markdown_content) if pandoc_server.is_enabled() else None
+            docx = None
+            if files is not None:
+                docx = await _convert_on_server(full_content, "docx", options, files)
+            via = ""
+            if docx is not None:
+                write_binary_file(str(abs_output), docx)
+                via = " (via pandoc server)"
+            else:
+                with atomic_output_path(str(abs_output)) as tmp_output:
+                    # Build Pandoc command
+                    cmd = [
+                        "pandoc",
+                        tmp_path,
+                        "-o", tmp_output,
+                        "--toc",
+                        "--toc-depth=3"
+                    ]
+                    
+                    # Run Pandoc
+                    await _run_pandoc(cmd)
             
-            return f"✓ DOCX document generated successfully: {abs_output}"
+            render_cache.store_file(cache_key, str(abs_output))
+            await progress.report(3, 3, "done")
+            return f"{warning}✓ DOCX document generated successfully: {abs_output}{via}{diagrams_note}"
         
         finally:
             # Clean up temporary file
             os.unlink(tmp_path)
     
     except FileNotFoundError:
-        return f"✗ Error: Pandoc not found.\n" \
-               f"Install it with: brew install pandoc (macOS) or apt-get install pandoc (Linux)"
+        return registry.ErrorResult(f"✗ Error: Pandoc not found.\n"
+               f"Install it with: brew install pandoc (macOS) or apt-get install pandoc (Linux)")
     except Exception as e:
-        return f"✗ Error generating DOCX: {str(e)}"
+        return registry.ErrorResult(f"✗ Error generating DOCX: {str(e)}")
 
 
 async def create_from_template(
@@ -295,7 +571,7 @@ async def create_from_template(
         template_file = template_dir / f"{template_type}_template.md"
         
         if not template_file.exists():
-            return f"✗ Error: Template '{template_type}' not found at {template_file}"
+            return registry.ErrorResult(f"✗ Error: Template '{template_type}' not found at {template_file}")
         
         # Read template
         template_content = read_file(str(template_file))
@@ -314,5 +590,122 @@ async def create_from_template(
         return f"✓ Document created from template '{template_type}': {abs_path}"
     
     except Exception as e:
-        return f"✗ Error creating document from template: {str(e)}"
+        return registry.ErrorResult(f"✗ Error creating document from template: {str(e)}")
+
+
+# Tool registration
+registry.register(
+    name="export_to_pdf",
+    description="Convert Markdown to PDF using Pandoc. Accepts either markdown content string or file path. Full Polish language support.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "markdown_content": {
+                "type": "string",
+                "description": "Markdown content to convert (optional if markdown_file_path is provided)"
+            },
+            "markdown_file_path": {
+                "type": "string",
+                "description": "Path to markdown file to convert (optional if markdown_content is provided)"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output PDF file path"
+            },
+            "title": {
+                "type": "string",
+                "description": "Document title (optional)"
+            },
+            "author": {
+                "type": "string",
+                "description": "Document author (optional)"
+            },
+            "include_toc": {
+                "type": "boolean",
+                "default": True,
+                "description": "Include table of contents"
+            },
+            "render_diagrams": {
+                "type": "boolean",
+                "default": True,
+                "description": "Render ```mermaid, ```plantuml and ```dot code blocks to images"
+            }
+        },
+        "required": ["output_path"]
+    },
+    handler=lambda args: export_to_pdf(
+        markdown_content=args.get("markdown_content"),
+        markdown_file_path=args.get("markdown_file_path"),
+        output_path=args["output_path"],
+        title=args.get("title"),
+        author=args.get("author"),
+        include_toc=args.get("include_toc", True),
+        render_diagrams=args.get("render_diagrams", True)
+    ),
+    engine="pandoc"
+)
+
+registry.register(
+    name="export_to_docx",
+    description="Convert Markdown to DOCX (Word) using Pandoc. Full Polish language support.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "markdown_content": {
+                "type": "string",
+                "description": "Markdown content to convert"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output DOCX file path"
+            },
+            "title": {
+                "type": "string",
+                "description": "Document title (optional)"
+            },
+            "author": {
+                "type": "string",
+                "description": "Document author (optional)"
+            },
+            "render_diagrams": {
+                "type": "boolean",
+                "default": True,
+                "description": "Render ```mermaid, ```plantuml and ```dot code blocks to images"
+            }
+        },
+        "required": ["markdown_content", "output_path"]
+    },
+    handler=lambda args: export_to_docx(
+        args["markdown_content"], args["output_path"], args.get("title"), args.get("author"),
+        args.get("render_diagrams", True)
+    ),
+    engine="pandoc"
+)
 
+registry.register(
+    name="create_document_from_template",
+    description="Generate document from template (ADR, API Spec, C4, Microservices Overview).",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "template_type": {
+                "type": "string",
+                "enum": ["adr", "api_spec", "c4_context", "microservices_overview"],
+                "description": "Type of template to use"
+            },
+            "variables": {
+                "type": "object",
+                "description": "Variables to fill in the template",
+                "additionalProperties": {"type": "string"}
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path (markdown)"
+            }
+        },
+        "required": ["template_type", "variables", "output_path"]
+    },
+    handler=lambda args: create_from_template(
+        args["template_type"], args["variables"], args["output_path"]
+    )
+)
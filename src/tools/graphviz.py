@@ -3,17 +3,235 @@
 import asyncio
 import tempfile
 import os
-from typing import Literal
+from contextlib import ExitStack
+from typing import Any, Literal, Dict, List, Optional
 from pathlib import Path
 
-from utils.file_manager import ensure_output_directory
+from utils.file_manager import ensure_output_directory, write_binary_file, copy_file, atomic_output_path
+from utils import render_cache, progress, registry, metrics, concurrency, single_flight
+
+
+# Graphviz render mode:
+#   "pipe" - DOT via stdin, rendered bytes via stdout (no temporary files)
+#   "file" - DOT via temporary file, output file written by Graphviz
+GRAPHVIZ_RENDER_MODE = os.getenv("GRAPHVIZ_RENDER_MODE", "pipe").lower()
+
+# Graphviz version per layout binary (probed once per process)
+_engine_versions: Dict[str, str] = {}
+
+
+async def _get_engine_version(layout: str) -> str:
+    """
+    Get Graphviz version string for the given layout binary.
+    
+    Args:
+        layout: Layout binary name (dot, neato, ...)
+        
+    Returns:
+        Version string reported by `<layout> -V`
+    """
+    if layout not in _engine_versions:
+        process = await asyncio.create_subprocess_exec(
+            layout, "-V",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        # Graphviz prints its version to stderr
+        _engine_versions[layout] = (stderr or stdout).decode('utf-8', errors='replace').strip()
+    return _engine_versions[layout]
+
+
+async def _render_to_bytes(content: str, layout: str, format: str) -> bytes:
+    """
+    Render DOT in memory: source piped via stdin, image read from stdout.
+    
+    Args:
+        content: Complete DOT graph definition
+        layout: Layout binary (dot, neato, fdp, circo, twopi)
+        format: Output format
+        
+    Returns:
+        Rendered image bytes
+    """
+    async with concurrency.limit("graphviz"), metrics.phase("subprocess"):
+        process = await asyncio.create_subprocess_exec(
+            layout,
+            f"-T{format}",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        
+        stdout, stderr = await process.communicate(content.encode('utf-8'))
+    
+    if process.returncode != 0:
+        error_msg = stderr.decode('utf-8', errors='replace')
+        raise Exception(f"Graphviz error: {error_msg}")
+    
+    return stdout
+
+
+async def _render_to_file(content: str, layout: str, format: str, output_path: str) -> None:
+    """
+    Render DOT through a temporary input file, letting Graphviz write the output file.
+    
+    Args:
+        content: Complete DOT graph definition
+        layout: Layout binary (dot, neato, fdp, circo, twopi)
+        format: Output format
+        output_path: Absolute output file path
+    """
+    # Create temporary file for DOT input
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.dot', delete=False, encoding='utf-8') as tmp:
+        tmp.write(content)
+        tmp_path = tmp.name
+    
+    try:
+        with atomic_output_path(output_path) as tmp_output:
+            # Run Graphviz
+            cmd = [
+                layout,  # dot, neato, fdp, circo, or twopi
+                f"-T{format}",
+                tmp_path,
+                "-o", tmp_output
+            ]
+            
+            async with concurrency.limit("graphviz"), metrics.phase("subprocess"):
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                
+                stdout, stderr = await process.communicate()
+            
+            if process.returncode != 0:
+                error_msg = stderr.decode('utf-8') if stderr else stdout.decode('utf-8')
+                raise Exception(f"Graphviz error: {error_msg}")
+    
+    finally:
+        # Clean up temporary file
+        os.unlink(tmp_path)
+
+
+async def _render_to_files(content: str, layout: str, outputs: Dict[str, Path]) -> None:
+    """
+    Render DOT into several formats with a single Graphviz invocation.
+    
+    Graphviz computes the layout once and emits one output per -T/-o pair.
+    
+    Args:
+        content: Complete DOT graph definition
+        layout: Layout binary (dot, neato, fdp, circo, twopi)
+        outputs: Mapping of format -> absolute output path
+    """
+    with ExitStack() as stack:
+        cmd = [layout]
+        for fmt, path in outputs.items():
+            cmd.extend([f"-T{fmt}", "-o", stack.enter_context(atomic_output_path(str(path)))])
+        
+        async with concurrency.limit("graphviz"), metrics.phase("subprocess"):
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            
+            stdout, stderr = await process.communicate(content.encode('utf-8'))
+        
+        if process.returncode != 0:
+            error_msg = stderr.decode('utf-8', errors='replace') if stderr else stdout.decode('utf-8', errors='replace')
+            raise Exception(f"Graphviz error: {error_msg}")
+
+
+async def _generate_multi_format(
+    content: str,
+    output_path: str,
+    formats: List[str],
+    layout: str
+) -> str:
+    """
+    Generate the same graph in several formats from one layout run.
+    
+    Args:
+        content: Complete DOT graph definition
+        output_path: Output file path; each format gets its own extension
+        formats: Output formats (png, svg, pdf)
+        layout: Graph layout algorithm
+        
+    Returns:
+        Success message listing all output files
+    """
+    engine_version = await _get_engine_version(layout)
+    base_output = Path(output_path).absolute()
+    
+    # Deduplicate formats, keeping requested order
+    outputs = {fmt: base_output.with_suffix(f".{fmt}") for fmt in dict.fromkeys(formats)}
+    
+    # Serve cached formats, render only the missing ones
+    cache_keys = {}
+    cached = set()
+    pending = {}
+    for fmt, path in outputs.items():
+        cache_keys[fmt] = render_cache.make_key(
+            content, "graphviz", fmt,
+            layout=layout,
+            engine_version=engine_version
+        )
+        if render_cache.lookup(cache_keys[fmt], str(path)):
+            cached.add(fmt)
+        else:
+            pending[fmt] = path
+    
+    shared = False
+    if pending:
+        async def render() -> Dict[str, str]:
+            await progress.report(1, 2, f"render ({layout}: {', '.join(pending)})")
+            await _render_to_files(content, layout, pending)
+            for fmt, path in pending.items():
+                metrics.add_bytes(path.stat().st_size)
+                render_cache.store_file(cache_keys[fmt], str(path))
+            return {fmt: str(path) for fmt, path in pending.items()}
+        
+        # Identical concurrent requests share one layout run
+        rendered_paths, shared = await single_flight.renders.do("+".join(cache_keys[fmt] for fmt in pending), render)
+        if shared:
+            for fmt, path in pending.items():
+                copy_file(rendered_paths[fmt], str(path))
+    
+    await progress.report(2, 2, "done")
+    lines = [f"✓ Dependency graph generated successfully ({', '.join(outputs)}) with a single layout run:"]
+    for fmt, path in outputs.items():
+        note = " (cached)" if fmt in cached else " (shared render)" if shared else ""
+        lines.append(f"   {path}{note}")
+    return "\n".join(lines)
+
+
+def _output_paths(arguments: Dict[str, Any]) -> List[str]:
+    """
+    Files written by one generate_dependency_graph call.
+    
+    Args:
+        arguments: Tool arguments
+        
+    Returns:
+        output_path, or one path per format when formats is given
+    """
+    formats = arguments.get("formats")
+    if not formats:
+        return [arguments["output_path"]]
+    base_output = Path(arguments["output_path"])
+    return [str(base_output.with_suffix(f".{fmt}")) for fmt in dict.fromkeys(formats)]
 
 
 async def generate_graph(
     content: str,
     output_path: str,
     format: Literal["png", "svg", "pdf"] = "png",
-    layout: Literal["dot", "neato", "fdp", "circo", "twopi"] = "dot"
+    layout: Literal["dot", "neato", "fdp", "circo", "twopi"] = "dot",
+    formats: Optional[List[Literal["png", "svg", "pdf"]]] = None
 ) -> str:
     """
     Generate dependency graph using Graphviz.
@@ -23,6 +241,7 @@ async def generate_graph(
         output_path: Output file path
         format: Output format
         layout: Graph layout algorithm
+        formats: Several output formats rendered from one layout run (overrides format)
         
     Returns:
         Success message
@@ -37,43 +256,88 @@ async def generate_graph(
         else:
             full_content = content
         
-        # Create temporary file for DOT input
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.dot', delete=False, encoding='utf-8') as tmp:
-            tmp.write(full_content)
-            tmp_path = tmp.name
+        if formats:
+            return await _generate_multi_format(full_content, output_path, formats, layout)
         
-        try:
-            abs_output = Path(output_path).absolute()
-            
-            # Run Graphviz
-            cmd = [
-                layout,  # dot, neato, fdp, circo, or twopi
-                f"-T{format}",
-                tmp_path,
-                "-o", str(abs_output)
-            ]
-            
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await process.communicate()
-            
-            if process.returncode != 0:
-                error_msg = stderr.decode('utf-8') if stderr else stdout.decode('utf-8')
-                raise Exception(f"Graphviz error: {error_msg}")
-            
-            return f"✓ Dependency graph generated successfully: {abs_output}"
+        abs_output = Path(output_path).absolute()
+        
+        # Serve identical renders from cache
+        cache_key = render_cache.make_key(
+            full_content, "graphviz", format,
+            layout=layout,
+            engine_version=await _get_engine_version(layout)
+        )
+        if render_cache.lookup(cache_key, str(abs_output)):
+            return f"✓ Dependency graph generated successfully: {abs_output} (cached)"
         
-        finally:
-            # Clean up temporary file
-            os.unlink(tmp_path)
+        async def render() -> str:
+            await progress.report(1, 3, f"render ({layout})")
+            if GRAPHVIZ_RENDER_MODE == "file":
+                await _render_to_file(full_content, layout, format, str(abs_output))
+                metrics.add_bytes(abs_output.stat().st_size)
+                render_cache.store_file(cache_key, str(abs_output))
+            else:
+                image_data = await _render_to_bytes(full_content, layout, format)
+                await progress.report(2, 3, f"write ({len(image_data)} bytes)")
+                write_binary_file(str(abs_output), image_data)
+                render_cache.store_bytes(cache_key, image_data)
+            return str(abs_output)
+        
+        # Identical concurrent requests share one render
+        rendered_path, shared = await single_flight.renders.do(cache_key, render)
+        if shared:
+            copy_file(rendered_path, str(abs_output))
+            return f"✓ Dependency graph generated successfully: {abs_output} (shared render)"
+        
+        await progress.report(3, 3, "done")
+        return f"✓ Dependency graph generated successfully: {abs_output}"
     
     except FileNotFoundError:
-        return f"✗ Error: Graphviz ({layout}) not found.\n" \
-               f"Install it with: brew install graphviz (macOS) or apt-get install graphviz (Linux)"
+        return registry.ErrorResult(f"✗ Error: Graphviz ({layout}) not found.\n"
+               f"Install it with: brew install graphviz (macOS) or apt-get install graphviz (Linux)")
     except Exception as e:
-        return f"✗ Error generating dependency graph: {str(e)}"
+        return registry.ErrorResult(f"✗ Error generating dependency graph: {str(e)}")
+
 
+# Tool registration
+registry.register(
+    name="generate_dependency_graph",
+    description="Generate dependency graph using Graphviz. Perfect for microservices dependencies.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "content": {
+                "type": "string",
+                "description": "DOT language graph definition"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path"
+            },
+            "format": {
+                "type": "string",
+                "enum": ["png", "svg", "pdf"],
+                "default": "png"
+            },
+            "layout": {
+                "type": "string",
+                "enum": ["dot", "neato", "fdp", "circo", "twopi"],
+                "default": "dot",
+                "description": "Graph layout algorithm"
+            },
+            "formats": {
+                "type": "array",
+                "items": {"type": "string", "enum": ["png", "svg", "pdf"]},
+                "description": "Render several formats from a single layout run (overrides format). "
+                               "Each file uses output_path with the format's extension."
+            }
+        },
+        "required": ["content", "output_path"]
+    },
+    handler=lambda args: generate_graph(
+        args["content"], args["output_path"], args.get("format", "png"), args.get("layout", "dot"),
+        args.get("formats")
+    ),
+    engine="graphviz",
+    outputs=_output_paths
+)
@@ -1,20 +1,48 @@
 """Mermaid diagram generation tools."""
 
 import os
+import sys
 import asyncio
 import tempfile
-import aiohttp
 import base64
-from typing import Literal
+import dataclasses
+from typing import Literal, List, Dict, Tuple
 from pathlib import Path
 
-from utils.file_manager import ensure_output_directory, write_file, write_binary_file
+from utils.file_manager import ensure_output_directory, write_file, write_binary_file, copy_file, atomic_output_path
+from utils import render_cache, progress, registry, metrics, concurrency, single_flight
+from utils.http_client import get_session
+from utils.retry import HTTP_RETRY
+from utils import mermaid_pool
+from utils.circuit_breaker import CircuitBreaker
 
 
 # Check if mermaid-cli is available
 MMDC_PATH = os.getenv("MMDC_PATH", "mmdc")
 # Use mermaid.ink API as fallback
 USE_MERMAID_INK_API = os.getenv("USE_MERMAID_INK_API", "true").lower() == "true"
+MERMAID_INK_URL = os.getenv("MERMAID_INK_URL", "https://mermaid.ink")
+MERMAID_INK_TIMEOUT = float(os.getenv("MERMAID_INK_TIMEOUT", "30"))
+# Self-hosted mermaid.ink-compatible endpoint (e.g. sidecar container)
+MERMAID_LOCAL_URL = os.getenv("MERMAID_LOCAL_URL", "")
+MERMAID_LOCAL_TIMEOUT = float(os.getenv("MERMAID_LOCAL_TIMEOUT", "10"))
+# Explicit renderer order, e.g. "local,pool,cli" (default: local, ink, pool, cli when enabled)
+MERMAID_RENDERERS = os.getenv("MERMAID_RENDERERS", "")
+# Circuit breaker: skip a renderer after N consecutive failures for a cool-down period
+MERMAID_BREAKER_THRESHOLD = int(os.getenv("MERMAID_BREAKER_THRESHOLD", "3"))
+MERMAID_BREAKER_COOLDOWN = float(os.getenv("MERMAID_BREAKER_COOLDOWN", "60"))
+
+_RENDERER_LABELS = {
+    "local": "local mermaid endpoint",
+    "ink": "mermaid.ink",
+    "pool": "renderer pool",
+    "cli": "mermaid-cli",
+}
+
+_breakers: Dict[str, CircuitBreaker] = {
+    name: CircuitBreaker(name, MERMAID_BREAKER_THRESHOLD, MERMAID_BREAKER_COOLDOWN)
+    for name in _RENDERER_LABELS
+}
 
 
 async def generate_flowchart(
@@ -92,65 +120,82 @@ async def generate_gantt(
     return await _render_mermaid(full_content, output_path, format, "Gantt chart")
 
 
-async def _render_mermaid(
-    content: str,
-    output_path: str,
-    format: Literal["png", "svg"],
-    diagram_name: str
-) -> str:
+class MermaidDiagramError(Exception):
+    """Diagram rejected by a healthy renderer (syntax error) - does not trip the circuit breaker."""
+
+
+class MermaidRenderFailed(Exception):
+    """Every renderer in the chain failed; the message is the complete tool result."""
+
+
+async def _render_via_ink(base_url: str, content: str, format: str, timeout: float) -> bytes:
     """
-    Render Mermaid diagram using mermaid.ink API (fallback to CLI if needed).
+    Render diagram using a mermaid.ink-compatible HTTP endpoint.
     
     Args:
+        base_url: Endpoint base URL (public mermaid.ink or self-hosted)
         content: Mermaid diagram code
-        output_path: Output file path
         format: Output format
-        diagram_name: Name for logging
+        timeout: Timeout in seconds for all attempts together
         
     Returns:
-        Success message
+        Rendered image bytes
+    """
+    import aiohttp
+    
+    # Encode diagram for URL
+    encoded = base64.urlsafe_b64encode(content.encode('utf-8')).decode('ascii')
+    
+    # mermaid.ink API endpoints (/img defaults to JPEG, so request PNG explicitly)
+    if format == "svg":
+        url = f"{base_url.rstrip('/')}/svg/{encoded}"
+    else:  # png
+        url = f"{base_url.rstrip('/')}/img/{encoded}?type=png"
+    
+    session = get_session()
+    
+    async def fetch() -> bytes:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status == 200:
+                return await response.read()
+            HTTP_RETRY.check_status(response.status)
+            if 400 <= response.status < 500:
+                raise MermaidDiagramError(f"HTTP {response.status}: {await response.text()}")
+            raise Exception(f"HTTP {response.status}")
+    
+    # Transient failures are retried before falling through to the next renderer, but
+    # within one time budget - a stalled endpoint must not multiply the fallback latency
+    return await dataclasses.replace(HTTP_RETRY, deadline=timeout).run("mermaid_ink", fetch)
+
+
+async def _render_via_pool(content: str, format: str) -> bytes:
+    """Render diagram on the persistent renderer pool."""
+    try:
+        return await mermaid_pool.get_pool().render(content, format)
+    except mermaid_pool.MermaidRenderError as e:
+        # Only a healthy worker's rejection is a diagram error; worker failures trip the breaker
+        raise MermaidDiagramError(str(e))
+
+
+async def _render_via_cli(content: str, format: str, output_path: str) -> None:
     """
+    Render diagram using mermaid-cli (mmdc), which writes the output file itself.
+    
+    Args:
+        content: Mermaid diagram code
+        format: Output format
+        output_path: Absolute output file path
+    """
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.mmd', delete=False, encoding='utf-8') as tmp:
+        tmp.write(content)
+        tmp_path = tmp.name
+    
     try:
-        # Ensure output directory exists
-        ensure_output_directory(output_path)
-        abs_output = Path(output_path).absolute()
-        
-        # Try using mermaid.ink API first (no Puppeteer issues)
-        if USE_MERMAID_INK_API:
-            try:
-                # Encode diagram for URL
-                encoded = base64.urlsafe_b64encode(content.encode('utf-8')).decode('ascii')
-                
-                # mermaid.ink API endpoints
-                if format == "svg":
-                    url = f"https://mermaid.ink/svg/{encoded}"
-                else:  # png
-                    url = f"https://mermaid.ink/img/{encoded}"
-                
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url, timeout=30) as response:
-                        if response.status == 200:
-                            image_data = await response.read()
-                            write_binary_file(str(abs_output), image_data)
-                            return f"✓ {diagram_name} generated successfully: {abs_output} (via mermaid.ink)"
-                        else:
-                            # Fallback to CLI if API fails
-                            raise Exception(f"mermaid.ink API returned HTTP {response.status}")
-            
-            except Exception as api_error:
-                # Fallback to CLI
-                print(f"Warning: mermaid.ink API failed ({api_error}), trying CLI...")
-        
-        # Fallback: Use mermaid-cli
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.mmd', delete=False, encoding='utf-8') as tmp:
-            tmp.write(content)
-            tmp_path = tmp.name
-        
-        try:
+        with atomic_output_path(output_path) as tmp_output:
             cmd = [
                 MMDC_PATH,
                 "-i", tmp_path,
-                "-o", str(abs_output),
+                "-o", tmp_output,
                 "-e", format,
                 "-b", "transparent"
             ]
@@ -165,16 +210,229 @@ async def _render_mermaid(
             
             if process.returncode != 0:
                 error_msg = stderr.decode('utf-8') if stderr else stdout.decode('utf-8')
-                raise Exception(f"Mermaid CLI error: {error_msg}")
+                raise MermaidDiagramError(f"Mermaid CLI error: {error_msg}")
+    
+    finally:
+        os.unlink(tmp_path)
+
+
+def _renderer_chain() -> List[str]:
+    """
+    Get ordered list of enabled Mermaid renderers.
+    
+    Returns:
+        Renderer names (local, ink, pool, cli)
+    """
+    if MERMAID_RENDERERS:
+        chain = [name.strip().lower() for name in MERMAID_RENDERERS.split(",") if name.strip()]
+    else:
+        chain = []
+        if MERMAID_LOCAL_URL:
+            chain.append("local")
+        if USE_MERMAID_INK_API:
+            chain.append("ink")
+        if mermaid_pool.MERMAID_POOL_ENABLED:
+            chain.append("pool")
+        chain.append("cli")
+    
+    # A self-hosted endpoint is only usable when configured
+    return [name for name in chain if name in _breakers and (name != "local" or MERMAID_LOCAL_URL)]
+
+
+async def _render_mermaid(
+    content: str,
+    output_path: str,
+    format: Literal["png", "svg"],
+    diagram_name: str
+) -> str:
+    """
+    Render Mermaid diagram using the configured renderer chain.
+    
+    Renderers are tried in order (self-hosted endpoint, mermaid.ink, renderer
+    pool, mermaid-cli). A renderer that keeps failing is skipped for a
+    cool-down period by its circuit breaker.
+    
+    Args:
+        content: Mermaid diagram code
+        output_path: Output file path
+        format: Output format
+        diagram_name: Name for logging
+        
+    Returns:
+        Success message
+    """
+    try:
+        # Ensure output directory exists
+        ensure_output_directory(output_path)
+        abs_output = Path(output_path).absolute()
+        
+        chain = _renderer_chain()
+        
+        # Serve identical renders from cache
+        cache_key = render_cache.make_key(
+            content, "mermaid", format,
+            engine_version=f"chain={','.join(chain)};cli={MMDC_PATH}"
+        )
+        if render_cache.lookup(cache_key, str(abs_output)):
+            return f"✓ {diagram_name} generated successfully: {abs_output} (cached)"
+        
+        async def render() -> Tuple[str, str]:
+            errors = []
+            cli_missing = False
+            for attempt, renderer in enumerate(chain):
+                breaker = _breakers[renderer]
+                if not breaker.allow():
+                    errors.append(f"{renderer}: skipped (circuit open)")
+                    continue
+                
+                try:
+                    # Fallbacks stay within step 1 - MCP progress must keep increasing
+                    await progress.report(1 + attempt / len(chain), 3, f"render (via {_RENDERER_LABELS[renderer]})")
+                    if renderer == "cli":
+                        async with concurrency.limit("mermaid"), metrics.phase("render:cli"):
+                            await _render_via_cli(content, format, str(abs_output))
+                        metrics.add_bytes(abs_output.stat().st_size)
+                        render_cache.store_file(cache_key, str(abs_output))
+                        breaker.record_success()
+                        return str(abs_output), ""
+                    
+                    async with concurrency.limit("mermaid"), metrics.phase(f"render:{renderer}"):
+                        if renderer == "local":
+                            image_data = await _render_via_ink(MERMAID_LOCAL_URL, content, format, MERMAID_LOCAL_TIMEOUT)
+                        elif renderer == "ink":
+                            image_data = await _render_via_ink(MERMAID_INK_URL, content, format, MERMAID_INK_TIMEOUT)
+                        else:  # pool
+                            image_data = await _render_via_pool(content, format)
+                    
+                    await progress.report(2, 3, f"write ({len(image_data)} bytes)")
+                    write_binary_file(str(abs_output), image_data)
+                    render_cache.store_bytes(cache_key, image_data)
+                    breaker.record_success()
+                    return str(abs_output), f" (via {_RENDERER_LABELS[renderer]})"
+                
+                except asyncio.CancelledError:
+                    # No verdict on the renderer's health - release a half-open trial
+                    breaker.cancel_trial()
+                    raise
+                except MermaidDiagramError as diagram_error:
+                    # Renderer is healthy, but rejected the diagram
+                    breaker.record_success()
+                    errors.append(f"{renderer}: {diagram_error}")
+                except FileNotFoundError as missing_error:
+                    breaker.record_failure()
+                    cli_missing = cli_missing or renderer == "cli"
+                    errors.append(f"{renderer}: {missing_error}")
+                except Exception as renderer_error:
+                    breaker.record_failure()
+                    errors.append(f"{renderer}: {str(renderer_error) or type(renderer_error).__name__}")
+                    print(f"Warning: Mermaid renderer '{renderer}' failed ({renderer_error}), trying next...", file=sys.stderr)
+            
+            details = "\n".join(f"   - {error}" for error in errors) or "   - no renderer enabled"
+            if cli_missing:
+                raise MermaidRenderFailed(
+                    f"✗ Error: mermaid-cli (mmdc) not found and no other Mermaid renderer available.\n"
+                    f"Install it with: npm install -g @mermaid-js/mermaid-cli\n{details}"
+                )
             
-            return f"✓ {diagram_name} generated successfully: {abs_output}"
+            raise MermaidRenderFailed(f"✗ Error generating {diagram_name}: all Mermaid renderers failed:\n{details}")
         
-        finally:
-            os.unlink(tmp_path)
+        # Identical concurrent requests share one render
+        try:
+            (rendered_path, via), shared = await single_flight.renders.do(cache_key, render)
+        except MermaidRenderFailed as failed:
+            return registry.ErrorResult(str(failed))
+        if shared:
+            copy_file(rendered_path, str(abs_output))
+            return f"✓ {diagram_name} generated successfully: {abs_output} (shared render)"
+        
+        await progress.report(3, 3, "done")
+        return f"✓ {diagram_name} generated successfully: {abs_output}{via}"
     
-    except FileNotFoundError:
-        return f"✗ Error: mermaid-cli (mmdc) not found and mermaid.ink API unavailable.\n" \
-               f"Install it with: npm install -g @mermaid-js/mermaid-cli"
     except Exception as e:
-        return f"✗ Error generating {diagram_name}: {str(e)}"
+        return registry.ErrorResult(f"✗ Error generating {diagram_name}: {str(e)}")
+
+
+# Tool registration
+registry.register(
+    name="generate_flowchart",
+    description="Generate flowchart using Mermaid. Perfect for process flows.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "content": {
+                "type": "string",
+                "description": "Mermaid flowchart code"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path"
+            },
+            "format": {
+                "type": "string",
+                "enum": ["png", "svg"],
+                "default": "png"
+            }
+        },
+        "required": ["content", "output_path"]
+    },
+    handler=lambda args: generate_flowchart(
+        args["content"], args["output_path"], args.get("format", "png")
+    ),
+    engine="mermaid"
+)
+
+registry.register(
+    name="generate_mermaid_sequence",
+    description="Generate sequence diagram using Mermaid. Alternative to PlantUML sequences.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "content": {
+                "type": "string",
+                "description": "Mermaid sequence diagram code"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path"
+            },
+            "format": {
+                "type": "string",
+                "enum": ["png", "svg"],
+                "default": "png"
+            }
+        },
+        "required": ["content", "output_path"]
+    },
+    handler=lambda args: generate_sequence(
+        args["content"], args["output_path"], args.get("format", "png")
+    ),
+    engine="mermaid"
+)
 
+registry.register(
+    name="generate_gantt",
+    description="Generate Gantt chart using Mermaid. Perfect for project timelines.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "content": {
+                "type": "string",
+                "description": "Mermaid Gantt diagram code"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path"
+            },
+            "format": {
+                "type": "string",
+                "enum": ["png", "svg"],
+                "default": "png"
+            }
+        },
+        "required": ["content", "output_path"]
+    },
+    handler=lambda args: generate_gantt(
+        args["content"], args["output_path"], args.get("format", "png")
+    ),
+    engine="mermaid"
+)
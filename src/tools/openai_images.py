@@ -9,6 +9,8 @@ from pathlib import Path
 
 from utils.file_manager import ensure_output_directory, write_binary_file
 from utils.polish_support import POLISH_CHARS
+from utils import progress, registry, metrics, concurrency
+from utils.retry import HTTP_RETRY
 
 # OpenAI configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -427,11 +429,11 @@ async def generate_image_openai(
     # Check if OpenAI is available
     is_available, error_msg = _check_openai_available()
     if not is_available:
-        return f"✗ Error: {error_msg}\n" \
-               f"To use this feature:\n" \
-               f"1. Install: pip install openai>=1.3.0\n" \
-               f"2. Set OPENAI_API_KEY environment variable\n" \
-               f"3. Get API key from: https://platform.openai.com/api-keys"
+        return registry.ErrorResult(f"✗ Error: {error_msg}\n"
+               f"To use this feature:\n"
+               f"1. Install: pip install openai>=1.3.0\n"
+               f"2. Set OPENAI_API_KEY environment variable\n"
+               f"3. Get API key from: https://platform.openai.com/api-keys")
     
     try:
         from openai import AsyncOpenAI
@@ -440,8 +442,8 @@ async def generate_image_openai(
         ensure_output_directory(output_path)
         abs_output = Path(output_path).absolute()
         
-        # Initialize OpenAI client
-        client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+        # Initialize OpenAI client (the SDK retries API calls itself, aligned with the shared retry policy)
+        client = AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=HTTP_RETRY.max_attempts - 1)
         
         # Extract text labels before modifying prompt (for hybrid approach)
         text_labels = []
@@ -453,14 +455,16 @@ async def generate_image_openai(
         enhanced_prompt = _enhance_prompt_for_no_text(prompt)
         
         # Generate image
+        await progress.report(0, 4, "generate (OpenAI API)")
         try:
-            response = await client.images.generate(
-                model=OPENAI_MODEL,
-                prompt=enhanced_prompt,
-                size=size,
-                quality=quality,
-                n=1
-            )
+            async with concurrency.limit("openai"), metrics.phase("api"):
+                response = await client.images.generate(
+                    model=OPENAI_MODEL,
+                    prompt=enhanced_prompt,
+                    size=size,
+                    quality=quality,
+                    n=1
+                )
         except Exception as api_error:
             # Re-raise to be handled by outer exception handler
             raise api_error
@@ -468,77 +472,88 @@ async def generate_image_openai(
         # Get image URL
         image_url = response.data[0].url
         
-        # Download image
-        import aiohttp
-        async with aiohttp.ClientSession() as session:
+        # Download image (shared pooled session, transient failures are retried)
+        await progress.report(1, 4, "download")
+        from utils.http_client import get_session
+        session = get_session()
+        
+        async def download() -> bytes:
             async with session.get(image_url) as img_response:
-                if img_response.status == 200:
-                    image_data = await img_response.read()
-                    
-                    # Save base image (without text) to temporary location
-                    base_image_path = str(abs_output).replace('.png', '_base.png')
-                    write_binary_file(base_image_path, image_data)
-                    
-                    # Add text overlay if requested and labels were found
-                    if add_text_overlay and text_labels:
-                        overlay_result = _add_text_overlay(base_image_path, text_labels, str(abs_output))
-                        # Remove temporary base image
-                        try:
-                            os.remove(base_image_path)
-                        except Exception:
-                            pass
-                        
-                        if "Error" in overlay_result:
-                            # If overlay fails, use base image
-                            import shutil
-                            shutil.copy(base_image_path, str(abs_output))
-                            return f"✓ Image generated (text overlay failed): {abs_output}\n" \
-                                   f"   {overlay_result}\n" \
-                                   f"   Prompt: {prompt[:100]}...\n" \
-                                   f"   Size: {size}, Quality: {quality}"
-                        else:
-                            return f"✓ Image generated with text overlay: {abs_output}\n" \
-                                   f"   Labels added: {len(text_labels)}\n" \
-                                   f"   Prompt: {prompt[:100]}...\n" \
-                                   f"   Size: {size}, Quality: {quality}"
-                    else:
-                        # No text overlay requested or no labels found
-                        if os.path.exists(base_image_path) and base_image_path != str(abs_output):
-                            import shutil
-                            shutil.move(base_image_path, str(abs_output))
-                        return f"✓ Image generated successfully: {abs_output}\n" \
-                               f"   Prompt: {prompt[:100]}...\n" \
-                               f"   Size: {size}, Quality: {quality}"
-                else:
+                if img_response.status != 200:
+                    HTTP_RETRY.check_status(img_response.status)
                     raise Exception(f"Failed to download image: HTTP {img_response.status}")
+                async with metrics.phase("download"):
+                    return await img_response.read()
+        
+        image_data = await HTTP_RETRY.run("openai_download", download)
+        
+        # Save base image (without text) to temporary location
+        await progress.report(2, 4, f"write ({len(image_data)} bytes)")
+        base_image_path = str(abs_output).replace('.png', '_base.png')
+        write_binary_file(base_image_path, image_data)
+        
+        # Add text overlay if requested and labels were found
+        if add_text_overlay and text_labels:
+            await progress.report(3, 4, f"overlay ({len(text_labels)} labels)")
+            with metrics.phase("overlay"):
+                overlay_result = _add_text_overlay(base_image_path, text_labels, str(abs_output))
+            # Remove temporary base image
+            try:
+                os.remove(base_image_path)
+            except Exception:
+                pass
+            
+            await progress.report(4, 4, "done")
+            if "Error" in overlay_result:
+                # If overlay fails, use base image
+                import shutil
+                shutil.copy(base_image_path, str(abs_output))
+                return f"✓ Image generated (text overlay failed): {abs_output}\n" \
+                       f"   {overlay_result}\n" \
+                       f"   Prompt: {prompt[:100]}...\n" \
+                       f"   Size: {size}, Quality: {quality}"
+            else:
+                return f"✓ Image generated with text overlay: {abs_output}\n" \
+                       f"   Labels added: {len(text_labels)}\n" \
+                       f"   Prompt: {prompt[:100]}...\n" \
+                       f"   Size: {size}, Quality: {quality}"
+        else:
+            # No text overlay requested or no labels found
+            if os.path.exists(base_image_path) and base_image_path != str(abs_output):
+                import shutil
+                shutil.move(base_image_path, str(abs_output))
+            await progress.report(4, 4, "done")
+            return f"✓ Image generated successfully: {abs_output}\n" \
+                   f"   Prompt: {prompt[:100]}...\n" \
+                   f"   Size: {size}, Quality: {quality}"
     
     except ImportError:
-        return f"✗ Error: OpenAI library not installed.\n" \
-               f"Install with: pip install openai>=1.3.0"
+        return registry.ErrorResult(f"✗ Error: OpenAI library not installed.\n"
+               f"Install with: pip install openai>=1.3.0")
     except Exception as e:
         error_str = str(e).lower()
         
         # Check for insufficient quota / payment issues
         if "insufficient_quota" in error_str or "quota" in error_str or "payment" in error_str or "billing" in error_str:
-            return f"✗ Error: Insufficient funds or quota exceeded on OpenAI account.\n" \
-                   f"Your OpenAI account has no credits or quota has been exceeded.\n" \
-                   f"To fix this:\n" \
-                   f"1. Add payment method: https://platform.openai.com/account/billing\n" \
-                   f"2. Add credits to your account\n" \
-                   f"3. Check usage limits: https://platform.openai.com/usage\n" \
-                   f"4. Wait for quota reset if you've hit rate limits\n\n" \
-                   f"Original error: {str(e)}"
+            return registry.ErrorResult(f"✗ Error: Insufficient funds or quota exceeded on OpenAI account.\n"
+                   f"Your OpenAI account has no credits or quota has been exceeded.\n"
+                   f"To fix this:\n"
+                   f"1. Add payment method: https://platform.openai.com/account/billing\n"
+                   f"2. Add credits to your account\n"
+                   f"3. Check usage limits: https://platform.openai.com/usage\n"
+                   f"4. Wait for quota reset if you've hit rate limits\n\n"
+                   f"Original error: {str(e)}")
         
         # Check for invalid API key
         if "invalid" in error_str and "api" in error_str and "key" in error_str:
-            return f"✗ Error: Invalid OpenAI API key.\n" \
-                   f"Please check your OPENAI_API_KEY environment variable.\n" \
-                   f"Get a new key: https://platform.openai.com/api-keys\n\n" \
-                   f"Original error: {str(e)}"
+            return registry.ErrorResult(f"✗ Error: Invalid OpenAI API key.\n"
+                   f"Please check your OPENAI_API_KEY environment variable.\n"
+                   f"Get a new key: https://platform.openai.com/api-keys\n\n"
+                   f"Original error: {str(e)}")
         
         # Generic error
-        return f"✗ Error generating image: {str(e)}\n" \
-               f"Make sure OPENAI_API_KEY is set correctly and your account has sufficient credits."
+        return registry.ErrorResult(f"✗ Error generating image: {str(e)}\n"
+               f"Make sure OPENAI_API_KEY is set correctly and your account has sufficient credits.")
 
 
 async def generate_icon_openai(
@@ -598,3 +613,99 @@ async def generate_illustration_openai(
         add_text_overlay=add_text_overlay
     )
 
+
+# Tool registration
+registry.register(
+    name="generate_image_openai",
+    description="Generate image using OpenAI DALL-E 3. Supports Polish prompts. "
+               "Requires OPENAI_API_KEY environment variable. "
+               "If API key is not configured, returns helpful error message.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "prompt": {
+                "type": "string",
+                "description": "Image description prompt (supports Polish, e.g., 'Kolorowy zając w stylu kreskówki')"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path (e.g., 'output/rabbit.png')"
+            },
+            "size": {
+                "type": "string",
+                "enum": ["1024x1024", "1024x1792", "1792x1024"],
+                "default": "1024x1024",
+                "description": "Image size"
+            },
+            "quality": {
+                "type": "string",
+                "enum": ["standard", "hd"],
+                "default": "standard",
+                "description": "Image quality (standard or hd)"
+            }
+        },
+        "required": ["prompt", "output_path"]
+    },
+    handler=lambda args: generate_image_openai(
+        args["prompt"], args["output_path"], args.get("size", "1024x1024"), args.get("quality", "standard")
+    ),
+    engine="openai"
+)
+
+registry.register(
+    name="generate_icon_openai",
+    description="Generate icon using OpenAI DALL-E 3. Optimized for icon generation. "
+               "Requires OPENAI_API_KEY environment variable.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "prompt": {
+                "type": "string",
+                "description": "Icon description (e.g., 'server icon', 'database icon')"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path"
+            },
+            "style": {
+                "type": "string",
+                "default": "flat design, minimalist, simple",
+                "description": "Additional style description"
+            }
+        },
+        "required": ["prompt", "output_path"]
+    },
+    handler=lambda args: generate_icon_openai(
+        args["prompt"], args["output_path"], args.get("style", "flat design, minimalist, simple")
+    ),
+    engine="openai"
+)
+
+registry.register(
+    name="generate_illustration_openai",
+    description="Generate illustration using OpenAI DALL-E 3. Optimized for concept illustrations. "
+               "Requires OPENAI_API_KEY environment variable.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "prompt": {
+                "type": "string",
+                "description": "Illustration description (e.g., 'Architecture diagram of microservices')"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path"
+            },
+            "style": {
+                "type": "string",
+                "default": "professional, technical illustration",
+                "description": "Additional style description"
+            }
+        },
+        "required": ["prompt", "output_path"]
+    },
+    handler=lambda args: generate_illustration_openai(
+        args["prompt"], args["output_path"], args.get("style", "professional, technical illustration")
+    ),
+    engine="openai"
+)
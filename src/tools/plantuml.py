@@ -3,15 +3,65 @@
 import os
 import re
 import asyncio
-import aiohttp
 from typing import Literal
 from pathlib import Path
 
-from utils.file_manager import ensure_output_directory, write_binary_file
+from utils.file_manager import ensure_output_directory, write_binary_file, write_stream, copy_file
+from utils import render_cache, progress, registry, metrics, concurrency
+from utils.http_client import get_session
+from utils.retry import HTTP_RETRY
+from utils.load_balancer import LoadBalancer
+from utils import plantuml_local, single_flight
 
 
 # PlantUML server URL (will use Docker container)
 PLANTUML_SERVER = os.getenv("PLANTUML_SERVER", "http://localhost:8080")
+# Several equivalent PlantUML servers (comma-separated), load balanced; defaults to PLANTUML_SERVER
+PLANTUML_SERVERS = [
+    url.strip() for url in os.getenv("PLANTUML_SERVERS", PLANTUML_SERVER).split(",") if url.strip()
+]
+# Response bodies are streamed to disk in chunks of this size
+PLANTUML_STREAM_CHUNK_SIZE = 64 * 1024
+# Consecutive failures after which a server is ejected, and for how long (seconds)
+PLANTUML_EJECT_THRESHOLD = int(os.getenv("PLANTUML_EJECT_THRESHOLD", "3"))
+PLANTUML_EJECT_COOLDOWN = float(os.getenv("PLANTUML_EJECT_COOLDOWN", "30"))
+
+_backends = LoadBalancer("plantuml", PLANTUML_SERVERS, PLANTUML_EJECT_THRESHOLD, PLANTUML_EJECT_COOLDOWN)
+
+# Rendering backend:
+#   "server" - PlantUML HTTP server(s) only
+#   "local"  - local plantuml.jar in persistent JVMs (PLANTUML_JAR, JAVA_PATH)
+#   "auto"   - server, falling back to the local JVM when no server is reachable
+PLANTUML_MODE = os.getenv("PLANTUML_MODE", "server").lower()
+
+# C4-PlantUML include mode:
+#   "stdlib" - !include <C4/...> from PlantUML's bundled stdlib (no outbound fetches)
+#   "remote" - !include from GitHub pinned to C4_PLANTUML_VERSION
+C4_INCLUDE_MODE = os.getenv("C4_INCLUDE_MODE", "stdlib").lower()
+C4_PLANTUML_VERSION = os.getenv("C4_PLANTUML_VERSION", "v2.10.0")
+C4_REMOTE_BASE_URL = "https://raw.githubusercontent.com/plantuml-stdlib/C4-PlantUML"
+
+# Matches remote C4-PlantUML includes, e.g. !include https://raw.githubusercontent.com/.../master/C4_Context.puml
+_REMOTE_C4_INCLUDE_PATTERN = re.compile(
+    r'^[ \t]*!include[ \t]+https?://raw\.githubusercontent\.com/plantuml-stdlib/C4-PlantUML/[^/\s]+/(C4(?:_\w+)?)\.puml[ \t]*$',
+    re.MULTILINE
+)
+
+
+def _c4_include(name: str) -> str:
+    """
+    Build a single C4-PlantUML !include line for the configured include mode.
+    
+    Args:
+        name: C4 library file name without extension (e.g. C4_Context)
+        
+    Returns:
+        !include statement
+    """
+    if C4_INCLUDE_MODE == "remote":
+        return f"!include {C4_REMOTE_BASE_URL}/{C4_PLANTUML_VERSION}/{name}.puml\n"
+    # PlantUML's bundled stdlib - resolved by the server without outbound fetches
+    return f"!include <C4/{name}>\n"
 
 
 def _get_c4_includes(diagram_type: Literal["context", "container", "component", "code"]) -> str:
@@ -24,20 +74,33 @@ def _get_c4_includes(diagram_type: Literal["context", "container", "component",
     Returns:
         String with appropriate !include statements
     """
-    base_url = "https://raw.githubusercontent.com/plantuml-stdlib/C4-PlantUML/master/"
-    
     if diagram_type == "context":
-        return f"!include {base_url}C4_Context.puml\n"
+        names = ["C4_Context"]
     elif diagram_type == "container":
-        return f"!include {base_url}C4_Context.puml\n!include {base_url}C4_Container.puml\n"
+        names = ["C4_Context", "C4_Container"]
     elif diagram_type == "component":
-        return f"!include {base_url}C4_Context.puml\n!include {base_url}C4_Container.puml\n!include {base_url}C4_Component.puml\n"
+        names = ["C4_Context", "C4_Container", "C4_Component"]
     elif diagram_type == "code":
         # Code level requires all previous levels plus C4_Component.puml (which includes code elements)
-        return f"!include {base_url}C4_Context.puml\n!include {base_url}C4_Container.puml\n!include {base_url}C4_Component.puml\n"
+        names = ["C4_Context", "C4_Container", "C4_Component"]
     else:
         # Default to context if unknown type
-        return f"!include {base_url}C4_Context.puml\n"
+        names = ["C4_Context"]
+    
+    return "".join(_c4_include(name) for name in names)
+
+
+def _localize_c4_includes(content: str) -> str:
+    """
+    Rewrite remote C4-PlantUML !include lines in user content to the configured include mode.
+    
+    Args:
+        content: PlantUML code
+        
+    Returns:
+        PlantUML code without unpinned remote C4 includes
+    """
+    return _REMOTE_C4_INCLUDE_PATTERN.sub(lambda match: _c4_include(match.group(1)).rstrip("\n"), content)
 
 
 async def generate_c4_diagram(
@@ -60,7 +123,7 @@ async def generate_c4_diagram(
     """
     # Validate content is not empty
     if not content or not content.strip():
-        return f"✗ Error: Content is empty. Please provide PlantUML/C4 diagram code."
+        return registry.ErrorResult(f"✗ Error: Content is empty. Please provide PlantUML/C4 diagram code.")
     
     # Check if content contains actual diagram definitions
     # C4 diagrams typically contain: Person, System, System_Ext, Rel, etc.
@@ -70,8 +133,8 @@ async def generate_c4_diagram(
     has_diagram_content = any(keyword in content for keyword in c4_keywords)
     
     if not has_diagram_content:
-        return f"✗ Error: Content does not contain valid C4 diagram definitions. " \
-               f"Expected keywords: Person, System, System_Ext, Rel, Container, Component, etc."
+        return registry.ErrorResult(f"✗ Error: Content does not contain valid C4 diagram definitions. "
+               f"Expected keywords: Person, System, System_Ext, Rel, Container, Component, etc.")
     
     # Get appropriate includes for diagram type
     c4_includes = _get_c4_includes(diagram_type)
@@ -142,6 +205,61 @@ async def generate_sequence_diagram(
     return await _render_plantuml(full_content, output_path, format, "Sequence diagram")
 
 
+async def _render_via_server(content: str, format: str, output_path: str) -> int:
+    """
+    Render PlantUML diagram on the least busy PlantUML server.
+    
+    Transient failures and 503s are retried, preferably on another server.
+    The image is streamed straight to output_path, so memory use does not
+    grow with image size.
+    
+    Args:
+        content: Complete PlantUML code
+        format: Output format
+        output_path: Output file path
+        
+    Returns:
+        Size of the written image in bytes
+    """
+    session = get_session()
+    tried = set()
+    
+    async def post() -> int:
+        async with concurrency.limit("plantuml"), _backends.lease(avoid=tried) as backend, metrics.phase("http"):
+            tried.add(backend.url)
+            async with session.post(
+                f"{backend.url}/{format}",
+                data=content.encode('utf-8'),
+                headers={'Content-Type': 'text/plain; charset=utf-8'}
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    HTTP_RETRY.check_status(response.status, error_text)
+                    raise Exception(f"PlantUML server error: {error_text}")
+                
+                return await write_stream(output_path, response.content.iter_chunked(PLANTUML_STREAM_CHUNK_SIZE))
+    
+    return await HTTP_RETRY.run("plantuml", post)
+
+
+async def _render_via_local(content: str, format: str, output_path: str) -> int:
+    """
+    Render PlantUML diagram with the local plantuml.jar in a warm JVM.
+    
+    Args:
+        content: Complete PlantUML code
+        format: Output format
+        output_path: Output file path
+        
+    Returns:
+        Size of the written image in bytes
+    """
+    async with concurrency.limit("plantuml"), metrics.phase("jvm"):
+        image_data = await plantuml_local.get_pool().render(content, format)
+    write_binary_file(output_path, image_data)
+    return len(image_data)
+
+
 async def _render_plantuml(
     content: str,
     output_path: str,
@@ -149,7 +267,7 @@ async def _render_plantuml(
     diagram_name: str
 ) -> str:
     """
-    Render PlantUML diagram using PlantUML server.
+    Render PlantUML diagram using PlantUML server or the local JVM (PLANTUML_MODE).
     
     Args:
         content: Complete PlantUML code
@@ -160,34 +278,158 @@ async def _render_plantuml(
     Returns:
         Success message
     """
+    # Imported on first render to keep server startup fast
+    import aiohttp
+    
     try:
+        # Resolve C4 includes locally instead of fetching them from GitHub on every render
+        content = _localize_c4_includes(content)
+        
         # Ensure output directory exists
         ensure_output_directory(output_path)
+        abs_path = Path(output_path).absolute()
         
-        # Determine endpoint based on format
-        endpoint = f"{PLANTUML_SERVER}/{format}"
+        # Serve identical renders from cache
+        engine_version = PLANTUML_SERVERS[0] if PLANTUML_MODE == "server" else \
+            f"{PLANTUML_MODE}:{PLANTUML_SERVERS[0]}:{plantuml_local.PLANTUML_JAR}"
+        cache_key = render_cache.make_key(content, "plantuml", format, engine_version=engine_version)
+        if render_cache.lookup(cache_key, str(abs_path)):
+            return f"✓ {diagram_name} generated successfully: {abs_path} (cached)"
         
-        # Send request to PlantUML server
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                endpoint,
-                data=content.encode('utf-8'),
-                headers={'Content-Type': 'text/plain; charset=utf-8'}
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"PlantUML server error: {error_text}")
-                
-                # Save the generated image
-                image_data = await response.read()
-                write_binary_file(output_path, image_data)
+        async def render() -> str:
+            if PLANTUML_MODE == "local":
+                await progress.report(1, 3, "render (local PlantUML)")
+                size = await _render_via_local(content, format, str(abs_path))
+            else:
+                await progress.report(1, 3, "render (PlantUML server)")
+                try:
+                    size = await _render_via_server(content, format, str(abs_path))
+                except Exception as e:
+                    # Fall back to the local JVM only when no server could be reached
+                    if PLANTUML_MODE != "auto" or not HTTP_RETRY.is_transient(e) or not plantuml_local.is_available():
+                        raise
+                    # Still step 1 - MCP progress must keep increasing
+                    await progress.report(1.5, 3, "render (local PlantUML, server unavailable)")
+                    size = await _render_via_local(content, format, str(abs_path))
+            
+            # Keep the written image for identical renders
+            await progress.report(2, 3, f"cache ({size} bytes)")
+            render_cache.store_file(cache_key, str(abs_path))
+            return str(abs_path)
         
-        abs_path = Path(output_path).absolute()
+        # Identical concurrent requests share one render
+        rendered_path, shared = await single_flight.renders.do(cache_key, render)
+        if shared:
+            copy_file(rendered_path, str(abs_path))
+            return f"✓ {diagram_name} generated successfully: {abs_path} (shared render)"
+        
+        await progress.report(3, 3, "done")
         return f"✓ {diagram_name} generated successfully: {abs_path}"
     
     except aiohttp.ClientError as e:
-        return f"✗ Error connecting to PlantUML server: {str(e)}\n" \
-               f"Make sure PlantUML server is running (docker-compose up)"
+        return registry.ErrorResult(f"✗ Error connecting to PlantUML server: {str(e)}\n"
+               f"Make sure PlantUML server is running (docker-compose up)")
+    except FileNotFoundError as e:
+        return registry.ErrorResult(f"✗ Error: local PlantUML not available: {str(e)}\n"
+               f"Set PLANTUML_JAR and JAVA_PATH, or use PLANTUML_MODE=server")
     except Exception as e:
-        return f"✗ Error generating {diagram_name}: {str(e)}"
+        return registry.ErrorResult(f"✗ Error generating {diagram_name}: {str(e)}")
+
+
+# Tool registration
+registry.register(
+    name="generate_c4_diagram",
+    description="Generate C4 architecture diagram (Context/Container/Component/Code). "
+               "Supports Polish language. Output: PNG or SVG file.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "diagram_type": {
+                "type": "string",
+                "enum": ["context", "container", "component", "code"],
+                "description": "Type of C4 diagram"
+            },
+            "content": {
+                "type": "string",
+                "description": "PlantUML/C4 diagram code"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path (e.g., 'output/architecture.png')"
+            },
+            "format": {
+                "type": "string",
+                "enum": ["png", "svg"],
+                "default": "png",
+                "description": "Output format"
+            }
+        },
+        "required": ["diagram_type", "content", "output_path"]
+    },
+    handler=lambda args: generate_c4_diagram(
+        args["diagram_type"], args["content"], args["output_path"], args.get("format", "png")
+    ),
+    engine="plantuml"
+)
+
+registry.register(
+    name="generate_uml_diagram",
+    description="Generate UML diagram (class, component, deployment, package, activity). "
+               "Supports Polish language.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "diagram_type": {
+                "type": "string",
+                "enum": ["class", "component", "deployment", "package", "activity", "usecase"],
+                "description": "Type of UML diagram"
+            },
+            "content": {
+                "type": "string",
+                "description": "PlantUML diagram code"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path"
+            },
+            "format": {
+                "type": "string",
+                "enum": ["png", "svg"],
+                "default": "png"
+            }
+        },
+        "required": ["diagram_type", "content", "output_path"]
+    },
+    handler=lambda args: generate_uml_diagram(
+        args["diagram_type"], args["content"], args["output_path"], args.get("format", "png")
+    ),
+    engine="plantuml"
+)
 
+registry.register(
+    name="generate_sequence_diagram",
+    description="Generate sequence diagram using PlantUML. Shows interactions between components.",
+    input_schema={
+        "type": "object",
+        "properties": {
+            "content": {
+                "type": "string",
+                "description": "PlantUML sequence diagram code"
+            },
+            "output_path": {
+                "type": "string",
+                "description": "Output file path"
+            },
+            "format": {
+                "type": "string",
+                "enum": ["png", "svg"],
+                "default": "png"
+            }
+        },
+        "required": ["content", "output_path"]
+    },
+    handler=lambda args: generate_sequence_diagram(
+        args["content"], args["output_path"], args.get("format", "png")
+    ),
+    engine="plantuml"
+)
@@ -0,0 +1,62 @@
+"""Circuit breaker for skipping failing backends during a cool-down period."""
+
+import time
+
+
+class CircuitBreaker:
+    """
+    Track consecutive failures of a backend.
+
+    After `failure_threshold` consecutive failures the circuit opens and the
+    backend is skipped for `cooldown` seconds. After the cool-down a single
+    trial call is allowed (half-open); success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, cooldown: float = 60.0) -> None:
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_progress = False
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half-open."""
+        if self.failures < self.failure_threshold:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half-open"
+
+    def allow(self) -> bool:
+        """
+        Check whether a call to the backend should be attempted.
+
+        Returns:
+            False while the circuit is open (or a half-open trial is running)
+        """
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_progress:
+            self._trial_in_progress = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the circuit after a successful call."""
+        self.failures = 0
+        self._trial_in_progress = False
+
+    def cancel_trial(self) -> None:
+        """Forget an unfinished half-open trial (e.g. the call was cancelled)."""
+        self._trial_in_progress = False
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold."""
+        self.failures += 1
+        self._trial_in_progress = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
@@ -0,0 +1,97 @@
+"""Per-engine concurrency limits shared by all tool calls."""
+
+import os
+import time
+import asyncio
+import contextvars
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from utils import metrics
+
+
+# Maximum concurrent calls into each external engine (0 = unlimited)
+ENGINE_CONCURRENCY: Dict[str, int] = {
+    "plantuml": int(os.getenv("ENGINE_CONCURRENCY_PLANTUML", "4")),
+    "mermaid": int(os.getenv("ENGINE_CONCURRENCY_MERMAID", "2")),
+    "graphviz": int(os.getenv("ENGINE_CONCURRENCY_GRAPHVIZ", str(os.cpu_count() or 4))),
+    "pandoc": int(os.getenv("ENGINE_CONCURRENCY_PANDOC", "2")),
+    "openai": int(os.getenv("ENGINE_CONCURRENCY_OPENAI", "4")),
+}
+# Queue waits at least this long are reported in tool results
+ENGINE_QUEUE_REPORT_MS = float(os.getenv("ENGINE_QUEUE_REPORT_MS", "100"))
+
+# Semaphores (bound to the event loop that created them)
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+_semaphores_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Queue waits (engine, seconds) of the current tool call
+_waits: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "engine_queue_waits", default=None
+)
+
+
+def _get_semaphore(engine: str) -> Optional[asyncio.Semaphore]:
+    global _semaphores, _semaphores_loop
+
+    loop = asyncio.get_running_loop()
+    if _semaphores_loop is not loop:
+        _semaphores = {}
+        _semaphores_loop = loop
+
+    limit = ENGINE_CONCURRENCY.get(engine, 0)
+    if limit <= 0:
+        return None
+    if engine not in _semaphores:
+        _semaphores[engine] = asyncio.Semaphore(limit)
+    return _semaphores[engine]
+
+
+@asynccontextmanager
+async def limit(engine: str) -> AsyncIterator[None]:
+    """
+    Hold one of the engine's slots, queueing until one is free.
+
+    Args:
+        engine: Engine name (plantuml, mermaid, graphviz, pandoc, openai)
+    """
+    semaphore = _get_semaphore(engine)
+    if semaphore is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    async with semaphore:
+        waited = time.perf_counter() - start
+        metrics.observe("queue_wait_seconds", waited, engine=engine)
+        waits = _waits.get()
+        if waits is not None:
+            waits.append((engine, waited))
+        yield
+
+
+async def middleware(spec: Any, arguments: Dict[str, Any], call_next: Any) -> str:
+    """
+    Registry middleware appending noticeable engine queue waits to the tool result.
+
+    Args:
+        spec: ToolSpec of the called tool
+        arguments: Tool arguments
+        call_next: Next handler in the chain
+
+    Returns:
+        Tool result
+    """
+    waits: List[Tuple[str, float]] = []
+    token = _waits.set(waits)
+    try:
+        result = await call_next(arguments)
+    finally:
+        _waits.reset(token)
+
+    total = sum(waited for _, waited in waits)
+    if total * 1000 >= ENGINE_QUEUE_REPORT_MS:
+        engines = ", ".join(dict.fromkeys(engine for engine, _ in waits))
+        # type(result) keeps an ErrorResult marked as failed
+        result = type(result)(result + f"\n   Queue wait: {total:.2f}s ({engines} at capacity)")
+    return result
@@ -1,8 +1,26 @@
 """File management utilities."""
 
 import os
+import shutil
+import asyncio
+import tempfile
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterator, Optional
+
+from utils import metrics
+
+
+# fsync output files (and their directory) before they become visible - survives power loss, costs latency
+FSYNC_OUTPUT = os.getenv("FSYNC_OUTPUT", "false").lower() == "true"
+
+# Temp files are created 0600; give finished files the usual umask-based mode
+_umask = os.umask(0)
+os.umask(_umask)
+OUTPUT_FILE_MODE = 0o666 & ~_umask
+
+# Per-path locks of tool calls writing the same output (path -> [lock, users])
+_output_locks: Dict[str, list] = {}
 
 
 def ensure_output_directory(filepath: str) -> Path:
@@ -56,6 +74,40 @@ def read_file(filepath: str, encoding: str = "utf-8") -> str:
         return f.read()
 
 
+def _open_temp(path: Path) -> tuple:
+    """Create a temp file next to the target (same filesystem, so os.replace is atomic)."""
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    return os.fdopen(fd, "wb"), tmp_path
+
+
+def _commit_temp(f: Any, tmp_path: str, path: Path) -> None:
+    """Flush a finished temp file and atomically move it over the target."""
+    f.flush()
+    if FSYNC_OUTPUT:
+        os.fsync(f.fileno())
+    f.close()
+    _publish_temp(tmp_path, path)
+
+
+def _publish_temp(tmp_path: str, path: Path) -> None:
+    """Give a finished (flushed and closed) temp file its final mode and name."""
+    os.chmod(tmp_path, OUTPUT_FILE_MODE)
+    os.replace(tmp_path, path)
+    if FSYNC_OUTPUT:
+        dir_fd = os.open(str(path.parent), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def _discard_temp(f: Any, tmp_path: str) -> None:
+    """Remove an unfinished temp file."""
+    f.close()
+    if os.path.exists(tmp_path):
+        os.unlink(tmp_path)
+
+
 def write_file(filepath: str, content: str, encoding: str = "utf-8") -> None:
     """
     Write content to file with proper encoding.
@@ -65,20 +117,165 @@ def write_file(filepath: str, content: str, encoding: str = "utf-8") -> None:
         content: Content to write
         encoding: File encoding (default: utf-8)
     """
-    path = ensure_output_directory(filepath)
-    with open(path, "w", encoding=encoding) as f:
-        f.write(content)
+    write_binary_file(filepath, content.encode(encoding))
 
 
 def write_binary_file(filepath: str, content: bytes) -> None:
     """
-    Write binary content to file.
+    Write binary content to file atomically.
+    
+    Readers see either the previous file or the complete new one, never a
+    truncated image.
     
     Args:
         filepath: Path to the file
         content: Binary content to write
     """
     path = ensure_output_directory(filepath)
-    with open(path, "wb") as f:
-        f.write(content)
+    with metrics.phase("write"):
+        f, tmp_path = _open_temp(path)
+        try:
+            f.write(content)
+            _commit_temp(f, tmp_path, path)
+        except BaseException:
+            _discard_temp(f, tmp_path)
+            raise
+    metrics.add_bytes(len(content))
+
+
+async def write_stream(filepath: str, chunks: AsyncIterable[bytes]) -> int:
+    """
+    Write streamed binary content to file without holding it in memory.
+    
+    Chunks go to a temp file next to the target, which is renamed over the
+    target only once the stream completes, so a failed download never
+    leaves a truncated file behind.
+    
+    Args:
+        filepath: Path to the file
+        chunks: Async iterable of binary chunks (e.g. response.content.iter_chunked())
+        
+    Returns:
+        Number of bytes written
+    """
+    path = ensure_output_directory(filepath)
+    f, tmp_path = _open_temp(path)
+    size = 0
+    try:
+        async for chunk in chunks:
+            f.write(chunk)
+            size += len(chunk)
+        _commit_temp(f, tmp_path, path)
+    except BaseException:
+        _discard_temp(f, tmp_path)
+        raise
+    metrics.add_bytes(size)
+    return size
+
+
+def copy_file(source: str, filepath: str) -> None:
+    """
+    Copy a file atomically (e.g. an identical render produced for another output path).
+    
+    Args:
+        source: Path to the existing file
+        filepath: Path to the new file
+    """
+    path = ensure_output_directory(filepath)
+    if Path(source).absolute() == path.absolute():
+        return
+    with metrics.phase("write"):
+        f, tmp_path = _open_temp(path)
+        try:
+            with open(source, "rb") as src:
+                shutil.copyfileobj(src, f)
+            _commit_temp(f, tmp_path, path)
+        except BaseException:
+            _discard_temp(f, tmp_path)
+            raise
+    metrics.add_bytes(path.stat().st_size)
+
+
+@contextmanager
+def atomic_output_path(filepath: str) -> Iterator[str]:
+    """
+    Temp path for engines that write the output file themselves (e.g. `dot -o`).
+    
+    The temp file keeps the target's extension (mmdc and pandoc infer the
+    format from it) and replaces the target only when the block completes.
+    The target is never written in place, so a render cache entry
+    hardlinked to it stays intact.
+    
+    Args:
+        filepath: Path to the output file
+        
+    Yields:
+        Path the engine should write to
+    """
+    path = ensure_output_directory(filepath)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", suffix=path.suffix, dir=str(path.parent))
+    os.close(fd)
+    try:
+        yield tmp_path
+        if FSYNC_OUTPUT:
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+        _publish_temp(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+@asynccontextmanager
+async def _path_lock(key: str) -> AsyncIterator[None]:
+    """Hold the lock of one absolute output path."""
+    entry = _output_locks.setdefault(key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del _output_locks[key]
 
+
+@asynccontextmanager
+async def output_lock(*filepaths: str) -> AsyncIterator[None]:
+    """
+    Serialize work producing the same output files.
+    
+    Locks are taken in sorted order, so calls writing overlapping sets of
+    files cannot deadlock.
+    
+    Args:
+        filepaths: Output file paths
+    """
+    async with AsyncExitStack() as stack:
+        for key in sorted({os.path.abspath(filepath) for filepath in filepaths}):
+            await stack.enter_async_context(_path_lock(key))
+        yield
+
+
+async def middleware(spec: Any, arguments: Dict[str, Any], call_next: Any) -> str:
+    """
+    Registry middleware running tool calls that write the same files one at a time.
+    
+    A second identical call waits for the first and is then typically
+    served from the render cache, instead of racing it on the same file.
+    Tools writing more than output_path list their files in spec.outputs.
+    
+    Args:
+        spec: ToolSpec of the called tool
+        arguments: Tool arguments
+        call_next: Next handler in the chain
+        
+    Returns:
+        Tool result
+    """
+    output_path = arguments.get("output_path")
+    if not isinstance(output_path, str) or not output_path:
+        return await call_next(arguments)
+    paths = spec.outputs(arguments) if spec.outputs else [output_path]
+    async with output_lock(*paths):
+        return await call_next(arguments)
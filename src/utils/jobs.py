@@ -0,0 +1,183 @@
+"""Background job queue for long-running tool calls."""
+
+import os
+import re
+import time
+import uuid
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from utils import progress, registry
+
+
+# Job subsystem configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_MAX_FINISHED = int(os.getenv("JOB_MAX_FINISHED", "100"))
+
+# Absolute paths of generated files mentioned in tool results
+_OUTPUT_PATH_PATTERN = re.compile(r'(/[^\s:]+\.(?:png|svg|pdf|docx|md|drawio))')
+
+# Runs a tool call by name; failed calls return a registry.ErrorResult
+Runner = Callable[[str, Dict[str, Any]], Awaitable[str]]
+
+
+@dataclass
+class Job:
+    """State of a submitted tool call."""
+
+    id: str
+    tool: str
+    arguments: Dict[str, Any]
+    status: str = "queued"  # queued, running, succeeded, failed
+    progress: float = 0.0
+    progress_message: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[str] = None
+    output_paths: List[str] = field(default_factory=list)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Run time in seconds (so far, if still running)."""
+        if self.started_at is None:
+            return None
+        return (self.finished_at or time.time()) - self.started_at
+
+
+class JobManager:
+    """Bounded worker pool executing submitted jobs."""
+
+    def __init__(self, runner: Runner, workers: int) -> None:
+        self._runner = runner
+        self._jobs: Dict[str, Job] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(max(1, workers))]
+
+    def submit(self, tool: str, arguments: Dict[str, Any]) -> Job:
+        """
+        Queue a tool call for background execution.
+
+        Args:
+            tool: Tool name
+            arguments: Tool arguments
+
+        Returns:
+            Newly created job
+        """
+        self._prune()
+        job = Job(id=uuid.uuid4().hex[:12], tool=tool, arguments=arguments)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Get job by id (None if unknown or expired)."""
+        self._prune()
+        return self._jobs.get(job_id)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            job.started_at = time.time()
+
+            async def track(value: float, total: Optional[float], message: str, job: Job = job) -> None:
+                if total:
+                    job.progress = min(1.0, value / total)
+                job.progress_message = message
+
+            # Replace any reporter inherited from the request that started the workers
+            progress.set_reporter(track)
+            try:
+                job.result = await self._runner(job.tool, job.arguments)
+                job.status = "failed" if isinstance(job.result, registry.ErrorResult) else "succeeded"
+            except Exception as e:
+                job.result = f"✗ Error: {str(e)}"
+                job.status = "failed"
+            job.finished_at = time.time()
+            job.progress = 1.0
+            job.output_paths = list(dict.fromkeys(_OUTPUT_PATH_PATTERN.findall(job.result)))
+            self._queue.task_done()
+
+    def _prune(self) -> None:
+        """Drop finished jobs past retention time or above the retention count."""
+        now = time.time()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished),
+            key=lambda job: job.finished_at
+        )
+        expired = [job for job in finished if now - job.finished_at > JOB_RETENTION_SECONDS]
+        overflow = finished[:max(0, len(finished) - JOB_MAX_FINISHED)]
+        for job in expired + overflow:
+            self._jobs.pop(job.id, None)
+
+    async def shutdown(self) -> None:
+        """Cancel all workers."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+
+# Process-wide manager (bound to the event loop that created it)
+_manager: Optional[JobManager] = None
+_manager_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_manager(runner: Runner) -> JobManager:
+    """
+    Get the shared job manager, starting its workers on first use.
+
+    Args:
+        runner: Coroutine executing a tool call by name
+
+    Returns:
+        Shared JobManager
+    """
+    global _manager, _manager_loop
+
+    loop = asyncio.get_running_loop()
+    if _manager is None or _manager_loop is not loop:
+        _manager = JobManager(runner, JOB_WORKERS)
+        _manager_loop = loop
+    return _manager
+
+
+async def shutdown() -> None:
+    """Stop job workers."""
+    global _manager, _manager_loop
+
+    if _manager is not None:
+        await _manager.shutdown()
+    _manager = None
+    _manager_loop = None
+
+
+def format_status(job: Job) -> str:
+    """
+    Format job status for tool output.
+
+    Args:
+        job: Job to describe
+
+    Returns:
+        Human-readable status
+    """
+    lines = [
+        f"Job {job.id}: {job.status}",
+        f"   Tool: {job.tool}",
+        f"   Progress: {job.progress * 100:.0f}%" + (f" ({job.progress_message})" if job.progress_message else ""),
+    ]
+    if job.duration is not None:
+        lines.append(f"   Duration: {job.duration:.2f}s")
+    else:
+        lines.append(f"   Queued for: {time.time() - job.created_at:.2f}s")
+    if job.output_paths:
+        lines.append("   Outputs: " + ", ".join(job.output_paths))
+    return "\n".join(lines)
@@ -0,0 +1,328 @@
+"""LaTeX to PDF compilation with a cached preamble format, cached aux data and minimal engine reruns."""
+
+import os
+import re
+import sys
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils import metrics
+from utils.file_manager import copy_file
+from utils.single_flight import SingleFlight
+
+
+# Engine runs per document (stops earlier once the table of contents and references are stable)
+LATEX_MAX_RUNS = int(os.getenv("LATEX_MAX_RUNS", "3"))
+# Precompile the invariant part of the preamble into a format file (needs mylatexformat)
+LATEX_FORMAT_CACHE = os.getenv("LATEX_FORMAT_CACHE", "true").lower() == "true"
+LATEX_FORMAT_CACHE_DIR = Path(os.getenv(
+    "LATEX_FORMAT_CACHE_DIR",
+    str(Path.home() / ".cache" / "mcp-doc-generator" / "latex-formats")
+))
+# Keep .aux/.toc/.out of each document so re-exports start with resolved references
+LATEX_AUX_CACHE = os.getenv("LATEX_AUX_CACHE", "true").lower() == "true"
+LATEX_AUX_CACHE_DIR = Path(os.getenv(
+    "LATEX_AUX_CACHE_DIR",
+    str(Path.home() / ".cache" / "mcp-doc-generator" / "latex-aux")
+))
+
+# Auxiliary files carried between runs (references, table of contents, PDF outlines)
+_AUX_EXTENSIONS = ("aux", "toc", "out")
+
+# LaTeX/hyperref warnings asking for another run
+_RERUN_PATTERN = re.compile(rb"Rerun to get|Please \(?re\)?run|Label\(s\) may have changed")
+
+# First preamble commands that cannot go into the format: document-specific
+# metadata (would defeat reuse) and, for XeTeX/LuaTeX, native font loading
+# (cannot be dumped)
+_DUMP_STOP_PATTERN = re.compile(r'\\(?:hypersetup|title|author|date|begin\s*\{document\})(?![a-zA-Z@])')
+_FONT_STOP_PATTERN = re.compile(
+    r'\\(?:setmainfont|setsansfont|setmonofont|setmathfont|newfontfamily|babelfont)(?![a-zA-Z@])'
+)
+_IF_PATTERN = re.compile(r'\\if[a-zA-Z@]*')
+_NEWIF_PATTERN = re.compile(r'\\newif\s*\\if[a-zA-Z@]*')
+_FI_PATTERN = re.compile(r'\\fi(?![a-zA-Z@])')
+
+# Format builds shared by concurrent exports with the same preamble
+_format_builds = SingleFlight("latex_format")
+_engine_versions: Dict[str, str] = {}
+_mylatexformat_available: Optional[bool] = None
+
+
+def _read_optional(path: Path) -> Optional[bytes]:
+    return path.read_bytes() if path.exists() else None
+
+
+def split_preamble(tex: str, engine: str) -> Optional[int]:
+    """
+    Find where the dumpable part of the preamble ends.
+
+    The cut is placed at the start of the line containing the first
+    non-dumpable command, or at the start of the top-level conditional
+    around it (a format cannot be dumped inside an open \\if).
+
+    Args:
+        tex: Standalone LaTeX source
+        engine: LaTeX engine (font commands only matter for native-font engines)
+
+    Returns:
+        Character offset of the cut, or None if nothing worth dumping precedes it
+    """
+    documentclass = tex.find("\\documentclass")
+    if documentclass < 0:
+        return None
+    native_fonts = engine != "pdflatex"
+
+    depth = 0
+    block_start = 0
+    offset = 0
+    for line in tex.splitlines(keepends=True):
+        code = line.split("%", 1)[0]
+        if depth == 0:
+            block_start = offset
+        if _DUMP_STOP_PATTERN.search(code) or (native_fonts and _FONT_STOP_PATTERN.search(code)):
+            return block_start if block_start > documentclass else None
+        code = _NEWIF_PATTERN.sub("", code)
+        depth = max(0, depth + len(_IF_PATTERN.findall(code)) - len(_FI_PATTERN.findall(code)))
+        offset += len(line)
+    return None
+
+
+def _tex_error(output: str) -> str:
+    """First TeX error line ("! ...") of a run's output."""
+    errors = [line for line in output.splitlines() if line.startswith("!")]
+    return errors[0] if errors else output.strip()[-200:]
+
+
+def _mark_failed(key: str) -> None:
+    """Remember that a preamble cannot use a format, so later exports skip the attempt."""
+    try:
+        LATEX_FORMAT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        (LATEX_FORMAT_CACHE_DIR / f"{key}.failed").touch()
+    except OSError:
+        pass
+
+
+def _aux_key(tex: str, engine: str, output_path: str) -> str:
+    """
+    Aux cache key of a document.
+
+    Identifies the document rather than its exact content (output path,
+    engine and preamble), so the aux data survives edits to the body.
+    A preamble change starts from scratch, since packages write their own
+    commands to the .aux file.
+    """
+    body = tex.find("\\begin{document}")
+    digest = hashlib.sha256()
+    for part in (engine, str(Path(output_path).absolute()), tex[:body] if body >= 0 else tex):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:24]
+
+
+def _seed_aux(work: Path, key: str) -> bool:
+    """Copy the cached aux files of a document into the work directory."""
+    seeded = False
+    for ext in _AUX_EXTENSIONS:
+        cached = LATEX_AUX_CACHE_DIR / f"{key}.{ext}"
+        if cached.exists():
+            copy_file(str(cached), str(work / f"document.{ext}"))
+            seeded = True
+    metrics.inc("latex_aux_cache_total", result="hit" if seeded else "miss")
+    return seeded
+
+
+def _save_aux(work: Path, key: str) -> None:
+    """Store the aux files of a successful compilation for the next export."""
+    try:
+        LATEX_AUX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for ext in _AUX_EXTENSIONS:
+            produced = work / f"document.{ext}"
+            cached = LATEX_AUX_CACHE_DIR / f"{key}.{ext}"
+            if produced.exists():
+                copy_file(str(produced), str(cached))
+            elif cached.exists():
+                cached.unlink()
+    except OSError as e:
+        print(f"Warning: LaTeX aux data not cached ({e})", file=sys.stderr)
+
+
+async def _run(cmd: List[str], cwd: str) -> Tuple[int, str]:
+    """Run a TeX command, returning exit code and output."""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT
+    )
+    stdout, _ = await process.communicate()
+    return process.returncode, stdout.decode("utf-8", errors="replace")
+
+
+async def _engine_version(engine: str) -> str:
+    """First line of `<engine> --version` (probed once per process)."""
+    if engine not in _engine_versions:
+        _, output = await _run([engine, "--version"], tempfile.gettempdir())
+        _engine_versions[engine] = output.splitlines()[0] if output else ""
+    return _engine_versions[engine]
+
+
+async def _has_mylatexformat() -> bool:
+    """Whether mylatexformat.ltx is installed (probed once per process)."""
+    global _mylatexformat_available
+
+    if _mylatexformat_available is None:
+        try:
+            code, output = await _run(["kpsewhich", "mylatexformat.ltx"], tempfile.gettempdir())
+            _mylatexformat_available = code == 0 and bool(output.strip())
+        except FileNotFoundError:
+            _mylatexformat_available = False
+    return _mylatexformat_available
+
+
+async def _build_format(tex: str, engine: str, key: str) -> Path:
+    """Dump everything before \\endofdump into <key>.fmt in the format cache."""
+    LATEX_FORMAT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".build-", dir=str(LATEX_FORMAT_CACHE_DIR)) as workdir:
+        (Path(workdir) / "document.tex").write_text(tex, encoding="utf-8")
+        with metrics.phase("latex-format"):
+            code, output = await _run(
+                [engine, "-ini", "-interaction=nonstopmode", "-halt-on-error", f"-jobname={key}",
+                 f"&{engine}", "mylatexformat.ltx", "document.tex"],
+                workdir
+            )
+        built = Path(workdir) / f"{key}.fmt"
+        if code != 0 or not built.exists():
+            raise Exception(f"format build failed: {_tex_error(output)}")
+        target = LATEX_FORMAT_CACHE_DIR / f"{key}.fmt"
+        os.replace(built, target)
+    return target
+
+
+async def _preamble_format(tex: str, engine: str) -> Optional[Tuple[str, Path]]:
+    """
+    Get the cached preamble format for a document, building it on first use.
+
+    Args:
+        tex: Standalone LaTeX source
+        engine: LaTeX engine
+
+    Returns:
+        Tuple of (source with \\endofdump, format path), or None if not usable
+    """
+    if not LATEX_FORMAT_CACHE or not await _has_mylatexformat():
+        return None
+    cut = split_preamble(tex, engine)
+    if cut is None:
+        return None
+
+    digest = hashlib.sha256()
+    for part in (engine, await _engine_version(engine), tex[:cut]):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    key = f"{engine}-{digest.hexdigest()[:24]}"
+    tex_with_dump = f"{tex[:cut]}\\endofdump\n{tex[cut:]}"
+
+    fmt = LATEX_FORMAT_CACHE_DIR / f"{key}.fmt"
+    failed = LATEX_FORMAT_CACHE_DIR / f"{key}.failed"
+    if failed.exists():
+        return None
+    if fmt.exists():
+        metrics.inc("latex_format_cache_total", result="hit")
+        return tex_with_dump, fmt
+
+    metrics.inc("latex_format_cache_total", result="miss")
+    try:
+        fmt, _ = await _format_builds.do(key, lambda: _build_format(tex_with_dump, engine, key))
+    except Exception as e:
+        # Not dumpable with this preamble (or no space for the cache)
+        print(f"Warning: LaTeX preamble format not cached ({str(e).splitlines()[0]})", file=sys.stderr)
+        _mark_failed(key)
+        return None
+    return tex_with_dump, fmt
+
+
+async def _compile_passes(work: Path, engine: str, extra_args: List[str]) -> int:
+    """
+    Run the engine on work/document.tex until the TOC is stable.
+
+    A TOC already in the work directory (seeded from the aux cache) counts
+    as the previous pass, so an unchanged TOC needs a single run.
+
+    Returns:
+        Number of engine runs
+    """
+    runs = 0
+    toc = _read_optional(work / "document.toc")
+    while True:
+        runs += 1
+        with metrics.phase("latex"):
+            code, output = await _run(
+                [engine, *extra_args, "-interaction=nonstopmode", "-halt-on-error", "document.tex"],
+                str(work)
+            )
+        if code != 0:
+            raise Exception(f"{engine} error: {_tex_error(output)}\n{output[-2000:]}")
+
+        previous_toc, toc = toc, _read_optional(work / "document.toc")
+        rerun = toc != previous_toc or _RERUN_PATTERN.search(_read_optional(work / "document.log") or b"")
+        if not rerun or runs >= LATEX_MAX_RUNS:
+            return runs
+
+
+async def compile_pdf(tex: bytes, engine: str, output_path: str) -> int:
+    """
+    Compile a standalone LaTeX document to PDF.
+
+    The invariant part of the preamble (document class, packages) is loaded
+    from a cached format file when possible, so each run only processes the
+    document-specific rest. The work directory is seeded with the .aux/.toc
+    files of the previous export of the same document, and the engine is
+    rerun only while the table of contents changes or LaTeX asks for a
+    rerun, at most LATEX_MAX_RUNS times. Re-exports after small edits
+    usually need a single run.
+
+    Args:
+        tex: Standalone LaTeX source
+        engine: LaTeX engine (xelatex, pdflatex)
+        output_path: Output PDF path
+
+    Returns:
+        Number of engine runs
+    """
+    source = tex.decode("utf-8")
+    aux_key = _aux_key(source, engine, output_path) if LATEX_AUX_CACHE else None
+    with tempfile.TemporaryDirectory(prefix="mcp-latex-") as workdir:
+        work = Path(workdir)
+
+        runs = None
+        preamble = await _preamble_format(source, engine)
+        if preamble is not None:
+            tex_with_dump, fmt = preamble
+            (work / "document.tex").write_text(tex_with_dump, encoding="utf-8")
+            (work / "preamble.fmt").symlink_to(fmt)
+            if aux_key:
+                _seed_aux(work, aux_key)
+            try:
+                runs = await _compile_passes(work, engine, ["-fmt=preamble"])
+            except Exception as e:
+                print(f"Warning: compiling with cached LaTeX format failed, retrying without ({str(e).splitlines()[0]})", file=sys.stderr)
+                _mark_failed(fmt.stem)
+                for stale in work.glob("document.*"):
+                    stale.unlink()
+
+        if runs is None:
+            # Fresh aux files if the format attempt failed - they may be the cause
+            (work / "document.tex").write_bytes(tex)
+            if aux_key and preamble is None:
+                _seed_aux(work, aux_key)
+            runs = await _compile_passes(work, engine, [])
+
+        copy_file(str(work / "document.pdf"), output_path)
+        if aux_key:
+            _save_aux(work, aux_key)
+        return runs
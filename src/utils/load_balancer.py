@@ -0,0 +1,92 @@
+"""Least-outstanding-requests load balancing with passive health checks."""
+
+import random
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Collection, List
+
+from utils import metrics
+from utils.circuit_breaker import CircuitBreaker
+from utils.retry import RetryPolicy
+
+
+class Backend:
+    """One backend server with its in-flight request count and health."""
+
+    def __init__(self, url: str, failure_threshold: int, cooldown: float) -> None:
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.breaker = CircuitBreaker(self.url, failure_threshold, cooldown)
+
+
+class LoadBalancer:
+    """
+    Spread requests over equivalent backends.
+
+    Each request goes to the healthy backend with the fewest requests in
+    flight. Backends failing `failure_threshold` times in a row (connection
+    errors, timeouts, retryable statuses) are ejected for `cooldown`
+    seconds, then receive a single trial request.
+    """
+
+    def __init__(self, name: str, urls: List[str], failure_threshold: int = 3, cooldown: float = 30.0) -> None:
+        if not urls:
+            raise ValueError(f"No backends configured for {name}")
+        self.name = name
+        self.backends = [Backend(url, failure_threshold, cooldown) for url in dict.fromkeys(urls)]
+
+    def pick(self, avoid: Collection[str] = ()) -> Backend:
+        """
+        Choose a backend for the next request.
+
+        Args:
+            avoid: URLs to use only if no other healthy backend is left (e.g. already tried)
+
+        Returns:
+            Chosen backend (an ejected one if all backends are ejected)
+        """
+        candidates = [backend for backend in self.backends if backend.breaker.state != "open"]
+        # Random tie-break spreads equal load instead of always hitting the first backend
+        random.shuffle(candidates)
+        candidates.sort(key=lambda backend: (backend.url in avoid, backend.outstanding))
+        for backend in candidates:
+            if backend.breaker.allow():
+                return backend
+
+        # All backends ejected - try the one ejected longest ago rather than failing outright
+        return min(self.backends, key=lambda backend: backend.breaker.opened_at)
+
+    @asynccontextmanager
+    async def lease(self, avoid: Collection[str] = ()) -> AsyncIterator[Backend]:
+        """
+        Pick a backend for one request and record the outcome.
+
+        Args:
+            avoid: URLs to skip if possible
+
+        Yields:
+            Chosen backend
+        """
+        backend = self.pick(avoid)
+        backend.outstanding += 1
+        try:
+            yield backend
+        except Exception as e:
+            if RetryPolicy.is_transient(e):
+                backend.breaker.record_failure()
+                if backend.breaker.state == "open":
+                    metrics.inc("backend_ejections_total", pool=self.name, backend=backend.url)
+            else:
+                # Backend answered; the request itself was rejected
+                backend.breaker.record_success()
+            metrics.inc("backend_requests_total", pool=self.name, backend=backend.url, result="error")
+            raise
+        except asyncio.CancelledError:
+            # No verdict on the backend's health
+            backend.breaker.cancel_trial()
+            raise
+        else:
+            backend.breaker.record_success()
+            metrics.inc("backend_requests_total", pool=self.name, backend=backend.url, result="ok")
+        finally:
+            backend.outstanding -= 1
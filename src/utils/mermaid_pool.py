@@ -0,0 +1,184 @@
+"""Persistent headless Mermaid renderer pool (Node/Puppeteer workers)."""
+
+import os
+import json
+import time
+import base64
+import asyncio
+from pathlib import Path
+from typing import Optional, List, Dict, Any
+
+
+# Renderer pool configuration
+MERMAID_POOL_ENABLED = os.getenv("MERMAID_POOL_ENABLED", "false").lower() == "true"
+MERMAID_POOL_SIZE = int(os.getenv("MERMAID_POOL_SIZE", "2"))
+MERMAID_POOL_RENDER_TIMEOUT = float(os.getenv("MERMAID_POOL_RENDER_TIMEOUT", "60"))
+# Workers idle longer than this are pinged before use
+MERMAID_POOL_HEALTH_INTERVAL = float(os.getenv("MERMAID_POOL_HEALTH_INTERVAL", "30"))
+NODE_PATH = os.getenv("NODE_PATH_BIN", "node")
+
+WORKER_SCRIPT = Path(__file__).parent / "mermaid_worker.mjs"
+
+# Max size of one protocol line (base64 image)
+_STREAM_LIMIT = 64 * 1024 * 1024
+
+
+class MermaidRenderError(Exception):
+    """Diagram rejected by a healthy worker (invalid Mermaid code)."""
+
+
+class MermaidWorkerError(Exception):
+    """Worker could not render at all (browser launch failure or crash)."""
+
+
+class MermaidWorker:
+    """One long-lived Node process keeping a headless browser warm."""
+
+    def __init__(self) -> None:
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.last_used = 0.0
+        self._next_id = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        """Start the Node worker process."""
+        self.process = await asyncio.create_subprocess_exec(
+            NODE_PATH, str(WORKER_SCRIPT),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=_STREAM_LIMIT
+        )
+        self.last_used = time.monotonic()
+
+    async def stop(self) -> None:
+        """Terminate the worker process."""
+        if self.alive:
+            self.process.kill()
+            await self.process.wait()
+        self.process = None
+
+    async def request(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Send one request and wait for its response.
+
+        Args:
+            payload: Request object (without id)
+            timeout: Response timeout in seconds
+
+        Returns:
+            Response object
+        """
+        self._next_id += 1
+        payload = {**payload, "id": self._next_id}
+
+        self.process.stdin.write((json.dumps(payload) + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not line:
+            raise ConnectionError("Mermaid worker exited unexpectedly")
+
+        response = json.loads(line)
+        if response.get("id") != payload["id"]:
+            raise ConnectionError("Mermaid worker response out of sync")
+
+        self.last_used = time.monotonic()
+        return response
+
+    async def ensure_healthy(self) -> None:
+        """Start the worker if needed and ping it after long idle periods."""
+        if not self.alive:
+            await self.start()
+            return
+
+        if time.monotonic() - self.last_used > MERMAID_POOL_HEALTH_INTERVAL:
+            try:
+                await self.request({"op": "ping"}, timeout=10)
+            except Exception:
+                await self.stop()
+                await self.start()
+
+
+class MermaidRendererPool:
+    """Fixed-size pool of warm Mermaid workers."""
+
+    def __init__(self, size: int) -> None:
+        self._workers: List[MermaidWorker] = [MermaidWorker() for _ in range(max(1, size))]
+        self._idle: asyncio.Queue = asyncio.Queue()
+        for worker in self._workers:
+            self._idle.put_nowait(worker)
+
+    async def render(self, content: str, format: str) -> bytes:
+        """
+        Render Mermaid diagram on an idle worker.
+
+        Args:
+            content: Mermaid diagram code
+            format: Output format (png or svg)
+
+        Returns:
+            Rendered image bytes
+
+        Raises:
+            MermaidRenderError: The diagram is invalid (the worker is healthy)
+            MermaidWorkerError: The worker failed to render (counts against its health)
+        """
+        worker = await self._idle.get()
+        try:
+            await worker.ensure_healthy()
+            response = await worker.request(
+                {"op": "render", "code": content, "format": format, "background": "transparent"},
+                timeout=MERMAID_POOL_RENDER_TIMEOUT
+            )
+            if not response.get("ok") and response.get("kind") != "diagram":
+                raise MermaidWorkerError(f"Mermaid worker error: {response.get('error')}")
+        except BaseException:
+            # Worker is stuck, broken or out of sync - also when cancelled, since the
+            # pending reply would be read by the next request - replace it on next use
+            await worker.stop()
+            raise
+        finally:
+            self._idle.put_nowait(worker)
+
+        if not response.get("ok"):
+            raise MermaidRenderError(response.get("error") or "render failed")
+        return base64.b64decode(response["data"])
+
+    async def close(self) -> None:
+        """Stop all workers."""
+        for worker in self._workers:
+            await worker.stop()
+
+
+# Process-wide pool (bound to the event loop that created it)
+_pool: Optional[MermaidRendererPool] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_pool() -> MermaidRendererPool:
+    """
+    Get the shared renderer pool, creating it on first use.
+
+    Returns:
+        Shared MermaidRendererPool
+    """
+    global _pool, _pool_loop
+
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        _pool = MermaidRendererPool(MERMAID_POOL_SIZE)
+        _pool_loop = loop
+    return _pool
+
+
+async def close_pool() -> None:
+    """Stop all pooled workers."""
+    global _pool, _pool_loop
+
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
+    _pool_loop = None
@@ -0,0 +1,145 @@
+#!/usr/bin/env node
+/**
+ * Persistent Mermaid renderer worker.
+ *
+ * Keeps one headless browser warm and renders Mermaid diagrams on request,
+ * so renders do not pay Chromium startup on every call (unlike mmdc).
+ *
+ * Line protocol (one JSON object per line):
+ *   stdin:  {"id": 1, "op": "render", "code": "...", "format": "png", "background": "transparent"}
+ *           {"id": 2, "op": "ping"}
+ *   stdout: {"id": 1, "ok": true, "data": "<base64>"}
+ *           {"id": 1, "ok": false, "kind": "diagram", "error": "..."}  (invalid diagram)
+ *           {"id": 1, "ok": false, "kind": "worker", "error": "..."}   (browser launch/crash)
+ *
+ * The browser is recycled after MERMAID_POOL_MAX_RENDERS renders.
+ */
+
+import { createInterface } from 'node:readline';
+import { createRequire } from 'node:module';
+import { execSync } from 'node:child_process';
+import { readFileSync } from 'node:fs';
+import path from 'node:path';
+import { pathToFileURL } from 'node:url';
+
+const MAX_RENDERS = parseInt(process.env.MERMAID_POOL_MAX_RENDERS || '100', 10);
+const BROWSER_ARGS = (process.env.MERMAID_PUPPETEER_ARGS || '--no-sandbox --disable-setuid-sandbox')
+  .split(' ')
+  .filter(Boolean);
+
+// stdout is reserved for the protocol
+console.log = console.error;
+console.info = console.error;
+console.warn = console.error;
+
+/**
+ * Locate the globally installed @mermaid-js/mermaid-cli package entry file
+ */
+function resolveGlobalMermaidCli() {
+  const globalRoot = execSync('npm root -g', { encoding: 'utf-8' }).trim();
+  const packageDir = path.join(globalRoot, '@mermaid-js', 'mermaid-cli');
+  const pkg = JSON.parse(readFileSync(path.join(packageDir, 'package.json'), 'utf-8'));
+
+  let entry = pkg.main || 'index.js';
+  if (typeof pkg.exports === 'string') {
+    entry = pkg.exports;
+  } else if (pkg.exports && pkg.exports['.']) {
+    const root = pkg.exports['.'];
+    entry = typeof root === 'string' ? root : (root.import || root.default || entry);
+  }
+  return path.join(packageDir, entry);
+}
+
+/**
+ * Load mermaid-cli renderer and puppeteer (local install first, then global)
+ */
+async function loadModules() {
+  try {
+    const mermaidCli = await import('@mermaid-js/mermaid-cli');
+    const puppeteer = (await import('puppeteer')).default;
+    return { renderMermaid: mermaidCli.renderMermaid, puppeteer };
+  } catch (e) {
+    const entryFile = resolveGlobalMermaidCli();
+    const mermaidCli = await import(pathToFileURL(entryFile).href);
+    const require = createRequire(entryFile);
+    const puppeteer = require('puppeteer');
+    return { renderMermaid: mermaidCli.renderMermaid, puppeteer };
+  }
+}
+
+const { renderMermaid, puppeteer } = await loadModules();
+
+let browser = null;
+let rendersSinceLaunch = 0;
+
+function isConnected(instance) {
+  return Boolean(instance) && (typeof instance.isConnected === 'function' ? instance.isConnected() : instance.connected);
+}
+
+function errorMessage(e) {
+  return String(e && e.message ? e.message : e);
+}
+
+/**
+ * Get a warm browser, recycling it after MAX_RENDERS renders
+ */
+async function getBrowser() {
+  if (browser && rendersSinceLaunch >= MAX_RENDERS) {
+    await browser.close().catch(() => {});
+    browser = null;
+  }
+  if (!isConnected(browser)) {
+    browser = await puppeteer.launch({ headless: true, args: BROWSER_ARGS });
+    rendersSinceLaunch = 0;
+  }
+  return browser;
+}
+
+async function handle(request) {
+  if (request.op === 'ping') {
+    return { id: request.id, ok: true };
+  }
+  if (request.op !== 'render') {
+    return { id: request.id, ok: false, kind: 'worker', error: `Unknown op: ${request.op}` };
+  }
+
+  // Launch failures propagate as worker errors
+  const activeBrowser = await getBrowser();
+  rendersSinceLaunch += 1;
+  try {
+    const { data } = await renderMermaid(activeBrowser, request.code, request.format || 'png', {
+      backgroundColor: request.background || 'transparent',
+    });
+    return { id: request.id, ok: true, data: Buffer.from(data).toString('base64') };
+  } catch (e) {
+    // A browser that died mid-render is a worker failure, not an invalid diagram
+    if (!isConnected(activeBrowser)) {
+      throw e;
+    }
+    return { id: request.id, ok: false, kind: 'diagram', error: errorMessage(e) };
+  }
+}
+
+function respond(response) {
+  process.stdout.write(JSON.stringify(response) + '\n');
+}
+
+const lines = createInterface({ input: process.stdin });
+
+// Requests are processed one at a time; the Python pool sends one request per worker
+for await (const line of lines) {
+  if (!line.trim()) {
+    continue;
+  }
+  let request = { id: null };
+  try {
+    request = JSON.parse(line);
+    respond(await handle(request));
+  } catch (e) {
+    respond({ id: request.id, ok: false, kind: 'worker', error: errorMessage(e) });
+  }
+}
+
+if (browser) {
+  await browser.close().catch(() => {});
+}
@@ -0,0 +1,296 @@
+"""In-process latency, throughput and cache metrics."""
+
+import os
+import sys
+import math
+import time
+import tempfile
+import contextvars
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+from utils import registry
+
+
+# Metrics configuration
+# Prometheus text exposition file rewritten after every tool call (disabled when empty)
+METRICS_PROMETHEUS_FILE = os.getenv("METRICS_PROMETHEUS_FILE", "")
+# Latest samples kept per series for percentiles
+METRICS_SAMPLE_SIZE = int(os.getenv("METRICS_SAMPLE_SIZE", "1024"))
+
+_PROMETHEUS_PREFIX = "mcp_doc_"
+
+# Tool whose call is currently running (labels phases, bytes and cache lookups)
+_current_tool: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_tool", default="none")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Summary:
+    """Count, sum and percentiles over the latest samples."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.sum = 0.0
+        self.samples: Deque[float] = deque(maxlen=max(1, METRICS_SAMPLE_SIZE))
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def quantile(self, q: float) -> float:
+        """Nearest-rank percentile of the kept samples (q in 0..1)."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+
+_summaries: Dict[Tuple[str, Labels], Summary] = {}
+_counters: Dict[Tuple[str, Labels], float] = {}
+_started_at = time.time()
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """
+    Record a sample (e.g. a duration in seconds).
+
+    Args:
+        name: Metric name
+        value: Sample value
+        **labels: Series labels
+    """
+    key = (name, _labels(labels))
+    summary = _summaries.get(key)
+    if summary is None:
+        summary = _summaries[key] = Summary()
+    summary.observe(value)
+
+
+def inc(name: str, amount: float = 1.0, **labels: str) -> None:
+    """
+    Increase a counter.
+
+    Args:
+        name: Metric name
+        amount: Increment
+        **labels: Series labels
+    """
+    key = (name, _labels(labels))
+    _counters[key] = _counters.get(key, 0.0) + amount
+
+
+class phase:
+    """
+    Time a phase of the current tool call (http, subprocess, write, ...).
+
+    Usable with both `with` and `async with`.
+
+    Args:
+        name: Phase name
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> "phase":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        observe("phase_duration_seconds", time.perf_counter() - self.start, tool=_current_tool.get(), phase=self.name)
+
+    async def __aenter__(self) -> "phase":
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.__exit__(*exc_info)
+
+
+def add_bytes(count: int) -> None:
+    """Count bytes written by the current tool call."""
+    inc("bytes_written_total", count, tool=_current_tool.get())
+
+
+def record_cache_lookup(hit: bool) -> None:
+    """Count a render cache lookup of the current tool call."""
+    inc("cache_lookups_total", tool=_current_tool.get(), result="hit" if hit else "miss")
+
+
+async def middleware(spec: Any, arguments: Dict[str, Any], call_next: Any) -> str:
+    """
+    Registry middleware recording per-tool latency and errors.
+
+    Args:
+        spec: ToolSpec of the called tool
+        arguments: Tool arguments
+        call_next: Next handler in the chain
+
+    Returns:
+        Tool result
+    """
+    token = _current_tool.set(spec.name)
+    start = time.perf_counter()
+    ok = False
+    try:
+        result = await call_next(arguments)
+        ok = not isinstance(result, registry.ErrorResult)
+        return result
+    finally:
+        _current_tool.reset(token)
+        observe("tool_duration_seconds", time.perf_counter() - start, tool=spec.name)
+        inc("tool_calls_total", tool=spec.name, status="ok" if ok else "error")
+        if METRICS_PROMETHEUS_FILE:
+            write_prometheus(METRICS_PROMETHEUS_FILE)
+
+
+def _series(store: Dict[Tuple[str, Labels], Any], name: str) -> List[Tuple[Dict[str, str], Any]]:
+    return [(dict(labels), value) for (metric, labels), value in sorted(store.items()) if metric == name]
+
+
+def _format_size(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def _format_latency(summary: Summary) -> str:
+    return f"p50 {summary.quantile(0.5):.3f}s, p95 {summary.quantile(0.95):.3f}s, " \
+           f"p99 {summary.quantile(0.99):.3f}s"
+
+
+def format_report() -> str:
+    """
+    Format collected metrics for the get_server_metrics tool.
+
+    Returns:
+        Human-readable metrics report
+    """
+    from utils import render_cache
+
+    uptime = time.time() - _started_at
+    calls: Dict[str, Dict[str, float]] = {}
+    for labels, value in _series(_counters, "tool_calls_total"):
+        calls.setdefault(labels["tool"], {})[labels["status"]] = value
+    total_calls = sum(sum(statuses.values()) for statuses in calls.values())
+
+    lines = [f"✓ Server metrics (uptime {uptime:.0f}s, {total_calls / max(uptime, 1.0) * 60:.1f} calls/min)"]
+
+    lines.append("\nTools:")
+    for labels, summary in _series(_summaries, "tool_duration_seconds"):
+        statuses = calls.get(labels["tool"], {})
+        errors = statuses.get("error", 0)
+        count = sum(statuses.values()) or summary.count
+        lines.append(
+            f"   {labels['tool']}: {count:.0f} calls, {errors:.0f} errors ({errors / count * 100:.1f}%), "
+            f"{_format_latency(summary)}"
+        )
+    if not calls:
+        lines.append("   (no calls yet)")
+
+    phases = _series(_summaries, "phase_duration_seconds")
+    if phases:
+        lines.append("\nPhases:")
+        for labels, summary in phases:
+            lines.append(f"   {labels['tool']}/{labels['phase']}: {summary.count} samples, {_format_latency(summary)}")
+
+    written = _series(_counters, "bytes_written_total")
+    if written:
+        lines.append("\nBytes written:")
+        for labels, value in written:
+            lines.append(f"   {labels['tool']}: {_format_size(value)}")
+
+    lookups: Dict[str, Dict[str, float]] = {}
+    for labels, value in _series(_counters, "cache_lookups_total"):
+        lookups.setdefault(labels["tool"], {})[labels["result"]] = value
+    if lookups:
+        lines.append("\nCache hit ratio:")
+        for tool, results in lookups.items():
+            hits = results.get("hit", 0)
+            total = sum(results.values())
+            lines.append(f"   {tool}: {hits:.0f}/{total:.0f} ({hits / total * 100:.1f}%)")
+
+    retries = _series(_counters, "http_retries_total")
+    if retries:
+        exhausted = {labels["target"]: value for labels, value in _series(_counters, "http_retry_exhausted_total")}
+        lines.append("\nHTTP retries:")
+        for labels, value in retries:
+            lines.append(f"   {labels['target']}: {value:.0f} retries, {exhausted.get(labels['target'], 0):.0f} calls failed after retrying")
+
+    shared = _series(_counters, "single_flight_shared_total")
+    if shared:
+        lines.append("\nCoalesced calls:")
+        for labels, value in shared:
+            lines.append(f"   {labels['group']}: {value:.0f} calls shared an identical in-flight run")
+
+    stats = render_cache.get_stats()
+    lines.append(
+        f"\nRender cache: {stats['hits']} hits, {stats['misses']} misses "
+        f"({stats['hit_ratio'] * 100:.1f}%), {_format_size(stats['size_bytes'])} stored"
+        + ("" if stats["enabled"] else " (disabled)")
+    )
+    return "\n".join(lines)
+
+
+def _prometheus_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+
+def format_prometheus() -> str:
+    """
+    Format collected metrics in Prometheus text exposition format.
+
+    Returns:
+        Exposition text
+    """
+    lines = []
+    for name in sorted({metric for metric, _ in _counters}):
+        full_name = f"{_PROMETHEUS_PREFIX}{name}"
+        lines.append(f"# TYPE {full_name} counter")
+        for labels, value in _series(_counters, name):
+            lines.append(f"{full_name}{_prometheus_labels(labels)} {value:g}")
+
+    for name in sorted({metric for metric, _ in _summaries}):
+        full_name = f"{_PROMETHEUS_PREFIX}{name}"
+        lines.append(f"# TYPE {full_name} summary")
+        for labels, summary in _series(_summaries, name):
+            for q in (0.5, 0.95, 0.99):
+                quantile_labels = {**labels, "quantile": str(q)}
+                lines.append(f"{full_name}{_prometheus_labels(quantile_labels)} {summary.quantile(q):.6f}")
+            lines.append(f"{full_name}_sum{_prometheus_labels(labels)} {summary.sum:.6f}")
+            lines.append(f"{full_name}_count{_prometheus_labels(labels)} {summary.count}")
+
+    lines.append(f"# TYPE {_PROMETHEUS_PREFIX}uptime_seconds gauge")
+    lines.append(f"{_PROMETHEUS_PREFIX}uptime_seconds {time.time() - _started_at:.0f}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str) -> None:
+    """
+    Atomically write the Prometheus exposition to a file (e.g. for node_exporter's textfile collector).
+
+    Args:
+        path: Destination file path
+    """
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".prom")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(format_prometheus())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Warning: could not write metrics file {path} ({e})", file=sys.stderr)
@@ -0,0 +1,67 @@
+"""Client for a long-running pandoc-server (pandoc's HTTP server mode)."""
+
+import os
+import base64
+from typing import Any, Dict, Optional
+
+from utils.http_client import get_session
+from utils.retry import HTTP_RETRY
+
+
+# pandoc-server URL, e.g. http://localhost:3030 (empty = always run the pandoc binary)
+PANDOC_SERVER_URL = os.getenv("PANDOC_SERVER_URL", "").rstrip("/")
+PANDOC_SERVER_TIMEOUT = float(os.getenv("PANDOC_SERVER_TIMEOUT", "60"))
+
+
+class PandocServerError(Exception):
+    """Conversion rejected by pandoc-server (e.g. invalid input)."""
+
+
+def is_enabled() -> bool:
+    """Whether a pandoc-server is configured."""
+    return bool(PANDOC_SERVER_URL)
+
+
+async def convert(
+    text: str,
+    to: str,
+    options: Optional[Dict[str, Any]] = None,
+    files: Optional[Dict[str, bytes]] = None
+) -> bytes:
+    """
+    Convert Markdown on the pandoc-server.
+
+    The server has no access to the local filesystem, so files referenced by
+    the document (e.g. images embedded into DOCX) are sent along with it.
+
+    Args:
+        text: Markdown source (may start with a YAML metadata block)
+        to: Output format (docx, latex, ...)
+        options: Additional pandoc options in defaults-file form (e.g. {"toc-depth": 3})
+        files: Files to put in the media bag, keyed by the path used in the document
+
+    Returns:
+        Converted document
+    """
+    import aiohttp
+
+    payload: Dict[str, Any] = {"text": text, "from": "markdown", "to": to, "standalone": True, **(options or {})}
+    if files:
+        payload["files"] = {path: base64.b64encode(data).decode("ascii") for path, data in files.items()}
+
+    async with get_session().post(
+        PANDOC_SERVER_URL,
+        json=payload,
+        headers={"Accept": "application/json"},
+        timeout=aiohttp.ClientTimeout(total=PANDOC_SERVER_TIMEOUT)
+    ) as response:
+        if response.status != 200:
+            error_text = await response.text()
+            HTTP_RETRY.check_status(response.status, error_text)
+            raise PandocServerError(error_text)
+        result = await response.json(content_type=None)
+
+    if "error" in result:
+        raise PandocServerError(result["error"])
+    output = result.get("output", "")
+    return base64.b64decode(output) if result.get("base64") else output.encode("utf-8")
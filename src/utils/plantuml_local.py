@@ -0,0 +1,185 @@
+"""Local PlantUML rendering through long-lived JVM processes (-pipe mode)."""
+
+import os
+import uuid
+import shlex
+import asyncio
+from typing import Dict, List, Optional
+
+
+# Local PlantUML configuration
+PLANTUML_JAR = os.getenv("PLANTUML_JAR", "/usr/share/plantuml/plantuml.jar")
+JAVA_PATH = os.getenv("JAVA_PATH", "java")
+# Headless AWT; the INTERNET security profile matches the PlantUML server defaults
+PLANTUML_JVM_OPTS = shlex.split(os.getenv(
+    "PLANTUML_JVM_OPTS",
+    "-Djava.awt.headless=true -DPLANTUML_SECURITY_PROFILE=INTERNET -Xmx512m"
+))
+# JVM processes kept per output format
+PLANTUML_LOCAL_WORKERS = int(os.getenv("PLANTUML_LOCAL_WORKERS", "2"))
+PLANTUML_LOCAL_TIMEOUT = float(os.getenv("PLANTUML_LOCAL_TIMEOUT", "60"))
+
+# Max size of one rendered image read from the pipe
+_STREAM_LIMIT = 64 * 1024 * 1024
+
+# With -pipeNoStderr a rejected diagram yields "ERROR\n<line>\n<message>..." instead of an image
+_ERROR_HEADER = b"ERROR\n"
+
+
+class PlantUMLSyntaxError(Exception):
+    """Diagram rejected by PlantUML (the worker itself is healthy)."""
+
+
+class PlantUMLWorker:
+    """One JVM running `plantuml -pipe`, rendering diagrams one at a time."""
+
+    def __init__(self, format: str) -> None:
+        self.format = format
+        self.process: Optional[asyncio.subprocess.Process] = None
+        # Printed by PlantUML after every rendered diagram
+        self.delimiter = f"__MCP_PLANTUML_{uuid.uuid4().hex}__"
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        """Start the JVM (paid once per worker, not per diagram)."""
+        if not os.path.isfile(PLANTUML_JAR):
+            raise FileNotFoundError(f"PlantUML jar not found: {PLANTUML_JAR}")
+        self.process = await asyncio.create_subprocess_exec(
+            JAVA_PATH, *PLANTUML_JVM_OPTS, "-jar", PLANTUML_JAR,
+            "-pipe", "-pipeNoStderr", f"-t{self.format}", "-charset", "UTF-8",
+            "-pipedelimitor", self.delimiter,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=_STREAM_LIMIT
+        )
+
+    async def stop(self) -> None:
+        """Terminate the JVM."""
+        if self.alive:
+            self.process.kill()
+            await self.process.wait()
+        self.process = None
+
+    async def render(self, content: str, timeout: float) -> bytes:
+        """
+        Render one diagram.
+
+        Args:
+            content: Complete PlantUML code (@startuml ... @enduml)
+            timeout: Render timeout in seconds
+
+        Returns:
+            Rendered image bytes
+            
+        Raises:
+            PlantUMLSyntaxError: PlantUML reported an error for the diagram
+        """
+        if not self.alive:
+            await self.start()
+
+        self.process.stdin.write((content.strip() + "\n").encode("utf-8"))
+        await self.process.stdin.drain()
+
+        separator = (self.delimiter + "\n").encode("ascii")
+        try:
+            output = await asyncio.wait_for(self.process.stdout.readuntil(separator), timeout)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("PlantUML process exited unexpectedly")
+        output = output[:-len(separator)]
+        
+        # PlantUML does not fail in pipe mode - it answers with an error report instead of the image
+        if output.replace(b"\r\n", b"\n").startswith(_ERROR_HEADER):
+            lines = output.decode("utf-8", errors="replace").splitlines()[1:]
+            line, message = (lines[0], " ".join(lines[1:])) if lines and lines[0].strip().isdigit() else ("?", " ".join(lines))
+            raise PlantUMLSyntaxError(f"line {line.strip()}: {message.strip() or 'syntax error'}")
+        return output
+
+
+class PlantUMLLocalPool:
+    """Warm JVM workers per output format."""
+
+    def __init__(self, size: int) -> None:
+        self.size = max(1, size)
+        self._workers: Dict[str, List[PlantUMLWorker]] = {}
+        self._idle: Dict[str, asyncio.Queue] = {}
+
+    def _queue(self, format: str) -> asyncio.Queue:
+        if format not in self._idle:
+            self._workers[format] = [PlantUMLWorker(format) for _ in range(self.size)]
+            self._idle[format] = asyncio.Queue()
+            for worker in self._workers[format]:
+                self._idle[format].put_nowait(worker)
+        return self._idle[format]
+
+    async def render(self, content: str, format: str) -> bytes:
+        """
+        Render PlantUML diagram on an idle worker.
+
+        Args:
+            content: Complete PlantUML code
+            format: Output format (png or svg)
+
+        Returns:
+            Rendered image bytes
+        """
+        idle = self._queue(format)
+        worker = await idle.get()
+        try:
+            return await worker.render(content, PLANTUML_LOCAL_TIMEOUT)
+        except PlantUMLSyntaxError:
+            # Error report fully read - the worker is in sync
+            raise
+        except BaseException:
+            # Timeout, crash or cancellation mid-request: an unread image would be
+            # returned to the next caller (the delimiter is the same for every
+            # diagram) - restart the JVM on next use
+            await worker.stop()
+            raise
+        finally:
+            idle.put_nowait(worker)
+
+    async def close(self) -> None:
+        """Stop all workers."""
+        for workers in self._workers.values():
+            for worker in workers:
+                await worker.stop()
+
+
+# Process-wide pool (bound to the event loop that created it)
+_pool: Optional[PlantUMLLocalPool] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def is_available() -> bool:
+    """Whether a local plantuml.jar is configured."""
+    return os.path.isfile(PLANTUML_JAR)
+
+
+def get_pool() -> PlantUMLLocalPool:
+    """
+    Get the shared local PlantUML pool, creating it on first use.
+
+    Returns:
+        Shared PlantUMLLocalPool
+    """
+    global _pool, _pool_loop
+
+    loop = asyncio.get_running_loop()
+    if _pool is None or _pool_loop is not loop:
+        _pool = PlantUMLLocalPool(PLANTUML_LOCAL_WORKERS)
+        _pool_loop = loop
+    return _pool
+
+
+async def close_pool() -> None:
+    """Stop all local PlantUML workers."""
+    global _pool, _pool_loop
+
+    if _pool is not None:
+        await _pool.close()
+    _pool = None
+    _pool_loop = None
@@ -0,0 +1,52 @@
+"""Progress reporting for multi-step tools."""
+
+import contextvars
+from typing import Awaitable, Callable, Optional
+
+
+# Receives (progress, total, message)
+ProgressCallback = Callable[[float, Optional[float], str], Awaitable[None]]
+
+# Reporter for the current tool call (set by the server or the job worker)
+_reporter: contextvars.ContextVar[Optional[ProgressCallback]] = contextvars.ContextVar(
+    "progress_reporter", default=None
+)
+
+
+def set_reporter(callback: Optional[ProgressCallback]) -> contextvars.Token:
+    """
+    Install progress reporter for the current context.
+
+    Args:
+        callback: Coroutine receiving (progress, total, message), or None to silence reports
+
+    Returns:
+        Token for reset_reporter()
+    """
+    return _reporter.set(callback)
+
+
+def reset_reporter(token: contextvars.Token) -> None:
+    """Restore the previous progress reporter."""
+    _reporter.reset(token)
+
+
+async def report(progress: float, total: Optional[float] = None, message: str = "") -> None:
+    """
+    Report progress of the current tool call.
+
+    Does nothing when no reporter is installed; reporting errors never
+    break the tool.
+
+    Args:
+        progress: Completed steps so far (must increase between reports)
+        total: Total number of steps, if known
+        message: Current phase (e.g. "render", "write", "pandoc pass")
+    """
+    callback = _reporter.get()
+    if callback is None:
+        return
+    try:
+        await callback(progress, total, message)
+    except Exception:
+        pass
@@ -0,0 +1,112 @@
+"""Tool registry: schemas, handlers and dispatch middleware."""
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class ErrorResult(str):
+    """
+    Result message of a failed tool call.
+
+    Tools return it instead of a plain str for errors, so callers (jobs,
+    batches, metrics) can tell failures apart without parsing the text.
+    """
+
+
+# Runs a tool with its raw MCP arguments
+Handler = Callable[[Dict[str, Any]], Awaitable[str]]
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    """Registered tool: MCP schema plus argument adapter."""
+
+    name: str
+    description: str
+    input_schema: Dict[str, Any]
+    handler: Handler
+    engine: Optional[str] = None  # Rendering backend (plantuml, mermaid, ...), if any
+    outputs: Optional[Callable[[Dict[str, Any]], List[str]]] = None  # Files written, if not just output_path
+
+
+# Receives (spec, arguments, next handler) and returns the tool result
+Middleware = Callable[[ToolSpec, Dict[str, Any], Handler], Awaitable[str]]
+
+_tools: Dict[str, ToolSpec] = {}
+_middleware: List[Middleware] = []
+
+
+def register(
+    name: str,
+    description: str,
+    input_schema: Dict[str, Any],
+    handler: Handler,
+    engine: Optional[str] = None,
+    outputs: Optional[Callable[[Dict[str, Any]], List[str]]] = None
+) -> ToolSpec:
+    """
+    Register a tool (called once by each tool module at import).
+
+    Args:
+        name: Tool name exposed over MCP
+        description: Tool description
+        input_schema: JSON schema of the arguments
+        handler: Coroutine function taking the arguments dict
+        engine: Rendering backend used by the tool
+        outputs: Paths of the files a call writes (default: its output_path)
+
+    Returns:
+        Registered ToolSpec
+    """
+    if name in _tools:
+        raise ValueError(f"Tool already registered: {name}")
+    spec = ToolSpec(name, description, input_schema, handler, engine, outputs)
+    _tools[name] = spec
+    return spec
+
+
+def get(name: str) -> Optional[ToolSpec]:
+    """Get registered tool by name."""
+    return _tools.get(name)
+
+
+def specs() -> List[ToolSpec]:
+    """All registered tools, in registration order."""
+    return list(_tools.values())
+
+
+def use(middleware: Middleware) -> None:
+    """
+    Add middleware wrapped around every tool call.
+
+    Middleware added first runs outermost.
+
+    Args:
+        middleware: Coroutine receiving (spec, arguments, next handler)
+    """
+    _middleware.append(middleware)
+
+
+def _bind(middleware: Middleware, spec: ToolSpec, next_handler: Handler) -> Handler:
+    return lambda arguments: middleware(spec, arguments, next_handler)
+
+
+async def dispatch(name: str, arguments: Optional[Dict[str, Any]]) -> str:
+    """
+    Run a tool by name through the middleware chain.
+
+    Args:
+        name: Tool name
+        arguments: Tool arguments
+
+    Returns:
+        Tool result message (an ErrorResult if the call failed)
+    """
+    spec = _tools.get(name)
+    if spec is None:
+        return ErrorResult(f"✗ Error: Unknown tool: {name}")
+
+    handler = spec.handler
+    for middleware in reversed(_middleware):
+        handler = _bind(middleware, spec, handler)
+    return await handler(arguments or {})
@@ -0,0 +1,274 @@
+"""Content-addressed render cache shared by diagram tools and document exports."""
+
+import os
+import sys
+import hashlib
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from utils import metrics
+from utils.file_manager import OUTPUT_FILE_MODE
+
+
+# Render cache configuration
+RENDER_CACHE_ENABLED = os.getenv("RENDER_CACHE_ENABLED", "true").lower() == "true"
+RENDER_CACHE_DIR = Path(os.getenv(
+    "RENDER_CACHE_DIR",
+    str(Path.home() / ".cache" / "mcp-doc-generator" / "renders")
+))
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_MB", "512")) * 1024 * 1024
+# Hardlink cached renders into output_path instead of copying (same filesystem only)
+RENDER_CACHE_HARDLINK = os.getenv("RENDER_CACHE_HARDLINK", "false").lower() == "true"
+
+# Hit/miss counters (process-wide)
+_stats: Dict[str, int] = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+# Total size of cache entries in bytes (computed lazily on first store)
+_total_bytes: Optional[int] = None
+
+
+def normalize_source(source: str) -> str:
+    """
+    Normalize diagram source so that insignificant whitespace does not change the key.
+
+    Args:
+        source: Diagram source code
+
+    Returns:
+        Source with unified line endings, no trailing whitespace and no outer blank lines
+    """
+    lines = source.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def make_key(
+    source: str,
+    engine: str,
+    format: str,
+    layout: str = "",
+    engine_version: str = ""
+) -> str:
+    """
+    Build content-addressed cache key for a render.
+
+    Args:
+        source: Complete diagram source sent to the engine
+        engine: Engine name (plantuml, mermaid, graphviz)
+        format: Output format (png, svg, pdf)
+        layout: Layout algorithm (Graphviz only)
+        engine_version: Engine version or backend identity
+
+    Returns:
+        Hex digest identifying the rendered artifact
+    """
+    digest = hashlib.sha256()
+    for part in (engine, engine_version, format, layout):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    digest.update(normalize_source(source).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    """Get on-disk location of a cache entry."""
+    return RENDER_CACHE_DIR / key[:2] / key
+
+
+def _materialize(entry: Path, output_path: str) -> None:
+    """Place cached entry at output_path (hardlink if enabled, copy otherwise)."""
+    target = Path(output_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{target.name}.", dir=str(target.parent))
+    os.close(fd)
+    try:
+        linked = False
+        if RENDER_CACHE_HARDLINK:
+            try:
+                os.unlink(tmp_path)
+                os.link(entry, tmp_path)
+                linked = True
+            except OSError:
+                linked = False
+        if not linked:
+            shutil.copyfile(entry, tmp_path)
+            os.chmod(tmp_path, OUTPUT_FILE_MODE)
+        os.replace(tmp_path, target)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def lookup(key: str, output_path: str) -> bool:
+    """
+    Serve a render from cache if present.
+
+    Args:
+        key: Cache key from make_key()
+        output_path: Destination path for the rendered file
+
+    Returns:
+        True if the cached render was placed at output_path
+    """
+    if not RENDER_CACHE_ENABLED:
+        return False
+
+    entry = _entry_path(key)
+    if not entry.is_file():
+        _stats["misses"] += 1
+        metrics.record_cache_lookup(hit=False)
+        return False
+
+    try:
+        _materialize(entry, output_path)
+    except OSError as e:
+        print(f"Warning: render cache read failed ({e})", file=sys.stderr)
+        _stats["misses"] += 1
+        metrics.record_cache_lookup(hit=False)
+        return False
+
+    # Touch entry so LRU eviction keeps recently used renders
+    try:
+        os.utime(entry)
+    except OSError:
+        pass
+    _stats["hits"] += 1
+    metrics.record_cache_lookup(hit=True)
+    return True
+
+
+def store_bytes(key: str, data: bytes) -> None:
+    """
+    Store rendered bytes under the given key.
+
+    Args:
+        key: Cache key from make_key()
+        data: Rendered file content
+    """
+    if not RENDER_CACHE_ENABLED:
+        return
+    tmp_path = None
+    try:
+        entry = _entry_path(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp.", dir=str(entry.parent))
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        _commit_entry(tmp_path, entry)
+    except OSError as e:
+        _discard_temp(tmp_path)
+        print(f"Warning: render cache write failed ({e})", file=sys.stderr)
+
+
+def store_file(key: str, path: str) -> None:
+    """
+    Store an already rendered file under the given key.
+
+    Args:
+        key: Cache key from make_key()
+        path: Path to the rendered file
+    """
+    if not RENDER_CACHE_ENABLED:
+        return
+    tmp_path = None
+    try:
+        entry = _entry_path(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp.", dir=str(entry.parent))
+        os.close(fd)
+        shutil.copyfile(path, tmp_path)
+        _commit_entry(tmp_path, entry)
+    except OSError as e:
+        _discard_temp(tmp_path)
+        print(f"Warning: render cache write failed ({e})", file=sys.stderr)
+
+
+def _discard_temp(tmp_path: Optional[str]) -> None:
+    """Remove an uncommitted temp file (eviction never sees dot files)."""
+    if tmp_path is None:
+        return
+    try:
+        os.unlink(tmp_path)
+    except OSError:
+        pass
+
+
+def _commit_entry(tmp_path: str, entry: Path) -> None:
+    """Atomically move a temp file into the cache and enforce the size limit."""
+    global _total_bytes
+
+    previous_size = entry.stat().st_size if entry.exists() else 0
+    # Hardlinked outputs share the entry's mode
+    os.chmod(tmp_path, OUTPUT_FILE_MODE)
+    os.replace(tmp_path, entry)
+    _stats["stores"] += 1
+
+    if _total_bytes is None:
+        _total_bytes = _scan_total_bytes()
+    else:
+        _total_bytes += entry.stat().st_size - previous_size
+
+    if _total_bytes > RENDER_CACHE_MAX_BYTES:
+        _evict(keep=entry)
+
+
+def _iter_entries():
+    """Yield all cache entry files."""
+    if not RENDER_CACHE_DIR.exists():
+        return
+    for shard in RENDER_CACHE_DIR.iterdir():
+        if not shard.is_dir():
+            continue
+        for entry in shard.iterdir():
+            if entry.is_file() and not entry.name.startswith("."):
+                yield entry
+
+
+def _scan_total_bytes() -> int:
+    """Compute total size of all cache entries."""
+    return sum(entry.stat().st_size for entry in _iter_entries())
+
+
+def _evict(keep: Path) -> None:
+    """Remove least recently used entries until the cache fits its size limit."""
+    global _total_bytes
+
+    entries = sorted(
+        ((entry.stat().st_mtime, entry.stat().st_size, entry) for entry in _iter_entries()),
+        key=lambda item: item[0]
+    )
+    total = sum(size for _, size, _ in entries)
+
+    for _, size, entry in entries:
+        if total <= RENDER_CACHE_MAX_BYTES:
+            break
+        if entry == keep:
+            continue
+        try:
+            entry.unlink()
+            total -= size
+            _stats["evictions"] += 1
+        except OSError:
+            pass
+
+    _total_bytes = total
+
+
+def get_stats() -> Dict[str, Any]:
+    """
+    Get render cache counters.
+
+    Returns:
+        Dictionary with hits, misses, stores, evictions, hit ratio and cache size
+    """
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "hit_ratio": (_stats["hits"] / lookups) if lookups else 0.0,
+        "size_bytes": _total_bytes if _total_bytes is not None else _scan_total_bytes(),
+        "max_bytes": RENDER_CACHE_MAX_BYTES,
+        "enabled": RENDER_CACHE_ENABLED,
+        "directory": str(RENDER_CACHE_DIR),
+    }
@@ -0,0 +1,99 @@
+"""Retry policy with exponential backoff and jitter for outbound HTTP calls."""
+
+import os
+import time
+import random
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, FrozenSet, TypeVar
+
+from utils import metrics
+
+
+# Retry configuration
+HTTP_RETRY_MAX_ATTEMPTS = int(os.getenv("HTTP_RETRY_MAX_ATTEMPTS", "3"))
+HTTP_RETRY_BASE_DELAY = float(os.getenv("HTTP_RETRY_BASE_DELAY", "0.2"))
+HTTP_RETRY_MAX_DELAY = float(os.getenv("HTTP_RETRY_MAX_DELAY", "5"))
+# Total time budget for all attempts of one call
+HTTP_RETRY_DEADLINE = float(os.getenv("HTTP_RETRY_DEADLINE", "120"))
+HTTP_RETRY_STATUSES = frozenset(
+    int(status) for status in os.getenv("HTTP_RETRY_STATUSES", "429,500,502,503,504").split(",") if status.strip()
+)
+
+T = TypeVar("T")
+
+
+class RetryableStatus(Exception):
+    """HTTP response with a status worth retrying (e.g. 503 from an overloaded server)."""
+
+    def __init__(self, status: int, body: str = "") -> None:
+        super().__init__(f"HTTP {status}: {body}" if body else f"HTTP {status}")
+        self.status = status
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by attempts and a total deadline."""
+
+    max_attempts: int = HTTP_RETRY_MAX_ATTEMPTS
+    base_delay: float = HTTP_RETRY_BASE_DELAY
+    max_delay: float = HTTP_RETRY_MAX_DELAY
+    deadline: float = HTTP_RETRY_DEADLINE
+    retry_statuses: FrozenSet[int] = HTTP_RETRY_STATUSES
+
+    def backoff(self, attempt: int) -> float:
+        """Random delay before the next attempt (attempt is 1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def check_status(self, status: int, body: str = "") -> None:
+        """Raise RetryableStatus if the response status should be retried."""
+        if status in self.retry_statuses:
+            raise RetryableStatus(status, body)
+
+    @staticmethod
+    def is_transient(error: BaseException) -> bool:
+        """Whether the error is a transient network failure or a retryable status."""
+        import aiohttp
+
+        return isinstance(error, (
+            RetryableStatus,
+            aiohttp.ClientConnectionError,
+            aiohttp.ClientPayloadError,
+            asyncio.TimeoutError,
+        ))
+
+    async def run(self, target: str, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run a call, retrying transient failures.
+
+        Args:
+            target: Backend name for metrics (plantuml, mermaid_ink, ...)
+            call: Coroutine function performing one attempt
+
+        Returns:
+            Result of the first successful attempt
+        """
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            remaining = self.deadline - (time.monotonic() - started)
+            try:
+                return await asyncio.wait_for(call(), timeout=max(remaining, 0.001))
+            except Exception as e:
+                delay = self.backoff(attempt)
+                elapsed = time.monotonic() - started
+                if (
+                    attempt >= self.max_attempts
+                    or not self.is_transient(e)
+                    or elapsed + delay >= self.deadline
+                ):
+                    if attempt > 1:
+                        metrics.inc("http_retry_exhausted_total", target=target)
+                    raise
+                metrics.inc("http_retries_total", target=target)
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+# Policy shared by outbound HTTP calls
+HTTP_RETRY = RetryPolicy()
@@ -0,0 +1,69 @@
+"""Single-flight deduplication of identical in-flight work."""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Tuple, TypeVar
+
+from utils import metrics
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Share one execution among concurrent calls with the same key.
+
+    The first caller (leader) runs the work; callers arriving while it is
+    in flight (followers) wait for and receive the leader's result or
+    exception. If the leader is cancelled, a waiting follower takes over.
+    Nothing is cached once the work completes.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, call: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Run call once for all concurrent callers with the same key.
+
+        Args:
+            key: Work fingerprint (e.g. render cache key)
+            call: Coroutine function performing the work
+
+        Returns:
+            Tuple of (result, shared), shared is True for followers
+        """
+        while key in self._calls:
+            future = self._calls[key]
+            try:
+                result = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # Leader was cancelled - retry, possibly as the new leader
+                    continue
+                raise
+            metrics.inc("single_flight_shared_total", group=self.name)
+            return result, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark as retrieved - there may be no followers
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            del self._calls[key]
+
+
+# Shared by diagram tools, keyed on render cache keys
+renders = SingleFlight("render")
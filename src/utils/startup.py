@@ -0,0 +1,89 @@
+"""Startup time budget and import-time profiling."""
+
+import os
+import re
+import sys
+import subprocess
+from pathlib import Path
+from typing import List, Tuple
+
+
+# Warn when imports and setup take longer than this before serving
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1500"))
+
+SRC_DIR = Path(__file__).parent.parent
+
+# "import time: <self us> | <cumulative us> | <indent><module>"
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( +)(\S+)$")
+
+
+def check_budget(elapsed_ms: float) -> None:
+    """
+    Warn on stderr when startup exceeded STARTUP_BUDGET_MS.
+
+    Args:
+        elapsed_ms: Time from interpreter start of server.py to serving
+    """
+    if elapsed_ms > STARTUP_BUDGET_MS:
+        print(
+            f"Warning: server startup took {elapsed_ms:.0f} ms (budget {STARTUP_BUDGET_MS:.0f} ms). "
+            f"Run 'python src/server.py --profile-startup' for an import-time breakdown.",
+            file=sys.stderr
+        )
+
+
+def profile_imports(module: str = "server", top: int = 15) -> str:
+    """
+    Import a module in a fresh interpreter with -X importtime and summarize.
+
+    Args:
+        module: Module to import (relative to src/)
+        top: Number of modules listed per section
+
+    Returns:
+        Import-time breakdown report
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [str(SRC_DIR), os.getenv("PYTHONPATH")]))}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(SRC_DIR),
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        return f"✗ Error: importing {module} failed:\n{result.stderr.strip()[-2000:]}"
+
+    # (module, depth, self ms, cumulative ms); children are listed before their parent
+    entries: List[Tuple[str, int, float, float]] = []
+    direct: List[Tuple[str, int, float, float]] = []
+    children: List[Tuple[str, int, float, float]] = []
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        entry = (name, (len(indent) - 1) // 2, int(self_us) / 1000, int(cumulative_us) / 1000)
+        entries.append(entry)
+        if entry[1] == 1:
+            children.append(entry)
+        elif entry[1] == 0:
+            if name == module:
+                direct = children
+                total_ms = entry[3]
+            children = []
+
+    lines = [f"Startup import profile for '{module}': {total_ms:.1f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)"]
+
+    lines.append(f"\nDirect imports of {module} (cumulative):")
+    direct.sort(key=lambda entry: entry[3], reverse=True)
+    for name, _, _, cumulative_ms in direct[:top]:
+        lines.append(f"   {name:<40} {cumulative_ms:9.1f} ms")
+
+    lines.append("\nSlowest modules (self time):")
+    slowest = sorted(entries, key=lambda entry: entry[2], reverse=True)
+    for name, _, self_ms, _ in slowest[:top]:
+        lines.append(f"   {name:<40} {self_ms:9.1f} ms")
+
+    return "\n".join(lines)
@@ -0,0 +1,27 @@
+"""Pytest configuration: import server modules from src/, skip manual integration scripts."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+# Scripts run by hand against live PlantUML/Mermaid/pandoc services (python tests/<script>.py)
+collect_ignore = [
+    "test_all_tools.py",
+    "test_fixed_tools.py",
+    "test_mcp_local.py",
+]
+
+
+@pytest.fixture
+def isolated_render_cache(tmp_path, monkeypatch):
+    """Enabled render cache in a temporary directory."""
+    from utils import render_cache
+
+    monkeypatch.setattr(render_cache, "RENDER_CACHE_ENABLED", True)
+    monkeypatch.setattr(render_cache, "RENDER_CACHE_DIR", tmp_path / "render-cache")
+    monkeypatch.setattr(render_cache, "RENDER_CACHE_HARDLINK", False)
+    monkeypatch.setattr(render_cache, "_total_bytes", None)
+    return render_cache
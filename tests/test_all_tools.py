@@ -8,13 +8,16 @@ import sys
 from pathlib import Path
 
 # Add src to path
-sys.path.insert(0, str(Path(__file__).parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
 
 from tools.plantuml import generate_c4_diagram, generate_uml_diagram, generate_sequence_diagram
 from tools.mermaid import generate_flowchart, generate_sequence, generate_gantt
 from tools.graphviz import generate_graph
 from tools.drawio import generate_diagram as generate_drawio_diagram
 from tools.export import export_to_pdf, export_to_docx, create_from_template
+from tools.batch import generate_batch
+from utils import registry
+import server  # noqa: F401  (registers the job tools)
 
 
 async def test_1_c4_context():
@@ -354,6 +357,70 @@ async def test_12_template_adr():
     print(f"   ✅ {result}")
 
 
+async def test_13_batch():
+    """Test 13: Batch Generation (one failing job must not abort the rest)"""
+    print("\n1️⃣3️⃣  Testing: generate_batch")
+    result = await generate_batch([
+        {"tool": "generate_flowchart", "arguments": {
+            "content": "flowchart LR\n    A[Zamówienie] --> B[Płatność] --> C[Wysyłka]",
+            "output_path": "output/test_batch_flowchart.png"
+        }},
+        {"tool": "generate_dependency_graph", "arguments": {
+            "content": "digraph { API -> Auth; API -> Orders; Orders -> DB; }",
+            "output_path": "output/test_batch_graph.png"
+        }},
+        {"tool": "generate_uml_diagram", "arguments": {
+            "diagram_type": "class",
+            "content": "class Order {\n  +id: int\n}",
+            "output_path": "output/test_batch_uml.png"
+        }},
+        {"tool": "generate_dependency_graph", "arguments": {
+            "content": "digraph { broken -> ",
+            "output_path": "output/test_batch_broken.png"
+        }},
+    ])
+    print(f"   {result}")
+    assert "3/4 succeeded" in result, "expected exactly the broken graph to fail"
+
+
+async def test_14_graph_formats():
+    """Test 14: Dependency Graph in several formats from one layout run"""
+    print("\n1️⃣4️⃣  Testing: generate_dependency_graph (formats)")
+    content = "digraph { API -> Auth; API -> Orders; Orders -> DB; }"
+    result = await generate_graph(content, "output/test_dependencies_multi.png", formats=["png", "svg", "pdf"])
+    print(f"   ✅ {result}")
+    for ext in ("png", "svg", "pdf"):
+        assert Path(f"output/test_dependencies_multi.{ext}").exists(), f"missing {ext} output"
+
+
+async def test_15_jobs():
+    """Test 15: Background Job (submit_job / get_job_status / get_job_result)"""
+    print("\n1️⃣5️⃣  Testing: submit_job")
+    submitted = await registry.dispatch("submit_job", {
+        "tool": "generate_dependency_graph",
+        "arguments": {
+            "content": "digraph { Client -> Gateway -> Service; }",
+            "output_path": "output/test_job_graph.png"
+        }
+    })
+    print(f"   {submitted}")
+    assert submitted.startswith("✓ Job submitted"), "job was not accepted"
+    job_id = submitted.split("Job submitted: ")[1].split("\n")[0]
+
+    for _ in range(300):
+        status = await registry.dispatch("get_job_status", {"job_id": job_id})
+        if "succeeded" in status or "failed" in status:
+            break
+        await asyncio.sleep(0.1)
+    result = await registry.dispatch("get_job_result", {"job_id": job_id})
+    print(f"   {result}")
+    assert ": succeeded" in result, "background job did not succeed"
+
+    rejected = await registry.dispatch("submit_job", {"tool": "no_such_tool", "arguments": {}})
+    assert rejected.startswith("✗ Error: Unknown tool"), "unknown tool was accepted"
+    print("   ✅ Unknown tool rejected")
+
+
 async def main():
     """Run all tests"""
     print("\n" + "="*70)
@@ -373,6 +440,9 @@ async def main():
         test_10_export_pdf,
         test_11_export_docx,
         test_12_template_adr,
+        test_13_batch,
+        test_14_graph_formats,
+        test_15_jobs,
     ]
     
     failed = []
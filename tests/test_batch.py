@@ -0,0 +1,76 @@
+"""Tests for generate_batch error isolation and per-engine limits."""
+
+import asyncio
+
+import pytest
+
+from tools import batch
+from utils import registry
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    """Register fake diagram tools on a 'fake' engine limited to 2 concurrent jobs."""
+    state = {"running": 0, "peak": 0}
+
+    async def render(arguments):
+        state["running"] += 1
+        state["peak"] = max(state["peak"], state["running"])
+        await asyncio.sleep(0.01)
+        state["running"] -= 1
+        return f"✓ Rendered {arguments['name']}"
+
+    async def broken(arguments):
+        raise RuntimeError("engine crashed")
+
+    async def rejected(arguments):
+        return registry.ErrorResult("✗ Error: invalid diagram")
+
+    for name, handler in (("fake_render", render), ("fake_broken", broken), ("fake_rejected", rejected)):
+        monkeypatch.setitem(registry._tools, name, registry.ToolSpec(name, "", {}, handler, "fake"))
+        monkeypatch.setitem(batch.BATCH_TOOLS, name, "fake")
+    monkeypatch.setitem(batch.BATCH_CONCURRENCY, "fake", 2)
+    return state
+
+
+def test_failing_jobs_do_not_abort_batch(fake_tools):
+    result = asyncio.run(batch.generate_batch([
+        {"tool": "fake_render", "arguments": {"name": "a"}},
+        {"tool": "fake_broken", "arguments": {}},
+        {"tool": "fake_rejected", "arguments": {}},
+        {"tool": "fake_render", "arguments": {}},
+        {"tool": "fake_render", "arguments": {"name": "b"}},
+    ]))
+
+    lines = result.splitlines()
+    assert lines[0].startswith("⚠ Batch completed: 2/5 succeeded")
+    assert "[1] ✓ fake_render (fake)" in lines[1] and "Rendered a" in lines[1]
+    assert "[2] ✗ fake_broken" in lines[2] and "engine crashed" in lines[2]
+    assert "[3] ✗ fake_rejected" in lines[3] and "invalid diagram" in lines[3]
+    assert "[4] ✗ fake_render" in lines[4] and "Missing required argument 'name'" in lines[4]
+    assert "[5] ✓ fake_render" in lines[5] and "Rendered b" in lines[5]
+
+
+def test_unsupported_tool_is_reported_per_item(fake_tools):
+    result = asyncio.run(batch.generate_batch([
+        {"tool": "export_to_pdf", "arguments": {}},
+        {"arguments": {}},
+        {"tool": "fake_render", "arguments": {"name": "a"}},
+    ]))
+
+    assert result.startswith("⚠ Batch completed: 1/3 succeeded")
+    assert "Unsupported batch tool: export_to_pdf" in result
+    assert "Unsupported batch tool: (missing)" in result
+
+
+def test_engine_concurrency_is_capped(fake_tools):
+    result = asyncio.run(batch.generate_batch([
+        {"tool": "fake_render", "arguments": {"name": str(i)}} for i in range(6)
+    ]))
+
+    assert result.startswith("✓ Batch completed: 6/6 succeeded")
+    assert fake_tools["peak"] == 2
+
+
+def test_empty_batch():
+    assert asyncio.run(batch.generate_batch([])).startswith("✗ Error: No jobs provided")
@@ -0,0 +1,141 @@
+"""Tests for the circuit breaker and its use in the Mermaid renderer chain."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from tools import mermaid
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker
+
+
+class Clock:
+    """Controllable replacement for time.monotonic()."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, cooldown=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_half_open_allows_a_single_trial(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 61
+
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_trial_outcome_closes_or_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 61
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 61
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_cancelled_trial_is_released(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown=60)
+    breaker.record_failure()
+    clock.now += 61
+    assert breaker.allow()
+
+    breaker.cancel_trial()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+
+
+@pytest.fixture
+def chain(monkeypatch, isolated_render_cache):
+    """Mermaid chain pool -> cli with fresh breakers."""
+    monkeypatch.setattr(mermaid, "_renderer_chain", lambda: ["pool", "cli"])
+    monkeypatch.setattr(mermaid, "_breakers", {
+        name: CircuitBreaker(name, failure_threshold=1, cooldown=60) for name in ("pool", "cli")
+    })
+    return mermaid._breakers
+
+
+def test_chain_falls_back_and_trips_breaker(chain, monkeypatch, tmp_path):
+    async def pool_down(content, format):
+        raise ConnectionError("renderer pool crashed")
+
+    async def cli(content, format, output_path):
+        with open(output_path, "wb") as f:
+            f.write(b"png")
+
+    monkeypatch.setattr(mermaid, "_render_via_pool", pool_down)
+    monkeypatch.setattr(mermaid, "_render_via_cli", cli)
+    output = tmp_path / "flow.png"
+
+    result = asyncio.run(mermaid._render_mermaid("graph TD; A-->B", str(output), "png", "Flowchart"))
+
+    assert result == f"✓ Flowchart generated successfully: {output}"
+    assert output.read_bytes() == b"png"
+    assert chain["pool"].state == "open"
+    assert chain["cli"].state == "closed"
+
+
+def test_diagram_errors_do_not_trip_breaker(chain, monkeypatch, tmp_path):
+    async def reject(*args):
+        raise mermaid.MermaidDiagramError("Parse error on line 1")
+
+    monkeypatch.setattr(mermaid, "_render_via_pool", reject)
+    monkeypatch.setattr(mermaid, "_render_via_cli", reject)
+
+    result = asyncio.run(mermaid._render_mermaid("graph TD; A-->", str(tmp_path / "bad.png"), "png", "Flowchart"))
+
+    assert result.startswith("✗ Error generating Flowchart: all Mermaid renderers failed")
+    assert "pool: Parse error on line 1" in result
+    assert chain["pool"].state == "closed" and chain["cli"].state == "closed"
+
+
+def test_cancelled_render_releases_half_open_trial(chain, monkeypatch, clock, tmp_path):
+    chain["pool"].record_failure()
+    clock.now += 61
+
+    async def hang(content, format):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(mermaid, "_render_via_pool", hang)
+
+    async def cancel_render():
+        task = asyncio.create_task(mermaid._render_mermaid("graph TD; A-->B", str(tmp_path / "x.png"), "png", "x"))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_render())
+    assert chain["pool"].allow()
@@ -0,0 +1,67 @@
+"""Tests for per-engine concurrency limits and queue-wait reporting."""
+
+import asyncio
+
+import pytest
+
+from utils import concurrency, metrics, registry
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """A 'fake' engine with two slots; waits of 50 ms or more are reported."""
+    monkeypatch.setitem(concurrency.ENGINE_CONCURRENCY, "fake", 2)
+    monkeypatch.setattr(concurrency, "ENGINE_QUEUE_REPORT_MS", 50)
+    monkeypatch.setattr(metrics, "_summaries", {})
+    state = {"running": 0, "peak": 0}
+
+    async def tool(arguments):
+        async with concurrency.limit(arguments["engine"]):
+            state["running"] += 1
+            state["peak"] = max(state["peak"], state["running"])
+            await asyncio.sleep(0.1)
+            state["running"] -= 1
+        if arguments.get("fail"):
+            return registry.ErrorResult("✗ Error: engine failed")
+        return "✓ done"
+
+    def run(calls, engine="fake", fail=False):
+        async def scenario():
+            return await asyncio.gather(*[
+                concurrency.middleware(None, {"engine": engine, "fail": fail}, tool) for _ in range(calls)
+            ])
+        return asyncio.run(scenario()), state["peak"]
+
+    return run
+
+
+def test_saturated_engine_queues_and_reports_wait(engine):
+    results, peak = engine(4)
+
+    assert peak == 2
+    assert results[:2] == ["✓ done", "✓ done"]
+    for result in results[2:]:
+        first, queue = result.split("\n")
+        assert first == "✓ done"
+        waited = float(queue.split("Queue wait: ")[1].split("s ")[0])
+        assert 0.08 <= waited < 0.5
+        assert queue.endswith("(fake at capacity)")
+
+    summary = metrics._summaries[("queue_wait_seconds", (("engine", "fake"),))]
+    assert summary.count == 4
+    assert summary.quantile(0.5) < 0.05 <= summary.quantile(1.0)
+
+
+def test_unlimited_engine_never_queues(engine):
+    results, peak = engine(4, engine="unlimited")
+
+    assert peak == 4
+    assert results == ["✓ done"] * 4
+    assert metrics._summaries == {}
+
+
+def test_queue_wait_keeps_failed_results_flagged(engine):
+    results, _ = engine(3, fail=True)
+
+    assert "Queue wait: " in results[2]
+    assert all(isinstance(result, registry.ErrorResult) for result in results)
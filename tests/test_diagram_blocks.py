@@ -0,0 +1,108 @@
+"""Tests for rewriting fenced diagram blocks into rendered images."""
+
+import asyncio
+
+import pytest
+
+from tools import diagram_blocks, export
+from utils import registry
+
+
+@pytest.fixture
+def rendered(monkeypatch):
+    """Replace diagram rendering with a fake; returns the list of (engine, code) calls."""
+    calls = []
+
+    async def render_block(engine, code, output_path):
+        calls.append((engine, code))
+        if "broken" in code:
+            return registry.ErrorResult(f"✗ Error generating {engine} block: syntax error\ndetails")
+        return f"✓ Diagram generated successfully: {output_path}"
+
+    monkeypatch.setattr(diagram_blocks, "_render_block", render_block)
+    return calls
+
+
+def rewrite(markdown, tmp_path):
+    return asyncio.run(diagram_blocks.render_diagram_blocks(markdown, tmp_path))
+
+
+def test_fence_styles_and_languages(rendered, tmp_path):
+    markdown = (
+        "```mermaid\ngraph TD; A-->B\n```\n\n"
+        "~~~ {.plantuml}\nAlice -> Bob\n~~~\n\n"
+        "````DOT title=deps\ndigraph { a -> b }\n````\n\n"
+        "```python\nprint('not a diagram')\n```\n"
+    )
+
+    result, count, warnings = rewrite(markdown, tmp_path)
+
+    assert count == 3 and warnings == []
+    assert sorted(rendered) == [
+        ("graphviz", "digraph { a -> b }"),
+        ("mermaid", "graph TD; A-->B"),
+        ("plantuml", "Alice -> Bob"),
+    ]
+    assert "```python\nprint('not a diagram')\n```" in result
+    for engine in ("mermaid", "plantuml", "graphviz"):
+        assert f"![](<{tmp_path.absolute()}/{engine}-" in result
+
+
+def test_closing_fence_must_match_opening(rendered, tmp_path):
+    markdown = "````mermaid\ngraph TD\n```\nA-->B\n````\n"
+
+    result, count, _ = rewrite(markdown, tmp_path)
+
+    assert count == 1
+    assert rendered == [("mermaid", "graph TD\n```\nA-->B")]
+    assert result.strip().startswith("![](") and "```" not in result
+
+
+def test_identical_blocks_render_once(rendered, tmp_path):
+    block = "```mermaid\ngraph TD; A-->B\n```\n"
+
+    result, count, _ = rewrite(block + "\ntext\n\n" + block + "\n```dot\ngraph TD; A-->B\n```\n", tmp_path)
+
+    assert count == 3
+    assert len(rendered) == 2
+    images = [line for line in result.splitlines() if line.startswith("![](")]
+    assert len(images) == 3 and images[0] == images[1] != images[2]
+
+
+def test_failed_blocks_stay_as_code(rendered, tmp_path):
+    markdown = "```mermaid\ngraph TD; broken\n```\n\n```mermaid\ngraph TD; A-->B\n```\n"
+
+    result, count, warnings = rewrite(markdown, tmp_path)
+
+    assert count == 1
+    assert "```mermaid\ngraph TD; broken\n```" in result
+    assert warnings == ["⚠ Warning: mermaid block left as code: ✗ Error generating mermaid block: syntax error"]
+
+
+@pytest.mark.parametrize("outer", ["````", "~~~"])
+def test_diagram_examples_inside_other_fences_stay_as_code(rendered, tmp_path, outer):
+    example = f"{outer}markdown\n```mermaid\ngraph TD; A-->B\n```\n{outer}\n"
+    markdown = example + "\n```mermaid\ngraph TD; C-->D\n```\n"
+
+    result, count, _ = rewrite(markdown, tmp_path)
+
+    assert count == 1
+    assert rendered == [("mermaid", "graph TD; C-->D")]
+    assert result.startswith(example)
+
+
+def test_image_path_with_spaces_and_parentheses(rendered, tmp_path):
+    asset_dir = tmp_path / "my docs (draft)"
+
+    result, count, _ = rewrite("```dot\ndigraph { a -> b }\n```\n", asset_dir)
+
+    assert count == 1
+    assert result.startswith(f"![](<{asset_dir.absolute()}/graphviz-")
+    assert export._image_references(result)[0].startswith(str(asset_dir.absolute()))
+
+
+def test_markdown_without_diagrams_is_untouched(rendered, tmp_path):
+    markdown = "# Title\n\n```bash\nls\n```\n"
+
+    assert rewrite(markdown, tmp_path) == (markdown, 0, [])
+    assert rendered == []
@@ -0,0 +1,88 @@
+"""Tests for image handling in document export."""
+
+import pytest
+
+from tools import export
+
+
+@pytest.fixture
+def images(tmp_path):
+    """Create PNG and GIF images in a temporary directory."""
+    for name in ("diagram.png", "photo.gif"):
+        (tmp_path / name).write_bytes(b"image " + name.encode())
+    return tmp_path
+
+
+def test_latex_ready_images_accepts_local_absolute_files(images):
+    markdown = f"![a]({images}/diagram.png)\n\n![b](<{images}/diagram.png> \"title\")\n"
+
+    assert export._latex_ready_images(markdown)
+    assert export._latex_ready_images("No images here.")
+
+
+@pytest.mark.parametrize("target", [
+    "{dir}/photo.gif",
+    "{dir}/missing.png",
+    "diagram.png",
+    "https://example.com/diagram.png",
+])
+def test_latex_ready_images_rejects_what_pandoc_must_handle(images, target):
+    markdown = f"![ok]({images}/diagram.png)\n\n![img]({target.format(dir=images)})\n"
+
+    assert not export._latex_ready_images(markdown)
+
+
+def test_latex_ready_images_sees_reference_style_images(images):
+    markdown = f"![Diagram][d]\n\n[d]: {images}/photo.gif\n"
+
+    assert not export._latex_ready_images(markdown)
+
+
+def cache_key(markdown, format="docx", options=None):
+    return export._export_cache_key(markdown, format, options or {"toc": False})
+
+
+def test_cache_key_covers_content_format_and_options():
+    markdown = "---\ntitle: Report\n---\n\nBody\n"
+
+    assert cache_key(markdown) == cache_key(markdown)
+    assert cache_key(markdown) != cache_key(markdown.replace("Report", "Raport"))
+    assert cache_key(markdown) != cache_key(markdown, format="pdf")
+    assert cache_key(markdown) != cache_key(markdown, options={"toc": True})
+
+
+@pytest.mark.parametrize("markdown", [
+    "![a]({dir}/diagram.png)\n",
+    "![a](diagram.png)\n",
+    "![a][d]\n\n[d]: diagram.png\n",
+])
+def test_cache_key_changes_when_image_changes(images, monkeypatch, markdown):
+    monkeypatch.chdir(images)
+    markdown = markdown.format(dir=images)
+    before = cache_key(markdown)
+
+    (images / "diagram.png").write_bytes(b"edited diagram")
+
+    assert cache_key(markdown) != before
+
+
+def test_cache_key_tolerates_missing_and_remote_images(images, monkeypatch):
+    monkeypatch.chdir(images)
+    markdown = "![a](missing.png)\n\n![b](https://example.com/diagram.png)\n"
+    before = cache_key(markdown)
+
+    (images / "missing.png").write_bytes(b"now present")
+
+    assert cache_key(markdown) != before
+
+
+def test_media_bag_keys_images_by_document_target(images, monkeypatch):
+    monkeypatch.chdir(images)
+    markdown = f"![a](diagram.png)\n\n![b]({images}/photo.gif)\n"
+
+    assert export._media_bag(markdown) == {
+        "diagram.png": b"image diagram.png",
+        f"{images}/photo.gif": b"image photo.gif",
+    }
+    assert export._media_bag(markdown + "![c](https://example.com/x.png)\n") is None
+    assert export._media_bag(markdown + "![c](missing.png)\n") is None
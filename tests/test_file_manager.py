@@ -0,0 +1,146 @@
+"""Tests for output file locking and atomic output writes."""
+
+import asyncio
+import os
+
+import pytest
+
+from tools import graphviz  # noqa: F401  (registers generate_dependency_graph)
+from utils import file_manager, registry
+
+
+class Recorder:
+    """Fake tool recording how many calls run at the same time."""
+
+    def __init__(self) -> None:
+        self.running = 0
+        self.peak = 0
+
+    async def __call__(self, arguments):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.02)
+        self.running -= 1
+        return "✓ done"
+
+
+def run_concurrently(spec, calls):
+    recorder = Recorder()
+
+    async def scenario():
+        await asyncio.gather(*[file_manager.middleware(spec, arguments, recorder) for arguments in calls])
+
+    asyncio.run(scenario())
+    assert file_manager._output_locks == {}
+    return recorder.peak
+
+
+def fake_spec():
+    return registry.ToolSpec("fake", "", {}, None)
+
+
+def test_calls_writing_the_same_file_run_one_at_a_time(tmp_path):
+    path = str(tmp_path / "a.png")
+
+    assert run_concurrently(fake_spec(), [{"output_path": path}, {"output_path": path}]) == 1
+
+
+def test_calls_writing_different_files_run_in_parallel(tmp_path):
+    calls = [{"output_path": str(tmp_path / "a.png")}, {"output_path": str(tmp_path / "b.png")}]
+
+    assert run_concurrently(fake_spec(), calls) == 2
+
+
+def test_calls_without_output_path_are_not_locked():
+    assert run_concurrently(fake_spec(), [{}, {}]) == 2
+
+
+def test_graph_formats_lock_every_written_file(tmp_path):
+    spec = registry.get("generate_dependency_graph")
+    multi = {"output_path": str(tmp_path / "deps.png"), "formats": ["svg", "pdf"]}
+
+    assert spec.outputs(multi) == [str(tmp_path / "deps.svg"), str(tmp_path / "deps.pdf")]
+    assert run_concurrently(spec, [multi, {"output_path": str(tmp_path / "deps.pdf")}]) == 1
+    assert run_concurrently(spec, [multi, {"output_path": str(tmp_path / "deps.png")}]) == 2
+
+
+def test_overlapping_file_sets_do_not_deadlock(tmp_path):
+    spec = registry.get("generate_dependency_graph")
+    calls = [
+        {"output_path": str(tmp_path / "deps.png"), "formats": ["png", "svg"]},
+        {"output_path": str(tmp_path / "deps.svg"), "formats": ["svg", "png"]},
+        {"output_path": str(tmp_path / "deps.svg")},
+    ]
+
+    assert run_concurrently(spec, calls) == 1
+
+
+@pytest.fixture
+def target(tmp_path):
+    """Existing output file from a previous successful call."""
+    path = tmp_path / "out" / "diagram.png"
+    path.parent.mkdir()
+    path.write_bytes(b"previous image")
+    return path
+
+
+def assert_untouched(target):
+    assert target.read_bytes() == b"previous image"
+    assert os.listdir(target.parent) == [target.name]
+
+
+def test_write_stream_replaces_target_on_success(target):
+    async def chunks():
+        for chunk in (b"new ", b"image"):
+            yield chunk
+
+    assert asyncio.run(file_manager.write_stream(str(target), chunks())) == 9
+    assert target.read_bytes() == b"new image"
+    assert os.listdir(target.parent) == [target.name]
+
+
+def test_failed_stream_leaves_target_unchanged(target):
+    async def chunks():
+        yield b"partial"
+        raise ConnectionError("connection reset")
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(file_manager.write_stream(str(target), chunks()))
+    assert_untouched(target)
+
+
+def test_cancelled_stream_leaves_target_unchanged(target):
+    async def chunks():
+        yield b"partial"
+        await asyncio.sleep(10)
+
+    async def scenario():
+        task = asyncio.create_task(file_manager.write_stream(str(target), chunks()))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert_untouched(target)
+
+
+def test_atomic_output_path_publishes_engine_output(target):
+    with file_manager.atomic_output_path(str(target)) as tmp_output:
+        assert tmp_output.endswith(".png") and tmp_output != str(target)
+        with open(tmp_output, "wb") as f:
+            f.write(b"rendered")
+
+    assert target.read_bytes() == b"rendered"
+    assert oct(target.stat().st_mode & 0o777) == oct(file_manager.OUTPUT_FILE_MODE)
+    assert os.listdir(target.parent) == [target.name]
+
+
+def test_failed_engine_leaves_target_unchanged(target):
+    with pytest.raises(RuntimeError):
+        with file_manager.atomic_output_path(str(target)) as tmp_output:
+            with open(tmp_output, "wb") as f:
+                f.write(b"half written")
+            raise RuntimeError("dot crashed")
+
+    assert_untouched(target)
@@ -0,0 +1,103 @@
+"""Tests for Graphviz rendering with a fake layout binary."""
+
+import os
+import sys
+import asyncio
+
+import pytest
+
+from tools import graphviz
+from utils import registry
+
+
+# Records its arguments; writes "<format>:<dot source>" to each -o file (or stdout)
+FAKE_DOT = '''\
+import sys
+args = sys.argv[1:]
+if args == ["-V"]:
+    sys.stderr.write("dot - graphviz version 0.0 (fake)\\n")
+    sys.exit(0)
+with open(LOG, "a") as log:
+    log.write(" ".join(args) + "\\n")
+outputs, inputs, fmt, i = [], [], None, 0
+while i < len(args):
+    if args[i].startswith("-T"):
+        fmt = args[i][2:]
+    elif args[i] == "-o":
+        outputs.append((fmt, args[i + 1]))
+        i += 1
+    else:
+        inputs.append(args[i])
+    i += 1
+source = open(inputs[0]).read() if inputs else sys.stdin.read()
+if "SYNTAX_ERROR" in source:
+    sys.stderr.write("Error: syntax error in line 1\\n")
+    sys.exit(1)
+if outputs:
+    for fmt, path in outputs:
+        open(path, "w").write(f"{fmt}:{source}")
+else:
+    sys.stdout.write(f"{fmt}:{source}")
+'''
+
+
+@pytest.fixture
+def fake_dot(tmp_path, monkeypatch, isolated_render_cache):
+    """Put a fake `dot` first on PATH; returns a function listing its render calls."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    log = tmp_path / "dot.log"
+    dot = bin_dir / "dot"
+    dot.write_text(f"#!{sys.executable}\nLOG = {str(log)!r}\n{FAKE_DOT}")
+    dot.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setattr(graphviz, "_engine_versions", {})
+    return lambda: log.read_text().splitlines() if log.exists() else []
+
+
+def test_multiple_formats_from_one_layout_run(fake_dot, tmp_path):
+    result = asyncio.run(graphviz.generate_graph(
+        "a -> b", str(tmp_path / "out" / "graph.png"), formats=["png", "svg", "png"]
+    ))
+
+    assert result.startswith("✓ Dependency graph generated successfully (png, svg) with a single layout run")
+    calls = fake_dot()
+    assert len(calls) == 1
+    assert calls[0].split().count("-o") == 2
+    assert (tmp_path / "out" / "graph.png").read_text().startswith("png:digraph G {")
+    assert (tmp_path / "out" / "graph.svg").read_text().startswith("svg:digraph G {")
+
+
+def test_multiple_formats_render_only_uncached(fake_dot, tmp_path):
+    asyncio.run(graphviz.generate_graph("a -> b", str(tmp_path / "graph.png")))
+    result = asyncio.run(graphviz.generate_graph(
+        "a -> b", str(tmp_path / "multi.png"), formats=["png", "pdf"]
+    ))
+
+    assert f"{tmp_path / 'multi.png'} (cached)" in result
+    assert f"{tmp_path / 'multi.pdf'}\n" in result + "\n"
+    assert "-Tpng" not in fake_dot()[-1].split()
+    assert "-Tpdf" in fake_dot()[-1].split()
+
+
+@pytest.mark.parametrize("mode", ["pipe", "file"])
+def test_single_format_render_and_cache(fake_dot, tmp_path, monkeypatch, mode):
+    monkeypatch.setattr(graphviz, "GRAPHVIZ_RENDER_MODE", mode)
+    output = tmp_path / "graph.svg"
+
+    first = asyncio.run(graphviz.generate_graph("digraph { a -> b }", str(output), format="svg"))
+    second = asyncio.run(graphviz.generate_graph("digraph { a -> b }", str(output), format="svg"))
+
+    assert first == f"✓ Dependency graph generated successfully: {output}"
+    assert second == f"✓ Dependency graph generated successfully: {output} (cached)"
+    assert output.read_text() == "svg:digraph { a -> b }"
+    assert len(fake_dot()) == 1
+    assert not [name for name in tmp_path.iterdir() if name.name.startswith(".graph.svg.")]
+
+
+def test_syntax_error_is_reported(fake_dot, tmp_path):
+    result = asyncio.run(graphviz.generate_graph("SYNTAX_ERROR ->", str(tmp_path / "bad.png")))
+
+    assert result.startswith("✗ Error generating dependency graph: Graphviz error: Error: syntax error")
+    assert isinstance(result, registry.ErrorResult)
+    assert not (tmp_path / "bad.png").exists()
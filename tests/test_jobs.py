@@ -0,0 +1,105 @@
+"""Tests for the background job queue and the job tools."""
+
+import asyncio
+
+import pytest
+
+import server
+from utils import jobs, progress, registry
+
+
+async def run_jobs(runner, calls):
+    """Submit calls to a fresh manager and wait until all of them finish."""
+    manager = jobs.JobManager(runner, workers=2)
+    submitted = [manager.submit(tool, arguments) for tool, arguments in calls]
+    while not all(job.finished for job in submitted):
+        await asyncio.sleep(0.01)
+    await manager.shutdown()
+    return submitted
+
+
+async def runner(tool, arguments):
+    if tool == "crash":
+        raise RuntimeError("worker exploded")
+    if tool == "reject":
+        return registry.ErrorResult("✗ Error: invalid diagram")
+    return f"✓ Diagram generated successfully: /tmp/out/{arguments['name']}.png"
+
+
+def test_failures_are_isolated_per_job():
+    crashed, rejected, ok = asyncio.run(run_jobs(runner, [
+        ("crash", {}),
+        ("reject", {}),
+        ("render", {"name": "flow"}),
+    ]))
+
+    assert crashed.status == "failed" and crashed.result == "✗ Error: worker exploded"
+    assert rejected.status == "failed"
+    assert ok.status == "succeeded"
+    assert ok.output_paths == ["/tmp/out/flow.png"]
+    assert all(job.progress == 1.0 for job in (crashed, rejected, ok))
+
+
+def test_status_comes_from_the_error_flag_not_the_text():
+    async def flagged(tool, arguments):
+        if tool == "flagged":
+            return registry.ErrorResult("Renderer unavailable")
+        return "✗ marks a rejected item in this report"
+
+    flagged_job, plain = asyncio.run(run_jobs(flagged, [("flagged", {}), ("report", {})]))
+
+    assert flagged_job.status == "failed"
+    assert plain.status == "succeeded"
+
+
+def test_progress_is_tracked_per_job():
+    async def reporting(tool, arguments):
+        await progress.report(1, 2, "half way")
+        return "✓ done"
+
+    job, = asyncio.run(run_jobs(reporting, [("render", {})]))
+
+    assert job.status == "succeeded"
+    assert job.progress_message == "half way"
+    assert "Job " + job.id + ": succeeded" in jobs.format_status(job)
+
+
+@pytest.fixture
+def job_tools(monkeypatch):
+    """Register a fake tool and route jobs through a fresh manager."""
+    async def fake(arguments):
+        return f"✓ Rendered {arguments['name']}"
+
+    monkeypatch.setitem(registry._tools, "fake_render", registry.ToolSpec("fake_render", "", {}, fake, "fake"))
+    monkeypatch.setattr(jobs, "_manager", None)
+    monkeypatch.setattr(jobs, "_manager_loop", None)
+
+
+def test_job_tools_round_trip(job_tools):
+    async def scenario():
+        submitted = await registry.dispatch("submit_job", {"tool": "fake_render", "arguments": {"name": "a"}})
+        job_id = submitted.split("Job submitted: ")[1].split("\n")[0]
+        while "succeeded" not in await registry.dispatch("get_job_status", {"job_id": job_id}):
+            await asyncio.sleep(0.01)
+        result = await registry.dispatch("get_job_result", {"job_id": job_id})
+        await jobs.shutdown()
+        return result
+
+    result = asyncio.run(scenario())
+
+    assert result.endswith("✓ Rendered a")
+
+
+def test_submit_job_rejects_unknown_and_job_tools(job_tools):
+    async def scenario():
+        unknown = await server._submit_job({"tool": "bogus", "arguments": {}})
+        nested = await server._submit_job({"tool": "submit_job", "arguments": {}})
+        missing = await server._get_job_status({"job_id": "nope"})
+        await jobs.shutdown()
+        return unknown, nested, missing
+
+    unknown, nested, missing = asyncio.run(scenario())
+
+    assert unknown == "✗ Error: Unknown tool: bogus"
+    assert nested == "✗ Error: Tool 'submit_job' cannot be submitted as a job"
+    assert missing == "✗ Error: Unknown or expired job: nope"
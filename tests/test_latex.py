@@ -0,0 +1,126 @@
+"""Tests for LaTeX preamble splitting and PDF compilation reruns."""
+
+import asyncio
+import sys
+
+import pytest
+
+from utils import latex
+from utils.latex import split_preamble
+
+
+PACKAGES = "\\documentclass{article}\n\\usepackage{graphicx}\n\\usepackage{hyperref}\n"
+
+
+def test_cut_at_first_metadata_command():
+    tex = PACKAGES + "\\hypersetup{pdftitle={Report}}\n\\title{Report}\n\\begin{document}\nBody\n\\end{document}\n"
+
+    assert split_preamble(tex, "pdflatex") == len(PACKAGES)
+
+
+def test_cut_at_begin_document():
+    tex = PACKAGES + "\\begin {document}\nBody\n\\end{document}\n"
+
+    assert split_preamble(tex, "xelatex") == len(PACKAGES)
+
+
+def test_commands_in_comments_and_longer_names_are_ignored():
+    preamble = PACKAGES + "% \\title{commented out}\n\\titleformat{\\section}{}{}{}{}\n"
+    tex = preamble + "\\title{Report}\n\\begin{document}\n\\end{document}\n"
+
+    assert split_preamble(tex, "pdflatex") == len(preamble)
+
+
+def test_font_commands_stop_only_native_font_engines():
+    tex = PACKAGES + "\\setmainfont{DejaVu Serif}\n\\title{Report}\n\\begin{document}\n\\end{document}\n"
+
+    assert split_preamble(tex, "xelatex") == len(PACKAGES)
+    assert split_preamble(tex, "lualatex") == len(PACKAGES)
+    assert split_preamble(tex, "pdflatex") == len(PACKAGES) + len("\\setmainfont{DejaVu Serif}\n")
+
+
+def test_cut_before_enclosing_conditional():
+    conditional = "\\ifxetex\n  \\usepackage{fontspec}\n  \\setmainfont{DejaVu Serif}\n\\else\n  \\usepackage[T1]{fontenc}\n\\fi\n"
+    tex = PACKAGES + "\\newif\\ifdraft\n" + conditional + "\\begin{document}\n\\end{document}\n"
+
+    assert split_preamble(tex, "xelatex") == len(PACKAGES) + len("\\newif\\ifdraft\n")
+    assert split_preamble(tex, "pdflatex") == len(PACKAGES) + len("\\newif\\ifdraft\n") + len(conditional)
+
+
+def test_nothing_to_dump():
+    assert split_preamble("\\begin{document}\n\\end{document}\n", "pdflatex") is None
+    assert split_preamble("\\documentclass{article}\\begin{document}\n\\end{document}\n", "pdflatex") is None
+    assert split_preamble(PACKAGES, "pdflatex") is None
+
+
+# LaTeX engine stand-in: typesets the TOC read at start and writes the TOC of
+# the current \\section list (plus a changing line for \\unstable documents)
+FAKE_ENGINE = f"""#!{sys.executable}
+import re, time
+from pathlib import Path
+tex = Path("document.tex").read_text()
+toc = Path("document.toc")
+previous = toc.read_text() if toc.exists() else ""
+entries = "".join(f"\\\\contentsline{{{{section}}}}{{{{{{name}}}}}}\\n" for name in re.findall(r"\\\\section\\{{([^}}]*)\\}}", tex))
+if "\\\\unstable" in tex:
+    entries += f"% {{time.time_ns()}}\\n"
+toc.write_text(entries)
+Path("document.aux").write_text("\\\\relax\\n")
+Path("document.log").write_text("")
+Path("document.pdf").write_text("TOC\\n" + previous + "BODY\\n")
+"""
+
+
+def document(*sections, extra=""):
+    body = "".join(f"\\section{{{name}}}\nText.\n" for name in sections)
+    return f"\\documentclass{{article}}\n\\begin{{document}}\n\\tableofcontents\n{extra}{body}\\end{{document}}\n".encode()
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """Fake engine with aux caching on and the format cache off."""
+    path = tmp_path / "fakelatex"
+    path.write_text(FAKE_ENGINE)
+    path.chmod(0o755)
+    monkeypatch.setattr(latex, "LATEX_FORMAT_CACHE", False)
+    monkeypatch.setattr(latex, "LATEX_AUX_CACHE", True)
+    monkeypatch.setattr(latex, "LATEX_AUX_CACHE_DIR", tmp_path / "aux")
+    return str(path)
+
+
+def compile_pdf(tex, engine, output):
+    return asyncio.run(latex.compile_pdf(tex, engine, str(output)))
+
+
+def toc_of(output):
+    return output.read_text().split("TOC\n")[1].split("BODY")[0]
+
+
+def test_unchanged_toc_needs_a_single_run(engine, tmp_path):
+    output = tmp_path / "report.pdf"
+
+    assert compile_pdf(document("Intro", "Design"), engine, output) == 2
+    assert compile_pdf(document("Intro", "Design"), engine, output) == 1
+    assert "{Design}" in toc_of(output)
+
+
+def test_stale_toc_converges(engine, tmp_path):
+    output = tmp_path / "report.pdf"
+    compile_pdf(document("Intro"), engine, output)
+
+    assert compile_pdf(document("Intro", "Appendix"), engine, output) == 2
+    assert "{Appendix}" in toc_of(output)
+
+
+def test_other_document_at_same_path_converges(engine, tmp_path):
+    output = tmp_path / "report.pdf"
+    compile_pdf(document("Budget", "Risks"), engine, output)
+
+    assert compile_pdf(document("Architecture"), engine, output) == 2
+    assert toc_of(output) == "\\contentsline{section}{Architecture}\n"
+
+
+def test_runs_are_bounded(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(latex, "LATEX_MAX_RUNS", 3)
+
+    assert compile_pdf(document("Intro", extra="\\unstable\n"), engine, tmp_path / "report.pdf") == 3
@@ -0,0 +1,85 @@
+"""Tests for least-outstanding load balancing and backend ejection."""
+
+import asyncio
+
+import pytest
+
+from utils.load_balancer import LoadBalancer
+from utils.retry import RetryableStatus
+
+
+URLS = ["http://a", "http://b", "http://c"]
+
+
+def test_picks_backend_with_fewest_outstanding_requests():
+    balancer = LoadBalancer("test", URLS)
+    balancer.backends[0].outstanding = 2
+    balancer.backends[1].outstanding = 1
+    balancer.backends[2].outstanding = 3
+
+    assert balancer.pick().url == "http://b"
+
+
+def test_avoided_backends_are_last_resort():
+    balancer = LoadBalancer("test", URLS)
+
+    assert balancer.pick(avoid={"http://a", "http://b"}).url == "http://c"
+    assert balancer.pick(avoid=set(URLS)).url in URLS
+
+
+def test_duplicate_urls_and_empty_pool():
+    assert [backend.url for backend in LoadBalancer("test", ["http://a/", "http://a/"]).backends] == ["http://a"]
+    with pytest.raises(ValueError):
+        LoadBalancer("test", [])
+
+
+async def fail_once(balancer, error):
+    with pytest.raises(type(error)):
+        async with balancer.lease(avoid={"http://b"}) as backend:
+            raise error
+    return backend
+
+
+def test_transient_failures_eject_backend():
+    balancer = LoadBalancer("test", ["http://a", "http://b"], failure_threshold=2, cooldown=60)
+
+    async def scenario():
+        for _ in range(2):
+            backend = await fail_once(balancer, RetryableStatus(503))
+            assert backend.url == "http://a" and backend.outstanding == 0
+
+    asyncio.run(scenario())
+
+    assert balancer.backends[0].breaker.state == "open"
+    assert all(balancer.pick(avoid={"http://b"}).url == "http://b" for _ in range(5))
+
+
+def test_rejected_requests_do_not_eject_backend():
+    balancer = LoadBalancer("test", ["http://a", "http://b"], failure_threshold=1, cooldown=60)
+
+    asyncio.run(fail_once(balancer, ValueError("invalid diagram")))
+
+    assert balancer.backends[0].breaker.state == "closed"
+
+
+def test_cancelled_request_releases_trial():
+    balancer = LoadBalancer("test", ["http://a"], failure_threshold=1, cooldown=0)
+    breaker = balancer.backends[0].breaker
+    breaker.record_failure()
+
+    async def scenario():
+        async def request():
+            async with balancer.lease():
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(request())
+        await asyncio.sleep(0.01)
+        assert not breaker.allow()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    assert balancer.backends[0].outstanding == 0
+    assert breaker.allow()
@@ -0,0 +1,111 @@
+"""Tests for the persistent Mermaid renderer pool."""
+
+import asyncio
+
+import pytest
+
+from tools import mermaid
+from utils import mermaid_pool
+
+
+# Stand-in for mermaid_worker.mjs speaking the same line protocol
+FAKE_WORKER = """
+import base64, json, sys, time
+for line in sys.stdin:
+    request = json.loads(line)
+    code = request.get("code", "")
+    if request["op"] == "ping":
+        response = {"ok": True}
+    elif code.startswith("SLOW"):
+        time.sleep(0.3)
+        response = {"ok": True, "data": base64.b64encode(code.encode()).decode()}
+    elif code == "BAD":
+        response = {"ok": False, "kind": "diagram", "error": "Parse error on line 1"}
+    elif code == "CRASH":
+        response = {"ok": False, "kind": "worker", "error": "Failed to launch the browser process"}
+    else:
+        response = {"ok": True, "data": base64.b64encode(code.encode()).decode()}
+    response["id"] = request["id"]
+    sys.stdout.write(json.dumps(response) + "\\n")
+    sys.stdout.flush()
+"""
+
+
+@pytest.fixture
+def fake_worker(tmp_path, monkeypatch):
+    script = tmp_path / "worker.py"
+    script.write_text(FAKE_WORKER)
+    monkeypatch.setattr(mermaid_pool, "NODE_PATH", "python3")
+    monkeypatch.setattr(mermaid_pool, "WORKER_SCRIPT", script)
+
+
+async def with_pool(scenario):
+    pool = mermaid_pool.MermaidRendererPool(1)
+    try:
+        return await scenario(pool)
+    finally:
+        await pool.close()
+
+
+def test_renders_on_warm_worker(fake_worker):
+    async def scenario(pool):
+        first = await pool.render("graph TD; A-->B", "png")
+        pid = pool._workers[0].process.pid
+        second = await pool.render("graph TD; B-->C", "png")
+        return first, second, pid == pool._workers[0].process.pid
+
+    assert asyncio.run(with_pool(scenario)) == (b"graph TD; A-->B", b"graph TD; B-->C", True)
+
+
+def test_diagram_error_keeps_worker(fake_worker):
+    async def scenario(pool):
+        with pytest.raises(mermaid_pool.MermaidRenderError, match="Parse error"):
+            await pool.render("BAD", "png")
+        return pool._workers[0].alive
+
+    assert asyncio.run(with_pool(scenario))
+
+
+def test_worker_error_replaces_worker(fake_worker):
+    async def scenario(pool):
+        with pytest.raises(mermaid_pool.MermaidWorkerError, match="Failed to launch"):
+            await pool.render("CRASH", "png")
+        alive = pool._workers[0].alive
+        return alive, await pool.render("graph TD; A-->B", "png")
+
+    assert asyncio.run(with_pool(scenario)) == (False, b"graph TD; A-->B")
+
+
+def test_cancelled_request_does_not_desync_next_request(fake_worker):
+    async def scenario(pool):
+        task = asyncio.create_task(pool.render("SLOW graph TD; A-->B", "png"))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await pool.render("graph TD; C-->D", "png")
+
+    assert asyncio.run(with_pool(scenario)) == b"graph TD; C-->D"
+
+
+@pytest.fixture
+def pool_renderer(fake_worker, monkeypatch):
+    """Route _render_via_pool through a fresh pool."""
+    monkeypatch.setattr(mermaid_pool, "_pool", None)
+    monkeypatch.setattr(mermaid_pool, "_pool_loop", None)
+    monkeypatch.setattr(mermaid_pool, "MERMAID_POOL_SIZE", 1)
+
+
+@pytest.mark.parametrize("code, error", [
+    ("BAD", mermaid.MermaidDiagramError),
+    ("CRASH", mermaid_pool.MermaidWorkerError),
+])
+def test_only_diagram_errors_are_reported_as_diagram_errors(pool_renderer, code, error):
+    async def scenario():
+        try:
+            await mermaid._render_via_pool(code, "png")
+        finally:
+            await mermaid_pool.close_pool()
+
+    with pytest.raises(error):
+        asyncio.run(scenario())
@@ -0,0 +1,123 @@
+"""Tests for metrics percentiles, the text report and the Prometheus exposition."""
+
+import asyncio
+
+import pytest
+
+import server
+from utils import metrics
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch, isolated_render_cache):
+    """Start every test with empty metric stores."""
+    monkeypatch.setattr(metrics, "_summaries", {})
+    monkeypatch.setattr(metrics, "_counters", {})
+    monkeypatch.setattr(isolated_render_cache, "_stats", dict.fromkeys(isolated_render_cache._stats, 0))
+
+
+def summary_of(values):
+    summary = metrics.Summary()
+    for value in values:
+        summary.observe(value)
+    return summary
+
+
+def test_nearest_rank_percentiles():
+    summary = summary_of(reversed(range(1, 101)))
+
+    assert summary.quantile(0.5) == 50
+    assert summary.quantile(0.95) == 95
+    assert summary.quantile(0.99) == 99
+    assert summary.quantile(0.0) == 1
+    assert summary.quantile(1.0) == 100
+
+
+def test_percentiles_of_few_samples():
+    assert metrics.Summary().quantile(0.99) == 0.0
+    assert summary_of([7]).quantile(0.5) == 7
+    assert summary_of([1, 2]).quantile(0.5) == 1
+    assert summary_of([1, 2]).quantile(0.51) == 2
+
+
+def test_percentiles_cover_latest_samples_only(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_SAMPLE_SIZE", 3)
+    summary = summary_of([100, 1, 2, 3])
+
+    assert summary.count == 4 and summary.sum == 106
+    assert summary.quantile(1.0) == 3
+
+
+def call_tools():
+    async def ok(arguments):
+        with metrics.phase("render"):
+            metrics.add_bytes(2048)
+        return "✓ done"
+
+    async def failing(arguments):
+        return server.registry.ErrorResult("✗ Error: invalid diagram")
+
+    spec = server.registry.ToolSpec("fake_tool", "", {}, ok)
+
+    async def scenario():
+        await metrics.middleware(spec, {}, ok)
+        await metrics.middleware(spec, {}, failing)
+
+    asyncio.run(scenario())
+
+
+def test_middleware_records_calls_errors_and_phases():
+    call_tools()
+
+    assert metrics._counters[("tool_calls_total", (("status", "ok"), ("tool", "fake_tool")))] == 1
+    assert metrics._counters[("tool_calls_total", (("status", "error"), ("tool", "fake_tool")))] == 1
+    assert metrics._counters[("bytes_written_total", (("tool", "fake_tool"),))] == 2048
+    assert metrics._summaries[("tool_duration_seconds", (("tool", "fake_tool"),))].count == 2
+    assert metrics._summaries[("phase_duration_seconds", (("phase", "render"), ("tool", "fake_tool")))].count == 1
+
+
+def test_text_report():
+    call_tools()
+
+    report = asyncio.run(server._get_server_metrics({}))
+
+    assert report.startswith("✓ Server metrics (uptime ")
+    assert "   fake_tool: 2 calls, 1 errors (50.0%), p50 " in report
+    assert "   fake_tool/render: 1 samples, p50 " in report
+    assert "   fake_tool: 2.0 KB" in report
+    assert "Render cache: 0 hits, 0 misses" in report
+
+
+def test_prometheus_exposition():
+    metrics.inc("http_retries_total", 2, target='mer"maid\\ink')
+    for value in (0.1, 0.2, 0.3, 0.4):
+        metrics.observe("tool_duration_seconds", value, tool="generate_graph")
+
+    text = asyncio.run(server._get_server_metrics({"format": "prometheus"}))
+    lines = text.splitlines()
+
+    assert text.endswith("\n")
+    assert lines[:2] == [
+        "# TYPE mcp_doc_http_retries_total counter",
+        'mcp_doc_http_retries_total{target="mer\\"maid\\\\ink"} 2',
+    ]
+    assert lines[2:8] == [
+        "# TYPE mcp_doc_tool_duration_seconds summary",
+        'mcp_doc_tool_duration_seconds{tool="generate_graph",quantile="0.5"} 0.200000',
+        'mcp_doc_tool_duration_seconds{tool="generate_graph",quantile="0.95"} 0.400000',
+        'mcp_doc_tool_duration_seconds{tool="generate_graph",quantile="0.99"} 0.400000',
+        'mcp_doc_tool_duration_seconds_sum{tool="generate_graph"} 1.000000',
+        'mcp_doc_tool_duration_seconds_count{tool="generate_graph"} 4',
+    ]
+    assert lines[8] == "# TYPE mcp_doc_uptime_seconds gauge"
+    assert lines[9].startswith("mcp_doc_uptime_seconds ")
+
+
+def test_write_prometheus_file(tmp_path):
+    metrics.inc("tool_calls_total", tool="a", status="ok")
+    path = tmp_path / "textfile" / "mcp.prom"
+
+    metrics.write_prometheus(str(path))
+
+    assert path.read_text() == metrics.format_prometheus()
+    assert [p.name for p in path.parent.iterdir()] == ["mcp.prom"]
@@ -0,0 +1,138 @@
+"""Tests for local PlantUML rendering in persistent -pipe workers."""
+
+import asyncio
+import sys
+
+import pytest
+
+from tools import plantuml
+from utils import plantuml_local
+
+
+# Minimal `java -jar plantuml.jar -pipe -pipedelimitor X` stand-in: answers every
+# @startuml..@enduml block with "IMG <first line>" or an error report
+FAKE_JAVA = f"""#!{sys.executable}
+import sys, time
+args = sys.argv[1:]
+delimiter = args[args.index("-pipedelimitor") + 1]
+out = sys.stdout.buffer
+block = []
+for line in sys.stdin:
+    block.append(line)
+    if line.strip() != "@enduml":
+        continue
+    first = block[1].strip()
+    block = []
+    if first.startswith("SLOW"):
+        time.sleep(0.3)
+    if first == "SYNTAXERR":
+        out.write(b"ERROR\\n2\\nSyntax Error?\\n")
+    else:
+        out.write(("IMG " + first).encode())
+    out.write((delimiter + "\\n").encode())
+    out.flush()
+"""
+
+
+def diagram(line):
+    return f"@startuml\n{line}\n@enduml"
+
+
+@pytest.fixture
+def local(tmp_path, monkeypatch):
+    """Point the local pool at a fake JVM."""
+    java = tmp_path / "java"
+    java.write_text(FAKE_JAVA)
+    java.chmod(0o755)
+    jar = tmp_path / "plantuml.jar"
+    jar.write_bytes(b"")
+    monkeypatch.setattr(plantuml_local, "JAVA_PATH", str(java))
+    monkeypatch.setattr(plantuml_local, "PLANTUML_JAR", str(jar))
+    monkeypatch.setattr(plantuml_local, "PLANTUML_JVM_OPTS", [])
+    return plantuml_local
+
+
+async def with_pool(scenario, size=1):
+    pool = plantuml_local.PlantUMLLocalPool(size)
+    try:
+        return await scenario(pool)
+    finally:
+        await pool.close()
+
+
+def test_worker_is_reused_across_renders(local):
+    async def scenario(pool):
+        first = await pool.render(diagram("A -> B"), "png")
+        pid = pool._workers["png"][0].process.pid
+        second = await pool.render(diagram("B -> C"), "png")
+        return first, second, pid == pool._workers["png"][0].process.pid
+
+    assert asyncio.run(with_pool(scenario)) == (b"IMG A -> B", b"IMG B -> C", True)
+
+
+def test_syntax_error_raises_and_keeps_worker(local):
+    async def scenario(pool):
+        with pytest.raises(plantuml_local.PlantUMLSyntaxError, match="line 2: Syntax Error?"):
+            await pool.render(diagram("SYNTAXERR"), "png")
+        worker = pool._workers["png"][0]
+        return worker.alive, await pool.render(diagram("A -> B"), "png")
+
+    assert asyncio.run(with_pool(scenario)) == (True, b"IMG A -> B")
+
+
+def test_cancelled_render_does_not_leak_into_next_render(local):
+    async def scenario(pool):
+        task = asyncio.create_task(pool.render(diagram("SLOW A -> B"), "png"))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await pool.render(diagram("C -> D"), "png")
+
+    assert asyncio.run(with_pool(scenario)) == b"IMG C -> D"
+
+
+def test_timed_out_render_restarts_worker(local, monkeypatch):
+    monkeypatch.setattr(plantuml_local, "PLANTUML_LOCAL_TIMEOUT", 0.05)
+
+    async def scenario(pool):
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.render(diagram("SLOW A -> B"), "png")
+        monkeypatch.setattr(plantuml_local, "PLANTUML_LOCAL_TIMEOUT", 5)
+        return await pool.render(diagram("C -> D"), "png")
+
+    assert asyncio.run(with_pool(scenario)) == b"IMG C -> D"
+
+
+def test_missing_jar_is_reported(local, monkeypatch, tmp_path, isolated_render_cache):
+    monkeypatch.setattr(plantuml, "PLANTUML_MODE", "local")
+    monkeypatch.setattr(plantuml_local, "PLANTUML_JAR", str(tmp_path / "missing.jar"))
+
+    async def scenario():
+        try:
+            return await plantuml._render_plantuml(diagram("A -> B"), str(tmp_path / "a.png"), "png", "Diagram")
+        finally:
+            await plantuml_local.close_pool()
+
+    assert asyncio.run(scenario()).startswith("✗ Error: local PlantUML not available")
+
+
+def test_local_mode_renders_and_caches(local, monkeypatch, tmp_path, isolated_render_cache):
+    monkeypatch.setattr(plantuml, "PLANTUML_MODE", "local")
+    output = tmp_path / "out" / "a.png"
+
+    async def scenario():
+        try:
+            first = await plantuml._render_plantuml(diagram("A -> B"), str(output), "png", "Diagram")
+            error = await plantuml._render_plantuml(diagram("SYNTAXERR"), str(tmp_path / "bad.png"), "png", "Diagram")
+            again = await plantuml._render_plantuml(diagram("A -> B"), str(output), "png", "Diagram")
+            return first, error, again
+        finally:
+            await plantuml_local.close_pool()
+
+    first, error, again = asyncio.run(scenario())
+
+    assert first == f"✓ Diagram generated successfully: {output}"
+    assert output.read_bytes() == b"IMG A -> B"
+    assert error == "✗ Error generating Diagram: line 2: Syntax Error?"
+    assert again.endswith("(cached)")
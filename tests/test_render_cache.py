@@ -0,0 +1,106 @@
+"""Tests for the content-addressed render cache."""
+
+import os
+
+import pytest
+
+from utils import render_cache
+
+
+@pytest.fixture
+def cache(isolated_render_cache):
+    return isolated_render_cache
+
+
+def test_key_ignores_insignificant_whitespace():
+    key = render_cache.make_key("A -> B\nB -> C", "plantuml", "png")
+    assert render_cache.make_key("\r\nA -> B   \r\nB -> C\n\n", "plantuml", "png") == key
+
+
+def test_key_covers_engine_format_layout_and_version():
+    key = render_cache.make_key("a -> b", "graphviz", "png", layout="dot", engine_version="9.0")
+    assert render_cache.make_key("a -> b", "graphviz", "svg", layout="dot", engine_version="9.0") != key
+    assert render_cache.make_key("a -> b", "graphviz", "png", layout="neato", engine_version="9.0") != key
+    assert render_cache.make_key("a -> b", "graphviz", "png", layout="dot", engine_version="10.0") != key
+    assert render_cache.make_key("a -> b", "plantuml", "png", layout="dot", engine_version="9.0") != key
+
+
+def test_miss_then_hit(cache, tmp_path):
+    key = cache.make_key("a", "plantuml", "png")
+    output = tmp_path / "out" / "diagram.png"
+
+    assert not cache.lookup(key, str(output))
+    cache.store_bytes(key, b"image")
+    assert cache.lookup(key, str(output))
+    assert output.read_bytes() == b"image"
+    assert oct(output.stat().st_mode & 0o777) == oct(render_cache.OUTPUT_FILE_MODE)
+
+
+def test_store_file(cache, tmp_path):
+    rendered = tmp_path / "rendered.svg"
+    rendered.write_bytes(b"<svg/>")
+    key = cache.make_key("a", "graphviz", "svg")
+
+    cache.store_file(key, str(rendered))
+    assert cache.lookup(key, str(tmp_path / "copy.svg"))
+    assert (tmp_path / "copy.svg").read_bytes() == b"<svg/>"
+
+
+def test_disabled_cache_never_hits(cache, tmp_path, monkeypatch):
+    key = cache.make_key("a", "plantuml", "png")
+    cache.store_bytes(key, b"image")
+    monkeypatch.setattr(render_cache, "RENDER_CACHE_ENABLED", False)
+    assert not cache.lookup(key, str(tmp_path / "out.png"))
+
+
+def test_eviction_removes_least_recently_used(cache, monkeypatch):
+    monkeypatch.setattr(render_cache, "RENDER_CACHE_MAX_BYTES", 25)
+    keys = [cache.make_key(str(i), "plantuml", "png") for i in range(3)]
+    for age, key in enumerate(keys[:2]):
+        cache.store_bytes(key, b"x" * 10)
+        entry = cache._entry_path(key)
+        os.utime(entry, (1000 + age, 1000 + age))
+
+    cache.store_bytes(keys[2], b"x" * 10)
+
+    assert not cache._entry_path(keys[0]).exists()
+    assert cache._entry_path(keys[1]).exists()
+    assert cache._entry_path(keys[2]).exists()
+    assert cache.get_stats()["size_bytes"] == 20
+
+
+def test_hardlinked_output_is_replaced_not_rewritten(cache, tmp_path, monkeypatch):
+    from utils.file_manager import atomic_output_path
+
+    monkeypatch.setattr(render_cache, "RENDER_CACHE_HARDLINK", True)
+    key = cache.make_key("a -> b", "graphviz", "png")
+    cache.store_bytes(key, b"a -> b")
+    output = tmp_path / "out.png"
+    assert cache.lookup(key, str(output))
+
+    # Engine writing its own output file (e.g. dot -o) for another diagram
+    with atomic_output_path(str(output)) as tmp_output:
+        with open(tmp_output, "wb") as f:
+            f.write(b"c -> d")
+
+    assert output.read_bytes() == b"c -> d"
+    assert cache.lookup(key, str(tmp_path / "other.png"))
+    assert (tmp_path / "other.png").read_bytes() == b"a -> b"
+
+
+def test_failed_store_leaves_no_temp_file_and_warns_on_stderr(cache, tmp_path, monkeypatch, capsys):
+    def fail(tmp_path, entry):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cache, "_commit_entry", fail)
+    rendered = tmp_path / "rendered.svg"
+    rendered.write_bytes(b"<svg/>")
+
+    cache.store_bytes(cache.make_key("a", "plantuml", "png"), b"image")
+    cache.store_file(cache.make_key("b", "graphviz", "svg"), str(rendered))
+
+    assert [path for path in cache.RENDER_CACHE_DIR.rglob("*") if path.is_file()] == []
+    captured = capsys.readouterr()
+    # stdout is the MCP protocol channel
+    assert captured.out == ""
+    assert captured.err.count("Warning: render cache write failed (disk full)") == 2
@@ -0,0 +1,104 @@
+"""Tests for the HTTP retry policy."""
+
+import asyncio
+import time
+
+import pytest
+
+from tools import mermaid
+from utils.retry import RetryPolicy, RetryableStatus
+
+
+FAST = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.001, deadline=5, retry_statuses=frozenset({503}))
+
+
+class Flaky:
+    """Call failing with the given errors before succeeding."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+def test_transient_errors_are_retried():
+    call = Flaky(RetryableStatus(503), asyncio.TimeoutError())
+
+    assert asyncio.run(FAST.run("test", call)) == "ok"
+    assert call.calls == 3
+
+
+def test_gives_up_after_max_attempts():
+    call = Flaky(*(RetryableStatus(503) for _ in range(5)))
+
+    with pytest.raises(RetryableStatus):
+        asyncio.run(FAST.run("test", call))
+    assert call.calls == 3
+
+
+def test_non_transient_errors_are_not_retried():
+    call = Flaky(ValueError("bad diagram"))
+
+    with pytest.raises(ValueError):
+        asyncio.run(FAST.run("test", call))
+    assert call.calls == 1
+
+
+def test_check_status_raises_only_for_retry_statuses():
+    FAST.check_status(200)
+    FAST.check_status(400)
+    with pytest.raises(RetryableStatus) as error:
+        FAST.check_status(503, "overloaded")
+    assert error.value.status == 503
+    assert str(error.value) == "HTTP 503: overloaded"
+
+
+def test_deadline_bounds_all_attempts():
+    policy = RetryPolicy(max_attempts=10, base_delay=0.001, max_delay=0.001, deadline=0.05)
+    calls = 0
+
+    async def hang():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(policy.run("test", hang))
+    assert calls == 1
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(base_delay=1, max_delay=2)
+
+    assert all(0 <= policy.backoff(attempt) <= 2 for attempt in range(1, 10))
+
+
+def test_mermaid_endpoint_retries_share_its_timeout(monkeypatch):
+    class StalledSession:
+        calls = 0
+
+        def get(self, url, timeout):
+            self.calls += 1
+            return self
+
+        async def __aenter__(self):
+            await asyncio.sleep(10)
+
+        async def __aexit__(self, *exc_info):
+            pass
+
+    session = StalledSession()
+    monkeypatch.setattr(mermaid, "get_session", lambda: session)
+    monkeypatch.setattr(mermaid, "HTTP_RETRY", FAST)
+
+    started = time.monotonic()
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(mermaid._render_via_ink("http://mermaid.invalid", "graph TD; A-->B", "png", 0.1))
+
+    assert time.monotonic() - started < 0.5
+    assert session.calls == 1
@@ -0,0 +1,98 @@
+"""Tests for single-flight deduplication of concurrent renders."""
+
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+class Work:
+    """Call that blocks until released and counts its executions."""
+
+    def __init__(self, result="png", error=None) -> None:
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = None
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+async def run_concurrently(flight, work, callers=3, key="k"):
+    work.release = asyncio.Event()
+    tasks = [asyncio.create_task(flight.do(key, work)) for _ in range(callers)]
+    await asyncio.sleep(0.01)
+    work.release.set()
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def test_followers_share_leader_result():
+    work = Work()
+
+    results = asyncio.run(run_concurrently(SingleFlight("test"), work))
+
+    assert work.calls == 1
+    assert results == [("png", False), ("png", True), ("png", True)]
+
+
+def test_followers_share_leader_exception():
+    work = Work(error=RuntimeError("renderer crashed"))
+
+    results = asyncio.run(run_concurrently(SingleFlight("test"), work))
+
+    assert work.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight("test")
+    work = Work()
+
+    async def scenario():
+        work.release = asyncio.Event()
+        tasks = [asyncio.create_task(flight.do(key, work)) for key in ("a", "b")]
+        await asyncio.sleep(0.01)
+        work.release.set()
+        return await asyncio.gather(*tasks)
+
+    assert asyncio.run(scenario()) == [("png", False), ("png", False)]
+    assert work.calls == 2
+
+
+def test_nothing_is_cached_after_completion():
+    flight = SingleFlight("test")
+    work = Work()
+
+    async def scenario():
+        await run_concurrently(flight, work, callers=1)
+        return await run_concurrently(flight, work, callers=1)
+
+    assert asyncio.run(scenario()) == [("png", False)]
+    assert work.calls == 2
+
+
+def test_follower_takes_over_when_leader_is_cancelled():
+    flight = SingleFlight("test")
+    work = Work()
+
+    async def scenario():
+        work.release = asyncio.Event()
+        leader = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        await asyncio.sleep(0.01)
+        work.release.set()
+        return await follower
+
+    assert asyncio.run(scenario()) == ("png", False)
+    assert work.calls == 2